@@ -0,0 +1,127 @@
+"""Bộ nhớ đệm kết quả phân tích (nước đi, điểm, độ sâu) của Stockfish và BotBaka, lưu bền trong SQLite."""
+import os
+import sqlite3
+import threading
+from collections import OrderedDict, namedtuple
+
+import chess
+
+from transposition import zobrist_key
+
+CACHE_FILE = os.environ.get(
+    "ANALYSIS_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "analysis_cache.sqlite"))
+MEMORY_ENTRIES = 4096
+
+# Điểm theo góc nhìn quân trắng; time_limit là None khi tìm theo độ sâu cố định
+Analysis = namedtuple("Analysis", ["move", "score", "depth", "time_limit"])
+
+
+def signed_key(key: int) -> int:
+    """SQLite chỉ lưu số nguyên 64 bit có dấu."""
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+class AnalysisCache:
+    """LRU trong bộ nhớ phía trước bảng SQLite; mỗi (thế cờ, engine) giữ kết quả sâu nhất."""
+
+    def __init__(self, path: str = CACHE_FILE, memory_entries: int = MEMORY_ENTRIES):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.connection = None
+        self.hits = 0
+        self.misses = 0
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS analysis ("
+                "key INTEGER NOT NULL, engine TEXT NOT NULL, move TEXT NOT NULL, score INTEGER, "
+                "depth INTEGER NOT NULL, time_limit REAL, PRIMARY KEY (key, engine))")
+        return self.connection
+
+    def remember(self, entry_key: tuple, analysis: Analysis):
+        self.memory[entry_key] = analysis
+        self.memory.move_to_end(entry_key)
+        if len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, key: int, engine: str):
+        """Kết quả đã lưu của thế cờ `key` với engine `engine`, None nếu chưa có."""
+        entry_key = (key, engine)
+        with self.lock:
+            analysis = self.memory.get(entry_key)
+            if analysis is not None:
+                self.memory.move_to_end(entry_key)
+                return analysis
+            row = self.connect().execute(
+                "SELECT move, score, depth, time_limit FROM analysis WHERE key = ? AND engine = ?",
+                (signed_key(key), engine)).fetchone()
+            if row is None:
+                return None
+            analysis = Analysis(*row)
+            self.remember(entry_key, analysis)
+            return analysis
+
+    def put(self, key: int, engine: str, analysis: Analysis):
+        """Lưu kết quả nếu sâu ít nhất bằng kết quả đang có."""
+        entry_key = (key, engine)
+        with self.lock:
+            old = self.memory.get(entry_key)
+            if old is not None and old.depth > analysis.depth:
+                return
+            with self.connect() as connection:
+                cursor = connection.execute(
+                    "INSERT INTO analysis VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (key, engine) DO UPDATE SET "
+                    "move = excluded.move, score = excluded.score, depth = excluded.depth, "
+                    "time_limit = excluded.time_limit WHERE excluded.depth >= analysis.depth",
+                    (signed_key(key), engine) + tuple(analysis))
+            # Trong file đã có kết quả sâu hơn thì bỏ bản trong bộ nhớ để lần sau đọc lại từ file
+            if cursor.rowcount:
+                self.remember(entry_key, analysis)
+            else:
+                self.memory.pop(entry_key, None)
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def lookup(self, board: chess.Board, engine: str, depth: int = None, time_limit: float = None):
+        """Kết quả đã lưu (nước đi dạng chess.Move) nếu đủ tốt cho giới hạn yêu cầu: sâu ít nhất
+        `depth`, hoặc đã được tìm với thời gian ít nhất `time_limit`; None nếu phải tìm lại."""
+        analysis = self.get(zobrist_key(board), engine)
+        if analysis is not None:
+            enough = ((depth is not None and analysis.depth >= depth) or
+                      (time_limit is not None and analysis.time_limit is not None
+                       and analysis.time_limit >= time_limit))
+            move = chess.Move.from_uci(analysis.move)
+            # Kiểm tra nước đi để tránh trùng khóa Zobrist
+            if enough and board.is_legal(move):
+                self.hits += 1
+                return analysis._replace(move=move)
+        self.misses += 1
+        return None
+
+    def store(self, board: chess.Board, engine: str, move: chess.Move, score, depth: int,
+              time_limit: float = None):
+        if move is None:
+            return
+        score = None if score is None else int(score)
+        self.put(zobrist_key(board), engine, Analysis(move.uci(), score, depth, time_limit))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> AnalysisCache:
+    """Bộ nhớ đệm dùng chung của tiến trình (mở file SQLite ở lần tra đầu tiên)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnalysisCache()
+        return _cache
@@ -0,0 +1,521 @@
+"""Đo hiệu năng của BotBaka: chạy `python bench.py <lệnh>`."""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+import chess
+
+import bitbase
+import botbaka
+import time_manager
+from position import Position
+from see import see
+
+# Các thế cờ mẫu: khai cuộc, trung cuộc nhiều va chạm và tàn cuộc
+BENCH_FENS = [
+    "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+    "r1bq1rk1/ppp2ppp/2np1n2/2b1p3/2B1P3/2NP1N2/PPP2PPP/R1BQ1RK1 w - - 0 7",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+]
+
+
+def bench_ordering(depth: int):
+    """So sánh số nút khi bật và tắt sắp xếp nước đi ở cùng độ sâu."""
+    print(f"{'thế cờ':<8}{'tắt':>10}{'bật':>10}{'giảm':>8}{'EBF tắt':>9}{'EBF bật':>9}")
+    for i, fen in enumerate(BENCH_FENS):
+        nodes = []
+        for ordering in (False, True):
+            botbaka.transposition_table.clear()
+            result = botbaka.search(chess.Board(fen), depth, ordering=ordering)
+            nodes.append(result.nodes)
+        off, on = nodes
+        print(f"{i:<8}{off:>10}{on:>10}{off / on:>7.1f}x"
+              f"{off ** (1 / depth):>9.2f}{on ** (1 / depth):>9.2f}")
+
+
+def sample_positions(count: int, seed: int = 0) -> list:
+    """Sinh các thế cờ mẫu bằng cách đi ngẫu nhiên từ thế cờ ban đầu."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = chess.Board()
+        for _ in range(rng.randint(10, 80)):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        if not board.is_game_over():
+            positions.append(board)
+    return positions
+
+
+def legacy_mobility(board: chess.Board) -> float:
+    """Cách tính mobility cũ: sao chép bàn cờ và sinh toàn bộ nước hợp lệ cho hai bên."""
+    board_copy = board.copy()
+    board_copy.turn = chess.WHITE
+    white_moves = len(list(board_copy.legal_moves))
+    board_copy.turn = chess.BLACK
+    black_moves = len(list(board_copy.legal_moves))
+    return 10 * (white_moves - black_moves)
+
+
+def pawn_terms(board: chess.Board):
+    """Tính trực tiếp cấu trúc tốt và an toàn vua, không qua bảng băm tốt."""
+    return botbaka.evaluate_pawn_structure(board), botbaka.evaluate_king_safety(board)
+
+
+def time_per_call(function, positions: list, repeat: int = 3) -> float:
+    """Thời gian trung bình (micro giây) cho một lần gọi, lấy lần chạy nhanh nhất."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for board in positions:
+            function(board)
+        best = min(best, time.perf_counter() - start)
+    return best / len(positions) * 1e6
+
+
+def bench_eval(count: int):
+    """Chi phí đánh giá một lá: mobility cũ (sao chép bàn cờ) so với bitboard."""
+    positions = sample_positions(count)
+    new_mobility = botbaka.evaluate_mobility
+    rows = [("mobility", legacy_mobility, new_mobility),
+            ("tốt + vua", pawn_terms, botbaka.pawn_hash.probe)]
+    try:
+        botbaka.evaluate_mobility = legacy_mobility
+        botbaka.pawn_hash.probe = pawn_terms
+        legacy_leaf = time_per_call(botbaka.evaluate_board, positions)
+    finally:
+        botbaka.evaluate_mobility = new_mobility
+        del botbaka.pawn_hash.probe
+    print(f"{'hàm':<16}{'trước (us)':>12}{'sau (us)':>12}{'nhanh hơn':>11}")
+    for name, before, after in rows:
+        before_us = time_per_call(before, positions)
+        after_us = time_per_call(after, positions)
+        print(f"{name:<16}{before_us:>12.1f}{after_us:>12.1f}{before_us / after_us:>10.1f}x")
+    leaf_us = time_per_call(botbaka.evaluate_board, positions)
+    print(f"{'evaluate_board':<16}{legacy_leaf:>12.1f}{leaf_us:>12.1f}{legacy_leaf / leaf_us:>10.1f}x")
+
+    # Tỉ lệ trúng của bảng băm tốt trong một lần tìm kiếm thật
+    for fen in BENCH_FENS:
+        botbaka.pawn_hash.clear()
+        botbaka.search(chess.Board(fen), 2)
+        print(f"bảng băm tốt: {botbaka.pawn_hash.hit_rate():.1%} trúng "
+              f"({botbaka.pawn_hash.hits} trúng, {botbaka.pawn_hash.misses} trượt)")
+
+
+# (tên, tùy chọn tìm kiếm, có bắt buộc trùng với tuần tự không). Null move và LMR phụ thuộc thứ tự
+# duyệt trong cây, delta pruning phụ thuộc cửa sổ alpha-beta: chỉ khi tắt cả ba thì hai cách mới
+# chắc chắn trùng nhau; với tùy chọn mặc định chỉ đo tăng tốc
+PARALLEL_CONFIGS = [
+    ("tắt null move, LMR, delta pruning",
+     {"null_move": False, "late_move_reductions": False, "delta_pruning": False}, True),
+    ("mặc định", {}, False),
+]
+
+
+def bench_parallel(depth: int, workers: int) -> int:
+    """Tăng tốc của tìm kiếm chia gốc so với tuần tự, kiểm tra kết quả trùng nhau.
+
+    Trả về số thế cờ mà hai cách cho kết quả khác nhau ở cấu hình bắt buộc trùng.
+    """
+    botbaka.get_pool(workers)  # khởi động trước để không tính thời gian tạo tiến trình
+    mismatches = 0
+    for name, options, must_match in PARALLEL_CONFIGS:
+        print(f"{name}:")
+        print(f"{'thế cờ':<8}{'tuần tự':>10}{'song song':>11}{'tăng tốc':>10}{'số nút':>8}  trùng")
+        total_serial, total_parallel = 0.0, 0.0
+        for i, fen in enumerate(BENCH_FENS):
+            results = []
+            for n in (1, workers):
+                botbaka.transposition_table.clear()
+                start = time.perf_counter()
+                result = botbaka.search(chess.Board(fen), depth, workers=n, **options)
+                results.append((result, time.perf_counter() - start))
+            (serial, serial_time), (parallel, parallel_time) = results
+            total_serial += serial_time
+            total_parallel += parallel_time
+            same = serial.move == parallel.move and serial.score == parallel.score
+            mismatches += must_match and not same
+            work = (parallel.nodes + parallel.qnodes) / (serial.nodes + serial.qnodes)
+            print(f"{i:<8}{serial_time:>9.2f}s{parallel_time:>10.2f}s"
+                  f"{serial_time / parallel_time:>9.2f}x{work:>7.2f}x  {'có' if same else 'KHÔNG'}"
+                  f" ({serial.move} {serial.score} / {parallel.move} {parallel.score})")
+        print(f"{'tổng':<8}{total_serial:>9.2f}s{total_parallel:>10.2f}s"
+              f"{total_serial / total_parallel:>9.2f}x  ({workers} tiến trình, {os.cpu_count()} lõi)")
+    return mismatches
+
+
+PRUNING_CONFIGS = [
+    ("không", {"null_move": False, "late_move_reductions": False}),
+    ("null move", {"null_move": True, "late_move_reductions": False}),
+    ("LMR", {"null_move": False, "late_move_reductions": True}),
+    ("cả hai", {"null_move": True, "late_move_reductions": True}),
+]
+
+
+def bench_pruning(time_limit: float):
+    """Độ sâu đạt được trong cùng thời gian khi bật/tắt null move và LMR."""
+    print(f"{'cấu hình':<12}{'độ sâu TB':>10}{'nút/giây':>10}  độ sâu từng thế cờ")
+    for name, options in PRUNING_CONFIGS:
+        depths, nodes = [], 0
+        for fen in BENCH_FENS:
+            botbaka.transposition_table.clear()
+            result = botbaka.search(chess.Board(fen), time_limit=time_limit, **options)
+            depths.append(result.depth)
+            nodes += result.nodes + result.qnodes
+        rate = nodes / (time_limit * len(BENCH_FENS))
+        print(f"{name:<12}{sum(depths) / len(depths):>10.2f}{rate:>10.0f}  {depths}")
+
+
+# Thế cờ perft chuẩn (chessprogramming.org): nhập thành, bắt tốt qua đường, phong cấp, ghim
+PERFT_FENS = [
+    chess.STARTING_FEN,
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+    "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+]
+
+
+def board_perft(board: chess.Board, depth: int) -> int:
+    if depth == 0:
+        return 1
+    nodes = 0
+    for move in board.legal_moves:
+        board.push(move)
+        nodes += board_perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+def bench_perft(depth: int):
+    """So tốc độ sinh nước đi của Position với python-chess (tính đúng sai nằm ở tests/test_position.py)."""
+    print(f"{'thế cờ':<8}{'nút':>10}{'Position':>10}{'chess':>9}")
+    for i, fen in enumerate(PERFT_FENS):
+        board = chess.Board(fen)
+        start = time.perf_counter()
+        nodes = Position.from_board(board).perft(depth)
+        position_time = time.perf_counter() - start
+        start = time.perf_counter()
+        board_perft(board, depth)
+        board_time = time.perf_counter() - start
+        print(f"{i:<8}{nodes:>10}{position_time:>9.2f}s{board_time:>8.2f}s")
+
+
+def bench_nps(depth: int):
+    """Tốc độ tìm kiếm (nút/giây) ở độ sâu cố định."""
+    total_nodes, total_time = 0, 0.0
+    for i, fen in enumerate(BENCH_FENS):
+        botbaka.transposition_table.clear()
+        start = time.perf_counter()
+        result = botbaka.search(chess.Board(fen), depth)
+        elapsed = time.perf_counter() - start
+        nodes = result.nodes + result.qnodes
+        total_nodes += nodes
+        total_time += elapsed
+        print(f"{i:<4}{str(result.move):<7}{result.score:>6}{nodes:>9} nút"
+              f"{nodes / elapsed:>9.0f} nút/giây")
+    print(f"trung bình: {total_nodes / total_time:.0f} nút/giây")
+
+
+def bench_see(count: int):
+    """Số lần gọi SEE mỗi giây trên các nước ăn quân (tính đúng sai nằm ở tests/test_see.py)."""
+    captures = []
+    for board in sample_positions(count):
+        pos = Position.from_board(board)
+        captures.extend((pos, move) for move in pos.generate_moves(captures_only=True))
+    start = time.perf_counter()
+    for pos, move in captures:
+        see(pos, move)
+    elapsed = time.perf_counter() - start
+    print(f"{len(captures)} nước ăn quân: {len(captures) / elapsed:.0f} lần gọi/giây")
+
+
+BATCH_SIZES = [1, 8, 32, 128, 512]
+
+
+def bench_batch(count: int, depth: int):
+    """Số thế cờ/giây của đánh giá theo lô ở nhiều cỡ lô, so với đánh giá từng thế cờ."""
+    positions = sample_positions(count)
+    rows = [botbaka.plane_bitboards(board) for board in positions]
+    scalar_us = time_per_call(botbaka.evaluate_position, positions)
+    print(f"từng thế cờ (evaluate_position): {1e6 / scalar_us:.0f} thế cờ/giây")
+    print(f"{'cỡ lô':>6}{'tĩnh':>12}{'đầy đủ':>12}  (thế cờ/giây)")
+    for size in BATCH_SIZES:
+        batches = [positions[i:i + size] for i in range(0, len(positions), size)]
+        row_batches = [rows[i:i + size] for i in range(0, len(rows), size)]
+        static_us = time_per_call(
+            lambda batch: botbaka.evaluate_static_batch(botbaka.pack_planes(batch)), row_batches)
+        full_us = time_per_call(botbaka.evaluate_batch, batches)
+        print(f"{size:>6}{size * 1e6 / static_us:>12.0f}{size * 1e6 / full_us:>12.0f}")
+
+    print(f"tìm kiếm độ sâu {depth}, đánh giá nút con theo lô:")
+    for batch_eval in (False, True):
+        nodes, elapsed = 0, 0.0
+        for fen in BENCH_FENS:
+            botbaka.transposition_table.clear()
+            start = time.perf_counter()
+            result = botbaka.search(chess.Board(fen), depth, batch_eval=batch_eval)
+            elapsed += time.perf_counter() - start
+            nodes += result.nodes + result.qnodes
+        print(f"  {'bật' if batch_eval else 'tắt':<4}{nodes:>9} nút{elapsed:>8.2f}s"
+              f"{nodes / elapsed:>9.0f} nút/giây")
+
+
+def bench_nnue(count: int, depth: int, weights: str):
+    """Số lần đánh giá mỗi giây của evaluate_board và mạng NNUE (tính lại và cập nhật tăng dần)."""
+    import nnue
+    if os.path.exists(weights):
+        network = nnue.load_network(weights)
+    else:
+        print(f"không có {weights}, dùng mạng ngẫu nhiên (chỉ đo tốc độ)")
+        network = nnue.Network.random()
+    boards = sample_positions(count)
+    positions = [botbaka.search_position(board) for board in boards]
+    print(f"{'cách đánh giá':<28}{'lần/giây':>10}")
+    hand_us = time_per_call(botbaka.evaluate_position, positions)
+    print(f"{'evaluate_position':<28}{1e6 / hand_us:>10.0f}")
+    full_us = time_per_call(network.evaluate, positions)
+    print(f"{'NNUE tính lại':<28}{1e6 / full_us:>10.0f}")
+
+    # Đi một nước rồi đánh giá rồi hoàn tác: so cập nhật tăng dần với đánh giá thủ công
+    pairs = []
+    for pos in positions:
+        moves = pos.legal_moves()
+        pairs.append((pos, moves[len(moves) // 2]))
+
+    def make_and_evaluate(pair):
+        pos, move = pair
+        pos.make(move)
+        score = pos.accumulator.evaluate(pos.turn) if pos.accumulator else botbaka.evaluate_position(pos)
+        pos.unmake()
+        return score
+    hand_us = time_per_call(make_and_evaluate, pairs)
+    for pos in positions:
+        pos.accumulator = nnue.Accumulator(network, pos)
+    nnue_us = time_per_call(make_and_evaluate, pairs)
+    print(f"{'make + evaluate_position':<28}{1e6 / hand_us:>10.0f}")
+    print(f"{'make + NNUE tăng dần':<28}{1e6 / nnue_us:>10.0f}")
+
+    if not os.path.exists(weights):
+        return
+    print(f"tìm kiếm độ sâu {depth}:")
+    for name, path in (("evaluate_board", None), ("NNUE", weights)):
+        nodes, elapsed = 0, 0.0
+        for fen in BENCH_FENS:
+            botbaka.transposition_table.clear()
+            start = time.perf_counter()
+            result = botbaka.search(chess.Board(fen), depth, nnue_weights=path)
+            elapsed += time.perf_counter() - start
+            nodes += result.nodes + result.qnodes
+        print(f"  {name:<16}{nodes:>9} nút{elapsed:>8.2f}s{nodes / elapsed:>9.0f} nút/giây")
+
+
+def bench_book(path: str, count: int):
+    """Thời gian tra sách khai cuộc cho mỗi nước (đi theo sách đến khi hết sách)."""
+    import book
+    if not os.path.exists(path):
+        print(f"không có {path}, tạo sách bằng `python book.py <file.pgn>`")
+        return
+    opening = book.OpeningBook(path)
+    print(f"{path}: {opening.count} mục")
+    rng = random.Random(0)
+    boards = []
+    for _ in range(count):
+        board = chess.Board()
+        while True:
+            boards.append(board.copy(stack=False))
+            move = opening.choose(board, rng)
+            if move is None:
+                break
+            board.push(move)
+    hits = sum(1 for board in boards if opening.entries(board))
+    probe_us = time_per_call(opening.choose, boards)
+    print(f"{len(boards)} lần tra, {hits} lần có trong sách, {probe_us:.1f} µs/lần")
+
+
+def bitbase_value(board: chess.Board):
+    """Kết quả theo bên đang đi (1 thắng, 0 hòa, -1 thua) đọc từ bitbase, tàn cuộc khác tính hòa."""
+    if board.is_checkmate():
+        return -1
+    probe = bitbase.probe(board)
+    if probe is None or not probe[1]:
+        return 0
+    return 1 if probe[0] == board.turn else -1
+
+
+def bench_bitbase(count: int):
+    """Thời gian tạo và tra bitbase; kiểm tra mỗi thế cờ khớp kết quả tốt nhất của các nước con
+    (sinh nước bằng python-chess, độc lập với bộ giải)."""
+    start = time.perf_counter()
+    bitbase.prepare()
+    print(f"nạp/tạo bitbase: {time.perf_counter() - start:.2f}s")
+
+    rng = random.Random(0)
+    boards = []
+    for piece in bitbase.TABLES:
+        found = 0
+        while found < count:
+            board = chess.Board(None)
+            strong = rng.choice(chess.COLORS)
+            squares = rng.sample(range(8, 56) if piece == chess.PAWN else chess.SQUARES, 1)
+            squares += rng.sample([sq for sq in chess.SQUARES if sq != squares[0]], 2)
+            board.set_piece_at(squares[0], chess.Piece(piece, strong))
+            board.set_piece_at(squares[1], chess.Piece(chess.KING, strong))
+            board.set_piece_at(squares[2], chess.Piece(chess.KING, not strong))
+            board.turn = rng.choice(chess.COLORS)
+            if board.is_valid():
+                boards.append(board)
+                found += 1
+    errors = 0
+    for board in boards:
+        best = -1
+        for move in board.legal_moves:
+            board.push(move)
+            best = max(best, -bitbase_value(board))
+            board.pop()
+        if not any(board.legal_moves):
+            best = -1 if board.is_check() else 0
+        if best != bitbase_value(board):
+            errors += 1
+            print(f"  sai: {board.fen()}")
+    probe_us = time_per_call(bitbase.probe, boards)
+    print(f"{len(boards)} thế cờ, {errors} sai, {probe_us:.2f} µs/lần tra")
+
+
+def bench_cancel(delay: float):
+    """Thời gian từ lúc bật stop token đến khi luồng tìm kiếm của BotBaka/BotAho kết thúc."""
+    import botaho
+    bots = {"BotBaka": lambda board, token: botbaka.find_best_move(board, time_limit=60, cache=False,
+                                                                   stop_token=token),
+            "BotAho": botaho.random_move}
+    for name, play in bots.items():
+        latencies = []
+        for fen in BENCH_FENS:
+            token = threading.Event()
+            thread = threading.Thread(target=play, args=(chess.Board(fen), token))
+            thread.start()
+            time.sleep(delay)
+            start = time.perf_counter()
+            token.set()
+            thread.join()
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(f"{name:<8} dừng sau {sum(latencies) / len(latencies):.2f} ms trung bình, "
+              f"tối đa {max(latencies):.2f} ms")
+
+
+def bench_blitz(games: int, base: float, increment: float, max_plies: int):
+    """Các ván BotBaka tự đấu có đồng hồ: số lần hết giờ, thời gian dùng mỗi nước so với ngân sách."""
+    flags = 0
+    used, soft_stops = [], 0
+    for game in range(games):
+        board = chess.Board()
+        clock = time_manager.GameClock(base, increment)
+        while not board.is_game_over() and board.ply() < max_plies:
+            budget = time_manager.allocate(clock.time_left(board.turn), increment, board.ply() // 2)
+            move = botbaka.find_best_move(board, cache=False, budget=budget)
+            used.append(budget.elapsed())
+            soft_stops += budget.elapsed() < budget.hard * 0.9
+            board.push(move)
+            clock.press()
+            if clock.flag() is not None:
+                flags += 1
+                break
+        left = " / ".join(f"{clock.time_left(color):.1f}s" for color in chess.COLORS[::-1])
+        print(f"ván {game + 1}: {board.ply()} nửa nước, {board.result(claim_draw=True)}, còn lại {left}")
+    print(f"{flags} lần hết giờ; {len(used)} nước, trung bình {sum(used) / len(used):.2f}s, "
+          f"tối đa {max(used):.2f}s; {soft_stops} nước dừng trước ngân sách cứng")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+    ordering = commands.add_parser(
+        "ordering", help="số nút khi bật/tắt sắp xếp nước đi")
+    ordering.add_argument("--depth", type=int, default=3)
+    evaluation = commands.add_parser(
+        "eval", help="chi phí đánh giá một lá trước/sau")
+    evaluation.add_argument("--positions", type=int, default=500)
+    parallel = commands.add_parser(
+        "parallel", help="tăng tốc của tìm kiếm song song")
+    parallel.add_argument("--depth", type=int, default=3)
+    parallel.add_argument("--workers", type=int, default=os.cpu_count())
+    pruning = commands.add_parser(
+        "pruning", help="độ sâu đạt được khi bật/tắt null move và LMR")
+    pruning.add_argument("--time", type=float, default=5.0)
+    perft = commands.add_parser(
+        "perft", help="tốc độ sinh nước đi của Position so với python-chess")
+    perft.add_argument("--depth", type=int, default=3)
+    nps = commands.add_parser(
+        "nps", help="số nút/giây của tìm kiếm")
+    nps.add_argument("--depth", type=int, default=4)
+    see_parser = commands.add_parser(
+        "see", help="tốc độ static exchange evaluation")
+    see_parser.add_argument("--positions", type=int, default=500)
+    batch = commands.add_parser(
+        "batch", help="đánh giá theo lô bằng NumPy ở nhiều cỡ lô")
+    batch.add_argument("--positions", type=int, default=1024)
+    batch.add_argument("--depth", type=int, default=4)
+    nnue_parser = commands.add_parser(
+        "nnue", help="tốc độ đánh giá của mạng NNUE so với evaluate_board")
+    nnue_parser.add_argument("--positions", type=int, default=500)
+    nnue_parser.add_argument("--depth", type=int, default=4)
+    nnue_parser.add_argument("--weights", default=os.path.join(os.path.dirname(__file__), "nnue.npz"))
+    book_parser = commands.add_parser(
+        "book", help="thời gian tra sách khai cuộc Polyglot")
+    book_parser.add_argument("--book", default=os.path.join(os.path.dirname(__file__), "book.bin"))
+    book_parser.add_argument("--lines", type=int, default=200)
+    bitbase_parser = commands.add_parser(
+        "bitbase", help="kiểm tra và đo tốc độ bitbase KPK/KRK/KQK")
+    bitbase_parser.add_argument("--positions", type=int, default=2000)
+    cancel_parser = commands.add_parser(
+        "cancel", help="độ trễ hủy tìm kiếm bằng stop token")
+    cancel_parser.add_argument("--delay", type=float, default=0.5)
+    blitz = commands.add_parser(
+        "blitz", help="các ván tự đấu có đồng hồ, kiểm tra chia thời gian")
+    blitz.add_argument("--games", type=int, default=2)
+    blitz.add_argument("--base", type=float, default=30.0)
+    blitz.add_argument("--increment", type=float, default=0.3)
+    blitz.add_argument("--max-plies", type=int, default=200)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    mismatches = 0
+    if args.command == "ordering":
+        bench_ordering(args.depth)
+    elif args.command == "eval":
+        bench_eval(args.positions)
+    elif args.command == "parallel":
+        mismatches = bench_parallel(args.depth, args.workers)
+    elif args.command == "pruning":
+        bench_pruning(args.time)
+    elif args.command == "perft":
+        bench_perft(args.depth)
+    elif args.command == "nps":
+        bench_nps(args.depth)
+    elif args.command == "see":
+        bench_see(args.positions)
+    elif args.command == "batch":
+        bench_batch(args.positions, args.depth)
+    elif args.command == "nnue":
+        bench_nnue(args.positions, args.depth, args.weights)
+    elif args.command == "book":
+        bench_book(args.book, args.lines)
+    elif args.command == "bitbase":
+        bench_bitbase(args.positions)
+    elif args.command == "cancel":
+        bench_cancel(args.delay)
+    elif args.command == "blitz":
+        bench_blitz(args.games, args.base, args.increment, args.max_plies)
+    print(f"tổng thời gian: {time.perf_counter() - start:.2f}s")
+    if mismatches:
+        sys.exit(f"{mismatches} thế cờ tìm song song khác tìm tuần tự")
+
+
+if __name__ == "__main__":
+    main()
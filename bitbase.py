@@ -0,0 +1,222 @@
+"""Bitbase thắng/hòa cho KPK, KRK, KQK, tạo bằng phân tích ngược; tạo trước: `python bitbase.py`."""
+import argparse
+import mmap
+import os
+import time
+
+import chess
+try:
+    import numpy as np
+except ImportError:  # Không có NumPy thì chỉ đọc được các file đã tạo sẵn
+    np = None
+
+BITBASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bitbases")
+# Bảng theo loại quân của bên mạnh; KPK dùng KQK và KRK cho nước phong cấp nên tạo sau cùng
+TABLES = {chess.QUEEN: "KQK", chess.ROOK: "KRK", chess.PAWN: "KPK"}
+# Chỉ số thế cờ: (bên đi, vua bên mạnh, vua bên yếu, quân), bên đi 0 = bên mạnh, 1 = bên yếu;
+# thế cờ được lật dọc để bên mạnh luôn là quân trắng
+SIZE = 64 * 64 * 64
+PAD = 2 * SIZE  # chỉ số giả (luôn sai) cho nước đi không tồn tại
+
+_tables = {}
+
+
+# 1. Tra bitbase: một phép tính chỉ số và một lần đọc bit trên file đã ánh xạ vào bộ nhớ
+def load(name: str):
+    """Bitbase `name` dạng mmap, None nếu chưa có file. Không bao giờ tạo bitbase ở đây vì hàm
+    này được gọi từ trong tìm kiếm; tạo trước bằng prepare() hoặc `python bitbase.py`."""
+    if name not in _tables:
+        path = os.path.join(BITBASE_DIR, name + ".bin")
+        if not os.path.exists(path):
+            _tables[name] = None
+            return None
+        with open(path, "rb") as f:
+            _tables[name] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return _tables[name]
+
+
+def prepare(verbose: bool = False):
+    """Tạo các bitbase còn thiếu (cần NumPy, khoảng 2 giây); gọi một lần lúc khởi động,
+    ngoài thời gian nghĩ của các bot."""
+    if np is None:
+        return
+    for name in TABLES.values():
+        if _tables.get(name) is None:
+            _tables.pop(name, None)
+            solved(name, verbose)
+
+
+def probe(board):
+    """(màu bên mạnh, bên mạnh thắng hay không) của thế cờ ba quân KPK/KRK/KQK (chess.Board
+    hoặc Position), None với thế cờ khác. Bỏ qua luật 50 nước và quyền nhập thành."""
+    pieces = board.occupied & ~board.kings
+    if chess.popcount(board.occupied) != 3 or not pieces:
+        return None
+    piece_square = chess.lsb(pieces)
+    if pieces & board.pawns:
+        data = load("KPK")
+    elif pieces & board.rooks:
+        data = load("KRK")
+    elif pieces & board.queens:
+        data = load("KQK")
+    else:
+        return None
+    if data is None:
+        return None
+    strong = bool(pieces & board.occupied_co[chess.WHITE])
+    strong_king = chess.lsb(board.kings & board.occupied_co[strong])
+    weak_king = chess.lsb(board.kings & board.occupied_co[not strong])
+    if strong == chess.BLACK:
+        strong_king, weak_king, piece_square = strong_king ^ 56, weak_king ^ 56, piece_square ^ 56
+    index = (board.turn != strong) * SIZE + (strong_king * 64 + weak_king) * 64 + piece_square
+    return strong, bool(data[index >> 3] >> (7 - (index & 7)) & 1)
+
+
+# 2. Tạo bitbase bằng phân tích ngược trên mảng NumPy chỉ số [vua mạnh, vua yếu, quân]
+def king_destinations() -> list:
+    """Với mỗi hướng, ô đến của vua từ mỗi ô (64 nếu ra ngoài bàn cờ)."""
+    result = []
+    for file_step, rank_step in ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)):
+        row = []
+        for square in chess.SQUARES:
+            file, rank = chess.square_file(square) + file_step, chess.square_rank(square) + rank_step
+            row.append(chess.square(file, rank) if 0 <= file < 8 and 0 <= rank < 8 else 64)
+        result.append(np.array(row))
+    return result
+
+
+def slider_tables(piece_type: int):
+    """aligned[p, x]: quân trượt ở p đi thẳng tới được x trên bàn trống;
+    between[p, x, y]: ô y nằm giữa p và x (chặn đường đi)."""
+    aligned = np.zeros((64, 64), dtype=bool)
+    masks = np.zeros((64, 64), dtype=np.uint64)
+    for p in chess.SQUARES:
+        for x in chess.SQUARES:
+            same_line = chess.square_file(p) == chess.square_file(x) or chess.square_rank(p) == chess.square_rank(x)
+            if piece_type == chess.QUEEN:
+                same_line = same_line or chess.square_distance(p, x) == abs(chess.square_file(p) - chess.square_file(x)) == abs(chess.square_rank(p) - chess.square_rank(x))
+            aligned[p, x] = p != x and same_line
+            masks[p, x] = chess.between(p, x)
+    between = (masks[:, :, None] >> np.arange(64, dtype=np.uint64)) & np.uint64(1)
+    return aligned, between.astype(bool)
+
+
+def generate(name: str, verbose: bool = False):
+    """Giải bitbase đến điểm bất động, trả về mảng bool phẳng [bên đi, vua mạnh, vua yếu, quân]."""
+    start = time.perf_counter()
+    piece_type = {table: piece for piece, table in TABLES.items()}[name]
+    S = np.arange(64)[:, None, None]
+    W = np.arange(64)[None, :, None]
+    P = np.arange(64)[None, None, :]
+    flat = (S * 64 + W) * 64 + P
+    adjacent = np.array([[chess.square_distance(a, b) <= 1 for b in chess.SQUARES] for a in chess.SQUARES] +
+                        [[True] * 64])
+    kings = king_destinations()
+
+    valid = (S != P) & (W != P) & ~adjacent[S, W]
+    if piece_type == chess.PAWN:
+        valid &= (P >= 8) & (P < 56)
+        attacks = np.zeros((64, 65), dtype=bool)
+        for p in range(8, 56):
+            for x in chess.SquareSet(chess.BB_PAWN_ATTACKS[chess.WHITE][p]):
+                attacks[p, x] = True
+        weak_in_check = attacks[P, W]
+    else:
+        aligned, between = slider_tables(piece_type)
+        # attacks[p, x, s]: quân ở p tấn công ô x, vua bên mạnh ở s có thể chặn đường
+        attacks = np.zeros((64, 65, 64), dtype=bool)
+        attacks[:, :64, :] = aligned[:, :, None] & ~between
+        weak_in_check = attacks[P, W, S]
+    valid_strong = valid & ~weak_in_check  # bên mạnh đi thì bên yếu không được đang bị chiếu
+    valid_padded = np.concatenate([valid, np.zeros((1, 64, 64), dtype=bool)])
+
+    # Mảng kết quả: [0, SIZE) bên mạnh đi, [SIZE, PAD) bên yếu đi, PAD luôn sai.
+    # Nước của bên mạnh dẫn tới thế bên yếu đi; tốt phong hậu/xe trỏ vào bảng KQK/KRK nối thêm
+    strong_targets = [np.where(valid_strong & valid_padded[dest[S], W, P], SIZE + (dest[S] * 64 + W) * 64 + P, PAD)
+                      for dest in kings]
+    extra = None
+    if piece_type == chess.PAWN:
+        free = valid_strong & (S != P + 8) & (W != P + 8)
+        strong_targets.append(np.where(free & (P < 48), SIZE + flat + 8, PAD))
+        strong_targets.append(np.where(free & (P < 16) & (S != P + 16) & (W != P + 16), SIZE + flat + 16, PAD))
+        strong_targets.append(np.where(free & (P >= 48), PAD + 1 + flat + 8, PAD))
+        strong_targets.append(np.where(free & (P >= 48), PAD + 1 + SIZE + flat + 8, PAD))
+        extra = np.concatenate([solved("KQK")[SIZE:], solved("KRK")[SIZE:]])
+    else:
+        # slides[s, w, p, x]: quân trượt từ p tới x không bị hai vua chặn và không đi vào ô có vua
+        blockers = between.transpose(2, 0, 1)
+        square = np.arange(64)
+        slides = (aligned[None, None] & ~blockers[:, None] & ~blockers[None]
+                  & (square != S[..., None]) & (square != W[..., None]))
+
+    # Nước của bên yếu (chỉ có vua) dẫn tới thế bên mạnh đi; ăn được quân thì hòa ngay
+    weak_targets, any_move, escapes = [], np.zeros_like(valid), np.zeros_like(valid)
+    for dest in kings:
+        target = dest[W]
+        attacked = attacks[P, target] if piece_type == chess.PAWN else attacks[P, target, S]
+        legal = valid & ~adjacent[target, S] & ~attacked
+        capture = legal & (target == P)
+        legal &= ~(capture & adjacent[S, P])  # quân đang được vua bảo vệ thì không ăn được
+        capture &= legal
+        any_move |= legal
+        escapes |= capture
+        weak_targets.append(np.where(legal & ~capture, (S * 64 + target) * 64 + P, PAD).ravel())
+    mated = valid & weak_in_check & ~any_move
+    can_win = any_move & ~escapes
+    strong_targets = [target.ravel() for target in strong_targets]
+
+    win = np.zeros(PAD + 1, dtype=bool)
+    win[SIZE:PAD] = mated.ravel()
+    iterations = 0
+    while True:
+        iterations += 1
+        table = win if extra is None else np.concatenate([win, extra])
+        strong_win = np.logical_or.reduce([table[target] for target in strong_targets])
+        if extra is None:
+            weak_win = win[SIZE:PAD].reshape(64, 64, 64)
+            strong_win |= np.any(slides & weak_win[:, :, None, :], axis=3).ravel()
+        strong_win &= valid_strong.ravel()
+        # Bên yếu thua khi bị chiếu bí hoặc mọi nước đi đều dẫn tới thế bên mạnh thắng
+        table = np.append(strong_win, True)
+        weak_win = can_win.ravel() & np.logical_and.reduce([table[np.minimum(target, SIZE)] for target in weak_targets])
+        weak_win |= mated.ravel()
+        if np.array_equal(strong_win, win[:SIZE]) and np.array_equal(weak_win, win[SIZE:PAD]):
+            break
+        win[:SIZE] = strong_win
+        win[SIZE:PAD] = weak_win
+    if verbose:
+        print(f"{name}: {iterations} vòng lặp, {win[:SIZE].sum()} thế thắng khi bên mạnh đi, "
+              f"{win[SIZE:PAD].sum()} khi bên yếu đi, {time.perf_counter() - start:.1f}s")
+    return win[:PAD]
+
+
+def save(path: str, win):
+    """Ghi bitbase đã nén bit (ghi file tạm rồi đổi tên để các tiến trình khác không đọc dở)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    np.packbits(win).tofile(temporary)
+    os.replace(temporary, path)
+
+
+def solved(name: str, verbose: bool = False):
+    """Mảng bool của bitbase `name`, đọc từ đĩa hoặc tạo mới rồi lưu lại."""
+    path = os.path.join(BITBASE_DIR, name + ".bin")
+    if not os.path.exists(path):
+        save(path, generate(name, verbose))
+    return np.unpackbits(np.fromfile(path, dtype=np.uint8))[:PAD].astype(bool)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--force", action="store_true", help="tạo lại kể cả khi đã có file")
+    args = parser.parse_args()
+    for name in TABLES.values():
+        path = os.path.join(BITBASE_DIR, name + ".bin")
+        if args.force and os.path.exists(path):
+            os.remove(path)
+        solved(name, verbose=True)
+    print(f"đã lưu vào {BITBASE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Sách khai cuộc Polyglot cho các bot; tạo sách: `python book.py games/*.pgn --out book.bin`."""
+import argparse
+import mmap
+import os
+import random
+import struct
+
+import chess
+import chess.pgn
+
+from transposition import zobrist_key
+
+# Mỗi mục Polyglot gồm 16 byte big-endian: khóa Zobrist, nước đi, trọng số, learn (không dùng)
+ENTRY = struct.Struct(">QHHI")
+KEY = struct.Struct(">Q")
+MAX_WEIGHT = 0xFFFF
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+
+# Tạo sách: chỉ lấy các nước đầu ván, thắng được 2 điểm, hòa 1 điểm cho bên đi nước
+BOOK_PLIES = 24
+RESULT_POINTS = {"1-0": (2, 0), "0-1": (0, 2), "1/2-1/2": (1, 1)}
+
+
+# 1. Đọc sách Polyglot
+def encode_move(board: chess.Board, move: chess.Move) -> int:
+    """Mã nước đi Polyglot: to | from << 6 | promotion << 12 (nhập thành ghi là vua ăn xe)."""
+    to_square = move.to_square
+    if board.is_castling(move):
+        rank = chess.square_rank(move.from_square)
+        to_square = chess.square(7 if board.is_kingside_castling(move) else 0, rank)
+    promotion = move.promotion - 1 if move.promotion else 0
+    return to_square | (move.from_square << 6) | (promotion << 12)
+
+
+def decode_move(board: chess.Board, raw: int) -> chess.Move:
+    """Đổi mã Polyglot thành nước đi của python-chess (vua ăn xe -> nước nhập thành)."""
+    to_square = raw & 63
+    from_square = (raw >> 6) & 63
+    promotion = (raw >> 12) & 7
+    if board.kings & chess.BB_SQUARES[from_square] and board.rooks & board.occupied_co[board.turn] & chess.BB_SQUARES[to_square]:
+        to_square = chess.square(6 if to_square > from_square else 2, chess.square_rank(from_square))
+    return chess.Move(from_square, to_square, promotion + 1 if promotion else None)
+
+
+class OpeningBook:
+    """Sách Polyglot ánh xạ vào bộ nhớ; các mục đã sắp theo khóa nên tìm bằng chia đôi."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size % ENTRY.size:
+                raise ValueError(f"{path} không phải sách Polyglot hợp lệ")
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.count = size // ENTRY.size
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def first_index(self, key: int) -> int:
+        """Vị trí mục đầu tiên có khóa >= key."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if KEY.unpack_from(self.data, mid * ENTRY.size)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def entries(self, board: chess.Board) -> list:
+        """Các cặp (nước đi, trọng số) của thế cờ; bỏ mục trọng số 0 và nước không hợp lệ (trùng khóa)."""
+        key = zobrist_key(board)
+        result = []
+        for index in range(self.first_index(key), self.count):
+            entry_key, raw, weight, _ = ENTRY.unpack_from(self.data, index * ENTRY.size)
+            if entry_key != key:
+                break
+            move = decode_move(board, raw)
+            if weight and board.is_legal(move):
+                result.append((move, weight))
+        return result
+
+    def choose(self, board: chess.Board, rng=random):
+        """Chọn ngẫu nhiên một nước theo trọng số, None khi thế cờ không có trong sách."""
+        entries = self.entries(board)
+        if not entries:
+            return None
+        moves, weights = zip(*entries)
+        return rng.choices(moves, weights)[0]
+
+
+_books = {}
+
+
+def book_move(board: chess.Board, path: str = BOOK_FILE):
+    """Nước đi từ sách khai cuộc (mở sách một lần rồi giữ lại), None khi không có sách hoặc hết sách."""
+    if path not in _books:
+        _books[path] = OpeningBook(path) if os.path.exists(path) else None
+    book = _books[path]
+    return book.choose(board) if book else None
+
+
+# 2. Tạo sách từ các file PGN
+def collect_weights(pgn_paths: list, plies: int = BOOK_PLIES) -> dict:
+    """Cộng điểm kết quả ván cho từng (khóa, nước đi) trong `plies` nửa nước đầu của mọi ván."""
+    weights = {}
+    games = 0
+    for path in pgn_paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            while True:
+                game = chess.pgn.read_game(f)
+                if game is None:
+                    break
+                points = RESULT_POINTS.get(game.headers.get("Result"))
+                board = game.board()
+                if points is None or game.errors or board.chess960:
+                    continue
+                games += 1
+                for ply, move in enumerate(game.mainline_moves()):
+                    if ply >= plies:
+                        break
+                    entry = (zobrist_key(board), encode_move(board, move))
+                    weights[entry] = weights.get(entry, 0) + points[board.turn == chess.BLACK]
+                    board.push(move)
+    print(f"đã đọc {games} ván, {len(weights)} mục")
+    return weights
+
+
+def write_book(path: str, weights: dict, min_weight: int = 1):
+    """Ghi sách Polyglot: sắp theo khóa rồi theo trọng số giảm dần, co trọng số về 16 bit."""
+    weights = {entry: weight for entry, weight in weights.items() if weight >= min_weight}
+    scale = max(1, -(-max(weights.values(), default=0) // MAX_WEIGHT))
+    with open(path, "wb") as f:
+        for (key, raw), weight in sorted(weights.items(), key=lambda item: (item[0][0], -item[1])):
+            f.write(ENTRY.pack(key, raw, max(1, weight // scale), 0))
+    print(f"đã ghi {len(weights)} mục vào {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pgn", nargs="+")
+    parser.add_argument("--out", default=BOOK_FILE)
+    parser.add_argument("--plies", type=int, default=BOOK_PLIES)
+    parser.add_argument("--min-weight", type=int, default=2)
+    args = parser.parse_args()
+    write_book(args.out, collect_weights(args.pgn, args.plies), args.min_weight)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,23 @@
 import random
+import threading
 import time
 import chess
 
 
-def random_move(board: chess.Board) -> chess.Move:
-    """Trả về một nước đi hợp lệ ngẫu nhiên sau khi chờ ngẫu nhiên."""
-    time.sleep(random.uniform(0.3, 1.5))  # Chờ từ 0.3 đến 1.5 giây
+def random_move(board: chess.Board, stop_token: threading.Event = None,
+                time_limit: float = None) -> chess.Move:
+    """Trả về một nước đi hợp lệ ngẫu nhiên sau khi chờ ngẫu nhiên.
+
+    Bật `stop_token` từ luồng khác thì thôi chờ và trả về nước đi ngay; `time_limit`
+    (giây, theo đồng hồ ván cờ) giới hạn thời gian chờ.
+    """
+    delay = random.uniform(0.3, 1.5)  # Chờ từ 0.3 đến 1.5 giây
+    if time_limit is not None:
+        delay = min(delay, time_limit)
+    if stop_token is None:
+        time.sleep(delay)
+    else:
+        stop_token.wait(delay)
     legal_moves = list(board.legal_moves)
     if not legal_moves:
         return None
@@ -1,5 +1,27 @@
 import chess
+import json
 import math
+import multiprocessing
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait
+from functools import partial
+try:
+    import numpy as np
+    import nnue
+except ImportError:  # NumPy không bắt buộc, chỉ cần cho đánh giá theo lô và mạng NNUE
+    np = nnue = None
+import analysis_cache
+from move_ordering import MoveOrderer, mvv_lva
+from see import see_ge
+import bitbase
+import tablebase
+import time_manager
+from transposition import TranspositionTable, decode_move, EXACT, LOWER, UPPER
+from position import Position, NULL_MOVE
 
 # 1. Định nghĩa giá trị vật chất (đơn vị centipawn, 100 = 1 điểm)
 piece_values = {
@@ -78,6 +100,43 @@ king_table = [
     20,   30,  10,    0,    0,   10,  30,  20
 ]
 
+# 2.1 Các trọng số còn lại của hàm đánh giá; tất cả có thể được ghi đè bởi file
+# tham số do tune.py tạo ra (đọc một lần khi import)
+mobility_weights = {
+    chess.PAWN: 10,
+    chess.KNIGHT: 10,
+    chess.BISHOP: 10,
+    chess.ROOK: 10,
+    chess.QUEEN: 10,
+    chess.KING: 10,
+}
+KING_SHIELD_BONUS = 15      # mỗi tốt che chắn ngay trước vua
+DOUBLED_PAWN_PENALTY = 20   # mỗi tốt chồng thêm trên một cột
+ISOLATED_PAWN_PENALTY = 15  # mỗi tốt không có tốt cùng màu ở hai cột bên cạnh
+PARAMS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "botbaka_params.json")
+
+
+def load_params(path: str = PARAMS_FILE):
+    """Nạp trọng số từ file JSON (giá trị quân, bảng vị trí, mobility, tốt và vua), sửa tại chỗ."""
+    global KING_SHIELD_BONUS, DOUBLED_PAWN_PENALTY, ISOLATED_PAWN_PENALTY
+    with open(path) as params_file:
+        params = json.load(params_file)
+    for piece_type in chess.PIECE_TYPES:
+        name = chess.piece_name(piece_type)
+        if name in params.get("piece_values", {}):
+            piece_values[piece_type] = params["piece_values"][name]
+        if name in params.get("mobility", {}):
+            mobility_weights[piece_type] = params["mobility"][name]
+        if name in params.get("tables", {}):
+            globals()[name + "_table"][:] = params["tables"][name]
+    KING_SHIELD_BONUS = params.get("king_shield", KING_SHIELD_BONUS)
+    DOUBLED_PAWN_PENALTY = params.get("doubled_pawn", DOUBLED_PAWN_PENALTY)
+    ISOLATED_PAWN_PENALTY = params.get("isolated_pawn", ISOLATED_PAWN_PENALTY)
+
+
+if os.path.exists(PARAMS_FILE):
+    load_params()
+
 # 3. Hàm đánh giá vật chất
 
 
@@ -112,16 +171,76 @@ def evaluate_positional(board: chess.Board) -> int:
         positional += table_value if piece.color == chess.WHITE else -table_value
     return positional
 
+# 4.1 Trạng thái đánh giá tăng dần: cập nhật vật chất và điểm vị trí qua từng nước đi
+piece_tables = {
+    chess.PAWN: pawn_table,
+    chess.KNIGHT: knight_table,
+    chess.BISHOP: bishop_table,
+    chess.ROOK: rook_table,
+    chess.QUEEN: queen_table,
+    chess.KING: king_table,
+}
+
+
+def build_square_scores():
+    """Điểm bảng vị trí theo [màu][loại quân][ô], đã mang dấu theo góc nhìn quân trắng."""
+    scores = [[None] * 7, [None] * 7]
+    for piece_type, table in piece_tables.items():
+        scores[chess.WHITE][piece_type] = list(table)
+        scores[chess.BLACK][piece_type] = [-table[chess.square_mirror(square)]
+                                           for square in chess.SQUARES]
+    return scores
+
+
+square_scores = build_square_scores()
+
+
 # 5. Hàm đánh giá khả năng di chuyển (mobility)
+# Đếm số ô bị tấn công giả hợp lệ (không tính ô có quân mình) bằng bitboard,
+# không sao chép bàn cờ và không lọc nước đi hợp lệ; trọng số ở mục 2.1
+
+
+def piece_attacks(piece_type: int, square: int, occupied: int) -> int:
+    """Bitboard các ô mà quân (không phải tốt) ở `square` tấn công với độ chiếm `occupied`."""
+    if piece_type == chess.KNIGHT:
+        return chess.BB_KNIGHT_ATTACKS[square]
+    if piece_type == chess.KING:
+        return chess.BB_KING_ATTACKS[square]
+    attacks = 0
+    if piece_type != chess.ROOK:
+        attacks |= chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied]
+    if piece_type != chess.BISHOP:
+        attacks |= (chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied] |
+                    chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied])
+    return attacks
+
+
+def side_mobility(board: chess.Board, color: bool) -> int:
+    own = board.occupied_co[color]
+    occupied = board.occupied
+    mobility = 0
+    for piece_type, pieces in ((chess.KNIGHT, board.knights), (chess.BISHOP, board.bishops),
+                               (chess.ROOK, board.rooks), (chess.QUEEN, board.queens),
+                               (chess.KING, board.kings)):
+        count = 0
+        for square in chess.scan_forward(pieces & own):
+            count += chess.popcount(piece_attacks(piece_type, square, occupied) & ~own)
+        mobility += mobility_weights[piece_type] * count
+
+    # Tốt: số ô đi thẳng được cộng số quân đối phương đang bị tốt tấn công
+    pawns = board.pawns & own
+    if color == chess.WHITE:
+        pushes = (pawns << 8) & ~occupied & chess.BB_ALL
+        captures = ((pawns & ~chess.BB_FILE_A) << 7) | ((pawns & ~chess.BB_FILE_H) << 9)
+    else:
+        pushes = (pawns >> 8) & ~occupied
+        captures = ((pawns & ~chess.BB_FILE_A) >> 9) | ((pawns & ~chess.BB_FILE_H) >> 7)
+    pawn_moves = chess.popcount(pushes) + chess.popcount(captures & board.occupied_co[not color])
+    return mobility + mobility_weights[chess.PAWN] * pawn_moves
 
 
 def evaluate_mobility(board: chess.Board) -> float:
-    board_copy = board.copy()
-    board_copy.turn = chess.WHITE
-    white_moves = len(list(board_copy.legal_moves))
-    board_copy.turn = chess.BLACK
-    black_moves = len(list(board_copy.legal_moves))
-    return 10 * (white_moves - black_moves)
+    return side_mobility(board, chess.WHITE) - side_mobility(board, chess.BLACK)
 
 # 6. Hàm đánh giá an toàn của vua
 
@@ -144,7 +263,8 @@ def evaluate_king_safety(board: chess.Board) -> float:
                 piece = board.piece_at(square)
                 if piece and piece.piece_type == chess.PAWN and piece.color == color:
                     pawn_shield += 1
-        safety += 15 * pawn_shield if color == chess.WHITE else -15 * pawn_shield
+        bonus = KING_SHIELD_BONUS * pawn_shield
+        safety += bonus if color == chess.WHITE else -bonus
     return safety
 
 # 7. Hàm đánh giá cấu trúc tốt (đánh giá các tốt gấp đôi và tốt đơn lẻ)
@@ -161,18 +281,61 @@ def evaluate_pawn_structure(board: chess.Board) -> float:
         for file in range(8):
             count = files.count(file)
             if count > 1:
-                penalty += (count - 1) * 20
+                penalty += (count - 1) * DOUBLED_PAWN_PENALTY
         # Phạt tốt đơn lẻ (isolated)
         for pawn in pawns:
             file = chess.square_file(pawn)
             if (file - 1 not in files) and (file + 1 not in files):
-                penalty += 15
+                penalty += ISOLATED_PAWN_PENALTY
         if color == chess.WHITE:
             white_penalty = penalty
         else:
             black_penalty = penalty
     return -white_penalty + black_penalty
 
+# 7.1 Bảng băm tốt: cấu trúc tốt và lá chắn tốt chỉ đổi khi tốt hoặc vua di chuyển
+PAWN_HASH_ENTRIES = 16384
+
+
+class PawnHashTable:
+    """Bộ nhớ đệm LRU cho điểm cấu trúc tốt và lá chắn tốt, khóa theo bitboard tốt và ô của hai vua."""
+
+    def __init__(self, max_entries: int = PAWN_HASH_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = 0
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def probe(self, board: chess.Board):
+        """Trả về (điểm cấu trúc tốt, điểm an toàn vua), tính lại khi chưa có trong bảng."""
+        white = board.occupied_co[chess.WHITE]
+        black = board.occupied_co[chess.BLACK]
+        # Ô của vua (cộng 1, 0 khi không có vua) gộp vào khóa để mỗi ô của bảng chỉ giữ hai số
+        # và max_entries giới hạn đúng toàn bộ bộ nhớ
+        key = ((board.pawns & white) | (board.pawns & black) << 64
+               | (board.kings & white).bit_length() << 128 | (board.kings & black).bit_length() << 135)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            entry = self.entries[key] = (evaluate_pawn_structure(board), evaluate_king_safety(board))
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return entry
+
+
+pawn_hash = PawnHashTable()
+
 # 8. Hàm đánh giá tổng hợp, bổ sung yếu tố chiếu bí
 
 
@@ -184,12 +347,24 @@ def evaluate_board(board: chess.Board) -> float:
     # Nếu hòa hoặc không đủ lực đánh, trả về 0
     if board.is_stalemate() or board.is_insufficient_material():
         return 0
+    # Tàn cuộc ba quân có trong bitbase: dùng kết quả chính xác
+    score = bitbase_score(board)
+    if score is not None:
+        return score
+    return evaluate_position(board)
+
 
-    eval_material = evaluate_material(board)
-    eval_positional = evaluate_positional(board)
+def evaluate_position(board: chess.Board, state: Position = None) -> float:
+    """Đánh giá thế cờ chưa kết thúc, không kiểm tra chiếu bí/hòa (tìm kiếm tự phát hiện)."""
+    # Position giữ sẵn tổng vật chất và vị trí (cập nhật tăng dần) nên chỉ tốn O(1)
+    if state is not None:
+        eval_material = state.material
+        eval_positional = state.positional
+    else:
+        eval_material = evaluate_material(board)
+        eval_positional = evaluate_positional(board)
     eval_mobility = evaluate_mobility(board)
-    eval_king_safety = evaluate_king_safety(board)
-    eval_pawn_structure = evaluate_pawn_structure(board)
+    eval_pawn_structure, eval_king_safety = pawn_hash.probe(board)
 
     total_evaluation = (eval_material +
                         eval_positional +
@@ -199,81 +374,915 @@ def evaluate_board(board: chess.Board) -> float:
     return total_evaluation
 
 
-def minimax(board: chess.Board, depth: int, alpha: float, beta: float, maximizing_player: bool) -> float:
-    if depth == 0 or board.is_game_over():
-        return evaluate_board(board)
-
-    if maximizing_player:
-        max_eval = -math.inf
-        for move in board.legal_moves:
-            # Nếu nước đi là phong cấp và không có loại quân được chỉ định, ta mặc định phong hậu
-            if board.is_pseudo_legal(move) and board.piece_at(move.from_square).piece_type == chess.PAWN and \
-               (chess.square_rank(move.to_square) == 7 or chess.square_rank(move.to_square) == 0) and move.promotion is None:
-                move = chess.Move(move.from_square,
-                                  move.to_square, promotion=chess.QUEEN)
-
-            board.push(move)
-            eval = minimax(board, depth - 1, alpha,
-                           beta, not maximizing_player)
-            board.pop()
-
-            if maximizing_player:
-                max_eval = max(max_eval, eval)
-                alpha = max(alpha, eval)
-            if beta <= alpha:
-                break
-        return max_eval
+# 8.1 Đánh giá theo lô bằng NumPy: xếp nhiều thế cờ thành mảng (N, 12, 64) rồi tính vật chất,
+# bảng vị trí, cấu trúc tốt và lá chắn tốt bằng phép nhân ma trận; mobility vẫn tính từng thế cờ
+PLANE_COLORS = (chess.WHITE, chess.BLACK)
+
+
+def build_plane_weights():
+    """Trọng số (12, 64): vật chất + bảng vị trí của từng loại quân, trắng trước đen sau, mang dấu."""
+    weights = np.zeros((12, 64))
+    for index, color in enumerate(PLANE_COLORS):
+        sign = 1 if color == chess.WHITE else -1
+        for piece_type in chess.PIECE_TYPES:
+            weights[index * 6 + piece_type - 1] = [
+                sign * piece_values[piece_type] + square_scores[color][piece_type][square]
+                for square in chess.SQUARES]
+    return weights
+
+
+def build_shield_masks():
+    """shield[màu][ô vua] là các ô lá chắn (ba ô ngay phía trước vua), giống evaluate_king_safety."""
+    shield = np.zeros((2, 64, 64))
+    for index, color in enumerate(PLANE_COLORS):
+        forward = 1 if color == chess.WHITE else -1
+        for king_square in chess.SQUARES:
+            rank = chess.square_rank(king_square) + forward
+            for file in range(chess.square_file(king_square) - 1, chess.square_file(king_square) + 2):
+                if 0 <= file <= 7 and 0 <= rank <= 7:
+                    shield[index, king_square, chess.square(file, rank)] = 1
+    return shield
+
+
+if np is not None:
+    plane_weights = build_plane_weights()
+    shield_masks = build_shield_masks()
+
+
+def plane_bitboards(board) -> list:
+    """12 bitboard theo thứ tự mặt phẳng của chess.Board hoặc Position."""
+    return [pieces & board.occupied_co[color]
+            for color in PLANE_COLORS
+            for pieces in (board.pawns, board.knights, board.bishops,
+                           board.rooks, board.queens, board.kings)]
+
+
+def pack_planes(rows: list):
+    """Xếp các hàng plane_bitboards thành mảng 0/1 kích thước (N, 12, 64)."""
+    bitboards = np.array(rows, dtype=np.uint64).reshape(len(rows), 12)
+    # Bit thứ i của bitboard là ô i: tách 8 byte little-endian thành 64 bit
+    bits = np.unpackbits(bitboards.astype("<u8").view(np.uint8), bitorder="little")
+    return bits.reshape(len(rows), 12, 64)
+
+
+def pawn_file_penalty(pawn_planes):
+    """Phạt tốt chồng và tốt cô lập theo số tốt trên từng cột, cho mảng (N, 64)."""
+    files = pawn_planes.reshape(-1, 8, 8).sum(axis=1, dtype=np.int64)
+    doubled = np.maximum(files - 1, 0).sum(axis=1) * DOUBLED_PAWN_PENALTY
+    padded = np.pad(files, ((0, 0), (1, 1)))
+    isolated = files * ((padded[:, :-2] == 0) & (padded[:, 2:] == 0))
+    return doubled + isolated.sum(axis=1) * ISOLATED_PAWN_PENALTY
+
+
+def evaluate_static_batch(planes):
+    """Vật chất, bảng vị trí, cấu trúc tốt và lá chắn tốt (góc nhìn quân trắng) cho mảng (N, 12, 64)."""
+    planes = planes.astype(np.float64)
+    count = planes.shape[0]
+    score = planes.reshape(count, 768) @ plane_weights.reshape(768)
+    score += pawn_file_penalty(planes[:, 6]) - pawn_file_penalty(planes[:, 0])
+    for color_index, sign in ((0, KING_SHIELD_BONUS), (1, -KING_SHIELD_BONUS)):
+        # Ô vua (one-hot) nhân mặt nạ lá chắn ra các ô cần có tốt của cùng màu
+        zone = planes[:, color_index * 6 + 5] @ shield_masks[color_index]
+        score += sign * (zone * planes[:, color_index * 6]).sum(axis=1)
+    return score
+
+
+def evaluate_batch(boards: list):
+    """Như evaluate_position cho cả lô thế cờ chưa kết thúc, trả về mảng điểm (góc nhìn quân trắng)."""
+    if not boards:
+        return np.zeros(0)
+    score = evaluate_static_batch(pack_planes([plane_bitboards(board) for board in boards]))
+    score += [evaluate_mobility(board) for board in boards]
+    return score
+
+
+# 8.2 Tàn cuộc KPK/KRK/KQK: thắng/hòa chính xác theo bitbase; trong thế thắng, điểm thưởng
+# thêm giúp tìm kiếm tiến dần tới phong cấp hoặc chiếu bí
+BITBASE_WIN_SCORE = 20000
+
+
+def center_distance(square: int) -> int:
+    file, rank = chess.square_file(square), chess.square_rank(square)
+    return max(3 - file, file - 4) + max(3 - rank, rank - 4)
+
+
+def bitbase_score(board):
+    """Điểm (góc nhìn quân trắng) của thế cờ ba quân có trong bitbase, None với thế cờ khác."""
+    probe = bitbase.probe(board)
+    if probe is None:
+        return None
+    strong, win = probe
+    if not win:
+        return 0
+    if board.pawns:
+        # Đẩy tốt lên phong cấp; điểm luôn thấp hơn thế hậu/xe sau khi phong
+        rank = chess.square_rank(chess.lsb(board.pawns))
+        score = BITBASE_WIN_SCORE + 10 * (rank if strong == chess.WHITE else 7 - rank)
     else:
-        min_eval = math.inf
-        for move in board.legal_moves:
-            if board.is_pseudo_legal(move) and board.piece_at(move.from_square).piece_type == chess.PAWN and \
-               (chess.square_rank(move.to_square) == 7 or chess.square_rank(move.to_square) == 0) and move.promotion is None:
-                move = chess.Move(move.from_square,
-                                  move.to_square, promotion=chess.QUEEN)
-
-            board.push(move)
-            eval = minimax(board, depth - 1, alpha,
-                           beta, not maximizing_player)
-            board.pop()
-
-            if not maximizing_player:
-                min_eval = min(min_eval, eval)
-                beta = min(beta, eval)
-            if beta <= alpha:
-                break
-        return min_eval
+        # Dồn vua bên yếu ra mép bàn cờ và đưa vua bên mạnh lại gần
+        strong_king, weak_king = board.king(strong), board.king(not strong)
+        score = (BITBASE_WIN_SCORE + 100 + 10 * center_distance(weak_king)
+                 + 4 * (14 - chess.square_manhattan_distance(strong_king, weak_king)))
+    return score if strong == chess.WHITE else -score
 
 
-def find_best_move(board: chess.Board, depth: int = 3):
-    best_move = None
+# 9. Bảng chuyển vị dùng chung giữa các lần tìm kiếm
+HASH_SIZE_MB = 16
+transposition_table = TranspositionTable(HASH_SIZE_MB)
+_table_evaluator = None  # file trọng số NNUE của các điểm đang nằm trong bảng (None = evaluate_board)
+
+# 10. Giới hạn tìm kiếm
+DEFAULT_DEPTH = 3
+MAX_DEPTH = 64
+# Tìm kiếm tĩnh: độ sâu tối đa và biên an toàn của delta pruning
+MAX_QUIESCENCE_DEPTH = 8
+DELTA_MARGIN = 200
+# Bỏ nước ăn quân lỗ theo SEE ở độ sâu thấp: độ sâu tối đa và mức lỗ cho phép mỗi độ sâu
+SEE_PRUNING_DEPTH = 3
+SEE_PRUNING_MARGIN = 100
+# Null move pruning: độ sâu tối thiểu và mức giảm độ sâu
+NULL_MOVE_MIN_DEPTH = 3
+NULL_MOVE_REDUCTION = 2
+# Late move reductions: độ sâu tối thiểu và số nước đầu tiên luôn được tìm đủ độ sâu
+LMR_MIN_DEPTH = 3
+LMR_FULL_MOVES = 3
+# Cửa sổ kỳ vọng (aspiration window) ở gốc, tính từ độ sâu tối thiểu
+ASPIRATION_MIN_DEPTH = 3
+ASPIRATION_WINDOW = 50
+ASPIRATION_MAX_WINDOW = 1000
+# Điểm chiếu bí và hòa trong cây tìm kiếm (theo bên đang đi)
+MATE_SCORE = 100000
+DRAW_SCORE = 0
+# Số nút giữa hai lần kiểm tra đồng hồ
+TIME_CHECK_INTERVAL = 32
+# Số tiến trình mặc định cho tìm kiếm song song (1 = tuần tự). Để tắt vì với null move/LMR
+# kết quả không trùng tìm kiếm tuần tự và chưa đo được tăng tốc (xem `python bench.py parallel`)
+PARALLEL_WORKERS = 1
+# Chu kỳ (giây) tìm kiếm song song kiểm tra stop token trong lúc chờ tiến trình con
+STOP_POLL_INTERVAL = 0.005
+_pool = None
+_pool_workers = 0
+_pool_table = None  # bảng chuyển vị dùng chung mà các tiến trình con đang gắn vào
+# Bộ đếm dùng chung giữa tiến trình cha và các tiến trình con: tăng lên thì mọi tác vụ
+# gửi trước đó (kể cả tác vụ đang chạy) dừng lại
+_stop_generation = None
+
+
+def set_hash_size(size_mb: float):
+    """Đổi giới hạn bộ nhớ (MB) của bảng chuyển vị, xóa các ô cũ."""
+    transposition_table.resize(size_mb)
+
+
+class SearchTimeout(Exception):
+    """Hết thời gian cho phép, bỏ dở lần lặp đang chạy."""
+
+
+class SearchControl:
+    """Điều khiển một lần tìm kiếm từ luồng khác: đổi thời hạn khi đang chạy (ponder hit) hoặc dừng hẳn."""
+
+    def __init__(self, deadline=None, stop_token: threading.Event = None):
+        self.deadline = deadline
+        # Stop token có thể dùng chung với người gọi: bật nó cũng dừng tìm kiếm như stop()
+        self.stop_token = stop_token if stop_token is not None else threading.Event()
+
+    @property
+    def stopped(self) -> bool:
+        return self.stop_token.is_set()
+
+    def stop(self):
+        self.stop_token.set()
+
+    def expired(self) -> bool:
+        return self.stopped or (self.deadline is not None and time.monotonic() >= self.deadline)
+
+
+class GenerationToken:
+    """Stop token của tác vụ trong tiến trình con: bật khi tiến trình cha tăng bộ đếm dùng chung."""
+
+    def __init__(self, counter, generation: int):
+        self.counter = counter
+        self.generation = generation
+
+    def is_set(self) -> bool:
+        return self.counter.value != self.generation
+
+
+class SearchContext:
+    """Trạng thái dùng chung của một lần tìm kiếm (thời hạn, số nút, biến chính)."""
+
+    def __init__(self, deadline=None, ordering=True, null_move=True, late_move_reductions=True,
+                 delta_pruning=True, batch_eval=False, nnue_weights=None, syzygy_path=None):
+        self.deadline = deadline
+        self.null_move = null_move
+        self.late_move_reductions = late_move_reductions
+        self.delta_pruning = delta_pruning
+        self.batch_eval = batch_eval and np is not None
+        self.nnue_weights = nnue_weights
+        self.network = nnue.load_network(nnue_weights) if nnue_weights else None
+        # Bảng tàn cuộc Syzygy (None khi thư mục không có bảng nào)
+        self.syzygy_path = syzygy_path
+        self.tablebase = tablebase.open_tablebase(syzygy_path)
+        self.leaf_evals = {}  # điểm (góc nhìn quân trắng) của các nút con đã đánh giá theo lô
+        self.nodes = 0
+        self.qnodes = 0  # số nút của tìm kiếm tĩnh, đếm riêng
+        self.tb_hits = 0  # số lần lấy được kết quả từ bảng tàn cuộc
+        self.orderer = MoveOrderer() if ordering else None
+        self.pv = []           # biến chính của lần lặp trước (nước đi dạng số nguyên)
+        self.root_pv = []      # biến chính do search_root_parallel dựng từ kết quả tiến trình con
+        self.follow_pv = False  # nút hiện tại còn nằm trên biến chính hay không
+        self.control = None     # SearchControl của lần lặp hiện tại (None = không ngắt được)
+
+    def visit(self, quiescence: bool = False):
+        if quiescence:
+            self.qnodes += 1
+        else:
+            self.nodes += 1
+        if (self.nodes + self.qnodes) % TIME_CHECK_INTERVAL == 0:
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                raise SearchTimeout()
+            if self.control is not None and self.control.expired():
+                raise SearchTimeout()
+
+    def options(self) -> dict:
+        """Các công tắc của lần tìm kiếm, để tạo lại ngữ cảnh giống hệt ở tiến trình con."""
+        return {"ordering": self.orderer is not None,
+                "null_move": self.null_move,
+                "late_move_reductions": self.late_move_reductions,
+                "delta_pruning": self.delta_pruning,
+                "batch_eval": self.batch_eval,
+                "nnue_weights": self.nnue_weights,
+                "syzygy_path": self.syzygy_path}
+
+    def pv_move(self, ply: int):
+        if self.follow_pv and ply < len(self.pv):
+            return self.pv[ply]
+        self.follow_pv = False
+        return None
+
+
+SearchResult = namedtuple(
+    "SearchResult", ["move", "score", "depth", "nodes", "pv", "qnodes"], defaults=[0])
+
+# Bảng giá trị theo loại quân cho Position (chỉ số 0 là ô trống)
+piece_value_list = [0] + [piece_values[piece_type] for piece_type in chess.PIECE_TYPES]
+
+
+def search_position(board: chess.Board, ctx: SearchContext = None) -> Position:
+    """Chuyển chess.Board sang thế cờ tìm kiếm, kèm vật chất và điểm vị trí tăng dần.
+
+    Nếu lần tìm kiếm dùng mạng NNUE thì gắn thêm bộ tích lũy cập nhật theo make/unmake.
+    """
+    pos = Position.from_board(board, piece_value_list, square_scores)
+    if ctx is not None and ctx.network is not None:
+        pos.accumulator = nnue.Accumulator(ctx.network, pos)
+    return pos
+
+
+def ordered_moves(pos: Position, ctx: SearchContext, ply: int, hash_move=None, pv_move=None):
+    """Nước đi giả hợp lệ, sắp xếp theo bộ sắp xếp của lần tìm kiếm (nếu bật)."""
+    moves = pos.generate_moves()
+    if ctx.orderer is None:
+        return moves
+    return ctx.orderer.order(pos, moves, ply, hash_move, pv_move)
+
+
+def staged_moves(pos: Position, ctx: SearchContext, ply: int, hash_move=None, pv_move=None):
+    """Như ordered_moves nhưng sinh nước đi theo giai đoạn, dừng sinh khi đã cắt tỉa (dùng trong cây)."""
+    if ctx.orderer is None:
+        return pos.generate_moves()
+    return ctx.orderer.staged(pos, ply, hash_move, pv_move)
+
+
+def noisy_moves(pos: Position) -> list:
+    """Các nước ăn quân và phong hậu, ăn quân lớn bằng quân nhỏ được xét trước."""
+    moves = pos.generate_moves(captures_only=True)
+    moves.sort(key=lambda move: mvv_lva(pos, move), reverse=True)
+    return moves
+
 
-    if board.turn == chess.WHITE:
+def capture_gain(pos: Position, move: int) -> int:
+    """Lượng vật chất tối đa nước đi có thể thu về, dùng cho delta pruning."""
+    gain = piece_value_list[pos.captured_type(move)]
+    if move >> 12:
+        gain += piece_value_list[move >> 12] - piece_values[chess.PAWN]
+    return gain
+
+
+def evaluate_relative(pos: Position) -> float:
+    """Điểm đánh giá theo góc nhìn của bên đang có lượt đi (dùng cho negamax)."""
+    score = evaluate_position(pos, pos)
+    return score if pos.turn == chess.WHITE else -score
+
+
+def evaluate_children(pos: Position, ctx: SearchContext):
+    """Đánh giá mọi nút con hợp lệ của một nút sát lá trong một lần gọi theo lô."""
+    keys, rows, mobility = [], [], []
+    for move in pos.generate_moves():
+        if pos.make(move):
+            keys.append(pos.key)
+            rows.append(plane_bitboards(pos))
+            mobility.append(evaluate_mobility(pos))
+            pos.unmake()
+    if keys:
+        scores = evaluate_static_batch(pack_planes(rows)) + mobility
+        ctx.leaf_evals = dict(zip(keys, scores.tolist()))
+
+
+def bitbase_eval(pos: Position):
+    """Điểm theo bên đang đi từ bitbase; None khi không tra được hoặc thế cờ là chiếu bí
+    (để tìm kiếm tự trả về điểm chiếu bí)."""
+    if chess.popcount(pos.occupied) != 3:
+        return None
+    score = bitbase_score(pos)
+    if score is None or (score and not pos.has_legal_move()):
+        return None
+    return score if pos.turn == chess.WHITE else -score
+
+
+def static_eval(pos: Position, ctx: SearchContext) -> float:
+    """Như evaluate_relative nhưng dùng mạng NNUE hoặc điểm đã tính theo lô nếu có."""
+    if pos.accumulator is not None:
+        return pos.accumulator.evaluate(pos.turn)
+    score = ctx.leaf_evals.pop(pos.key, None)
+    if score is None:
+        return evaluate_relative(pos)
+    return score if pos.turn == chess.WHITE else -score
+
+
+def quiesce(pos: Position, alpha: float, beta: float, ctx: SearchContext, qdepth: int = 0) -> float:
+    """Tìm kiếm tĩnh: chỉ xét nước ăn quân/phong cấp cho đến khi thế cờ yên tĩnh.
+
+    Khi đang bị chiếu thì xét mọi nước thoát chiếu thay vì đứng yên (stand pat).
+    """
+    ctx.visit(quiescence=True)
+    if pos.is_insufficient_material():
+        return DRAW_SCORE
+    # Thế cờ có trong bitbase: điểm chính xác thay cho đứng yên và ăn quân
+    score = bitbase_eval(pos)
+    if score is not None:
+        return score
+    in_check = pos.is_check()
+    if qdepth >= MAX_QUIESCENCE_DEPTH or not in_check:
+        stand_pat = static_eval(pos, ctx)
+        if qdepth >= MAX_QUIESCENCE_DEPTH or stand_pat >= beta:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+        best_eval = stand_pat
+        moves = noisy_moves(pos)
+    else:
         best_eval = -math.inf
-        for move in board.legal_moves:
-            if board.is_pseudo_legal(move) and board.piece_at(move.from_square).piece_type == chess.PAWN and \
-               (chess.square_rank(move.to_square) == 7 or chess.square_rank(move.to_square) == 0) and move.promotion is None:
-                move = chess.Move(move.from_square,
-                                  move.to_square, promotion=chess.QUEEN)
-
-            board.push(move)
-            move_eval = minimax(board, depth - 1, -math.inf, math.inf, False)
-            board.pop()
-            if move_eval > best_eval:
-                best_eval = move_eval
-                best_move = move
+        moves = pos.generate_moves()
+
+    for move in moves:
+        # Delta pruning: kể cả ăn được quân cũng không kéo điểm lên tới alpha thì bỏ qua
+        if not in_check and ctx.delta_pruning and stand_pat + capture_gain(pos, move) + DELTA_MARGIN <= alpha:
+            continue
+        # Nước ăn quân bị lỗ khi trao đổi hết thì không đáng xét trong tìm kiếm tĩnh
+        if not in_check and not see_ge(pos, move):
+            continue
+        if not pos.make(move):
+            continue
+        eval = -quiesce(pos, -beta, -alpha, ctx, qdepth + 1)
+        pos.unmake()
+        if eval > best_eval:
+            best_eval = eval
+        if eval > alpha:
+            alpha = eval
+        if alpha >= beta:
+            break
+    if best_eval == -math.inf:
+        # Bị chiếu mà không còn nước thoát: chiếu bí
+        return -MATE_SCORE
+    return best_eval
+
+
+def has_non_pawn_material(board, color: bool) -> bool:
+    return bool(board.occupied_co[color] & ~(board.pawns | board.kings))
+
+
+def null_move_allowed(pos: Position, depth: int, in_check: bool) -> bool:
+    """Không đi nước rỗng khi bị chiếu, khi chỉ còn vua và tốt (dễ gặp zugzwang) hoặc hai lần liên tiếp."""
+    return (depth >= NULL_MOVE_MIN_DEPTH and not in_check
+            and has_non_pawn_material(pos, pos.turn)
+            and not (pos.stack and pos.stack[-1][0] == NULL_MOVE))
+
+
+def late_move_reduction(quiet: bool, gives_check: bool, depth: int, move_index: int,
+                        in_check: bool, ctx: SearchContext) -> int:
+    """Số độ sâu được giảm cho nước đi yên tĩnh, không chiếu, xếp ở cuối danh sách."""
+    if (not ctx.late_move_reductions or depth < LMR_MIN_DEPTH or move_index < LMR_FULL_MOVES
+            or in_check or not quiet or gives_check):
+        return 0
+    return 1
+
+
+def negamax(pos: Position, depth: int, alpha: float, beta: float,
+            ctx: SearchContext = None, ply: int = 1) -> float:
+    """Alpha-beta dạng negamax với principal variation search, điểm theo bên đang đi."""
+    if ctx is None:
+        ctx = SearchContext()
+    ctx.visit()
+    # Hòa do lặp lại, luật 50 nước hoặc thiếu quân: không cần sinh nước đi
+    if pos.is_draw():
+        return DRAW_SCORE
+    # Tàn cuộc hòa theo bitbase thì dừng luôn; thế thắng vẫn được tìm tiếp để tiến tới chiếu bí
+    # (điểm bitbase chỉ dùng ở lá trong tìm kiếm tĩnh)
+    if bitbase_eval(pos) == DRAW_SCORE:
+        return DRAW_SCORE
+    # Ngay sau nước ăn quân/đi tốt mà còn ít quân: lấy kết quả chính xác từ bảng tàn cuộc
+    if ctx.tablebase is not None and pos.halfmove_clock == 0 and tablebase.can_probe(pos):
+        wdl = tablebase.probe_wdl(pos)
+        if wdl is not None:
+            ctx.tb_hits += 1
+            return tablebase.wdl_score(wdl, ply)
+    if depth <= 0:
+        return quiesce(pos, alpha, beta, ctx)
+
+    # Tra bảng chuyển vị: dùng điểm đã lưu nếu đủ sâu, nếu không thì lấy nước tốt nhất để xét trước
+    key = pos.key
+    alpha_orig, beta_orig = alpha, beta
+    hash_move = None
+    pv_move = ctx.pv_move(ply)
+    entry = transposition_table.probe(key)
+    if entry is not None:
+        tt_depth, tt_score, tt_flag, tt_move = entry
+        hash_move = tt_move or None
+        if tt_depth >= depth and pv_move is None:
+            if tt_flag == EXACT:
+                return tt_score
+            if tt_flag == LOWER:
+                alpha = max(alpha, tt_score)
+            elif tt_flag == UPPER:
+                beta = min(beta, tt_score)
+            if alpha >= beta:
+                return tt_score
+
+    # Null move pruning: nhường lượt mà đối phương vẫn không kéo điểm xuống dưới beta thì cắt luôn
+    in_check = pos.is_check()
+    if (ctx.null_move and pv_move is None and beta < math.inf
+            and null_move_allowed(pos, depth, in_check)):
+        pos.make_null()
+        eval = -negamax(pos, max(0, depth - 1 - NULL_MOVE_REDUCTION),
+                        -beta, -beta + 1, ctx, ply + 1)
+        pos.unmake()
+        if eval >= beta:
+            return beta
+
+    # Nút sát lá: các nút con đều vào tìm kiếm tĩnh nên đánh giá tĩnh chúng một lượt theo lô
+    if depth == 1 and ctx.batch_eval and ctx.network is None:
+        evaluate_children(pos, ctx)
+
+    best_eval = -math.inf
+    best_move = None
+    index = 0
+    for move in staged_moves(pos, ctx, ply, hash_move, pv_move):
+        quiet = not (move >> 12 or pos.is_capture(move))
+        # Ở gần lá, nước ăn quân lỗ nặng theo SEE được bỏ qua (trừ khi bị chiếu hoặc chưa có nước nào)
+        if (not quiet and index > 0 and not in_check and depth <= SEE_PRUNING_DEPTH
+                and not see_ge(pos, move, -SEE_PRUNING_MARGIN * depth)):
+            continue
+        if not pos.make(move):
+            continue
+        if index == 0:
+            eval = -negamax(pos, depth - 1, -beta, -alpha, ctx, ply + 1)
+        else:
+            # Các nước sau nước đầu chỉ cần chứng minh không tốt hơn alpha: dùng cửa sổ rỗng,
+            # kết hợp giảm độ sâu cho nước yên tĩnh xếp cuối
+            reduction = late_move_reduction(quiet, pos.is_check(), depth, index, in_check, ctx)
+            eval = -negamax(pos, depth - 1 - reduction, -alpha - 1, -alpha, ctx, ply + 1)
+            if reduction and eval > alpha:
+                eval = -negamax(pos, depth - 1, -alpha - 1, -alpha, ctx, ply + 1)
+            if alpha < eval < beta:
+                eval = -negamax(pos, depth - 1, -beta, -alpha, ctx, ply + 1)
+        pos.unmake()
+        ctx.follow_pv = False
+        index += 1
+
+        if eval > best_eval:
+            best_eval = eval
+            best_move = move
+        if eval > alpha:
+            alpha = eval
+        if alpha >= beta:
+            if ctx.orderer is not None:
+                ctx.orderer.record_cutoff(pos, move, ply, depth)
+            break
+
+    # Không có nước hợp lệ nào trong danh sách vừa sinh: chiếu bí hoặc hết nước đi
+    if index == 0:
+        return -MATE_SCORE if in_check else DRAW_SCORE
+
+    if best_eval <= alpha_orig:
+        flag = UPPER
+    elif best_eval >= beta_orig:
+        flag = LOWER
     else:
-        best_eval = math.inf
-        for move in board.legal_moves:
-            if board.is_pseudo_legal(move) and board.piece_at(move.from_square).piece_type == chess.PAWN and \
-               (chess.square_rank(move.to_square) == 7 or chess.square_rank(move.to_square) == 0) and move.promotion is None:
-                move = chess.Move(move.from_square,
-                                  move.to_square, promotion=chess.QUEEN)
-
-            board.push(move)
-            move_eval = minimax(board, depth - 1, -math.inf, math.inf, True)
-            board.pop()
-            if move_eval < best_eval:
-                best_eval = move_eval
-                best_move = move
-
-    return best_move
+        flag = EXACT
+    transposition_table.store(key, depth, best_eval, flag, best_move or 0)
+    return best_eval
+
+
+def search_root(pos: Position, depth: int, ctx: SearchContext,
+                alpha: float = -math.inf, beta: float = math.inf):
+    """Tìm kiếm một lần lặp ở độ sâu cố định trong cửa sổ (alpha, beta).
+
+    Trả về (nước tốt nhất, điểm theo bên đang đi); điểm <= alpha hoặc >= beta nghĩa là
+    kết quả nằm ngoài cửa sổ và cần tìm lại.
+    """
+    best_move = None
+    alpha_orig = alpha
+
+    # Tra bảng chuyển vị ở gốc để xét nước tốt nhất của lần trước đầu tiên
+    entry = transposition_table.probe(pos.key)
+    hash_move = entry[3] or None if entry is not None else None
+    ctx.follow_pv = True
+    pv_move = ctx.pv_move(0)
+
+    best_eval = -math.inf
+    index = 0
+    for move in ordered_moves(pos, ctx, 0, hash_move, pv_move):
+        if not pos.make(move):
+            continue
+        if index == 0:
+            move_eval = -negamax(pos, depth - 1, -beta, -alpha, ctx)
+        else:
+            move_eval = -negamax(pos, depth - 1, -alpha - 1, -alpha, ctx)
+            if alpha < move_eval < beta:
+                move_eval = -negamax(pos, depth - 1, -beta, -alpha, ctx)
+        pos.unmake()
+        ctx.follow_pv = False
+        index += 1
+        if move_eval > best_eval:
+            best_eval = move_eval
+            best_move = move
+        if move_eval > alpha:
+            alpha = move_eval
+        if alpha >= beta:
+            break
+
+    if best_move is not None and alpha_orig < best_eval < beta:
+        transposition_table.store(pos.key, depth, best_eval, EXACT, best_move)
+    return best_move, best_eval
+
+
+def search_root_move(board: chess.Board, move: int, depth: int, alpha: float, beta: float,
+                     deadline, stop_generation: int, table_generation: int, options: dict, pv: list,
+                     orderer: MoveOrderer = None):
+    """Tác vụ chạy trong tiến trình con: tìm một nước ở gốc trong cửa sổ (alpha, beta) của gốc.
+
+    Bảng chuyển vị dùng chung với tiến trình cha, `table_generation` là thế hệ hiện tại của
+    bảng. `orderer` là bản sao nước sát thủ/lịch sử của tiến trình cha lúc gửi, để thứ tự nước đi
+    trong cây giống tìm kiếm tuần tự. Trả về (điểm theo bên đi ở gốc, biến chính sau nước đi,
+    số nút, số nút tĩnh) hoặc None nếu hết giờ hoặc tiến trình cha đã tăng bộ đếm dừng
+    khỏi `stop_generation`.
+    """
+    transposition_table.generation = table_generation
+    ctx = SearchContext(deadline, **options)
+    ctx.control = SearchControl(deadline, GenerationToken(_stop_generation, stop_generation))
+    if orderer is not None:
+        ctx.orderer = orderer
+    ctx.pv = pv
+    ctx.follow_pv = bool(pv) and pv[0] == move
+    pos = search_position(board, ctx)
+    pos.make(move)
+    try:
+        move_eval = -negamax(pos, depth - 1, -beta, -alpha, ctx)
+    except SearchTimeout:
+        return None
+    return move_eval, principal_variation(pos, depth - 1), ctx.nodes, ctx.qnodes
+
+
+def init_worker(stop_generation, table):
+    """Khởi tạo tiến trình con: nhận bộ đếm dừng và bảng chuyển vị dùng chung."""
+    global _stop_generation
+    _stop_generation = stop_generation
+    transposition_table.attach(table)
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """Nhóm tiến trình dùng lại giữa các lần tìm kiếm, tạo lại khi đổi số tiến trình hoặc
+    khi bảng chuyển vị được tạo lại (set_hash_size)."""
+    global _pool, _pool_workers, _pool_table, _stop_generation
+    table = transposition_table.share()
+    if _pool is None or _pool_workers != workers or _pool_table is not table:
+        if _pool is not None:
+            stop_workers()
+            _pool.shutdown(wait=False, cancel_futures=True)
+        if _stop_generation is None:
+            _stop_generation = multiprocessing.Value("q", 0)
+        _pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                    initargs=(_stop_generation, table))
+        _pool_workers = workers
+        _pool_table = table
+    return _pool
+
+
+def stop_workers():
+    """Dừng mọi tác vụ đã gửi cho tiến trình con, kể cả tác vụ đang chạy (sau tối đa
+    TIME_CHECK_INTERVAL nút)."""
+    with _stop_generation.get_lock():
+        _stop_generation.value += 1
+
+
+def wait_root_move(future, ctx: SearchContext):
+    """Chờ kết quả của một nước gửi cho tiến trình con, vẫn dừng được bằng stop token."""
+    while True:
+        done, _ = wait([future], STOP_POLL_INTERVAL)
+        if ctx.control is not None and ctx.control.expired():
+            raise SearchTimeout()
+        if done:
+            result = future.result()
+            if result is None:
+                raise SearchTimeout()
+            return result
+
+
+def search_root_parallel(pos: Position, depth: int, ctx: SearchContext,
+                         alpha: float = -math.inf, beta: float = math.inf,
+                         board: chess.Board = None, workers: int = PARALLEL_WORKERS):
+    """Như search_root nhưng chia các nước ở gốc cho nhiều tiến trình (`board` là thế cờ của `pos`).
+
+    Nước đầu tiên được tìm ngay tại đây với cửa sổ (alpha, beta) để có alpha; các nước còn lại
+    gửi cho tiến trình con với cửa sổ từ alpha tốt nhất lúc gửi đến beta, nên điểm nằm trong
+    cửa sổ là điểm đúng và không phải tìm lại. Kết quả được xét theo đúng thứ tự của
+    search_root nên ở độ sâu cố định (tắt null move, LMR và delta pruning) nước đi và điểm
+    trùng với tìm kiếm tuần tự. Bảng chuyển vị dùng chung với tiến trình con (xem get_pool),
+    nước sát thủ/lịch sử được gửi kèm mỗi nước. Biến chính của nước tốt nhất được ghi vào
+    ctx.root_pv.
+    """
+    entry = transposition_table.probe(pos.key)
+    hash_move = entry[3] or None if entry is not None else None
+    ctx.follow_pv = True
+    pv_move = ctx.pv_move(0)
+    moves = [move for move in ordered_moves(pos, ctx, 0, hash_move, pv_move)
+             if pos.is_legal(move)]
+
+    def submit(move):
+        return pool.submit(search_root_move, board, move, depth, alpha, beta, ctx.control.deadline,
+                           _stop_generation.value, transposition_table.generation, ctx.options(),
+                           ctx.pv, ctx.orderer), alpha
+
+    pool = get_pool(workers)
+    tasks = []  # (future, alpha lúc gửi) của moves[1:]
+    alpha_orig = alpha
+    best_move, best_eval, best_pv = None, -math.inf, []
+    try:
+        for index, move in enumerate(moves):
+            if index == 0:
+                ctx.follow_pv = bool(ctx.pv) and ctx.pv[0] == move
+                pos.make(move)
+                move_eval = -negamax(pos, depth - 1, -beta, -alpha, ctx)
+                child_pv = principal_variation(pos, depth - 1)
+                pos.unmake()
+                ctx.follow_pv = False
+            else:
+                move_eval, child_pv, nodes, qnodes = wait_root_move(tasks[index - 1][0], ctx)
+                ctx.nodes += nodes
+                ctx.qnodes += qnodes
+            if move_eval > best_eval:
+                best_move, best_eval, best_pv = move, move_eval, [move] + child_pv
+            if move_eval > alpha:
+                alpha = move_eval
+            if alpha >= beta:
+                break
+            if index == 0:
+                tasks = [submit(later) for later in moves[1:]]
+            else:
+                # Các nước gửi với alpha cũ mà chưa chạy thì gửi lại với alpha mới (cửa sổ chặt hơn)
+                for later in range(index, len(tasks)):
+                    if tasks[later][1] < alpha and tasks[later][0].cancel():
+                        tasks[later] = submit(moves[later + 1])
+    finally:
+        for future, _ in tasks:
+            future.cancel()
+        # Cắt beta, hết giờ hoặc bị hủy khi còn tác vụ đang chạy: báo cho tiến trình con dừng ngay
+        if not all(future.done() for future, _ in tasks):
+            stop_workers()
+
+    ctx.root_pv = best_pv
+    if best_move is not None and alpha_orig < best_eval < beta:
+        transposition_table.store(pos.key, depth, best_eval, EXACT, best_move)
+    return best_move, best_eval
+
+
+def search_root_aspiration(pos: Position, depth: int, ctx: SearchContext, previous_score=None,
+                           root=search_root):
+    """Tìm ở gốc với cửa sổ hẹp quanh điểm của lần lặp trước, nới rộng khi fail-high/fail-low.
+
+    `root` là hàm tìm một lần lặp ở gốc: search_root hoặc search_root_parallel.
+    """
+    if previous_score is None or depth < ASPIRATION_MIN_DEPTH:
+        return root(pos, depth, ctx)
+    window = ASPIRATION_WINDOW
+    alpha, beta = previous_score - window, previous_score + window
+    while True:
+        best_move, score = root(pos, depth, ctx, alpha, beta)
+        if score <= alpha:
+            alpha = -math.inf if window >= ASPIRATION_MAX_WINDOW else score - window
+        elif score >= beta:
+            beta = math.inf if window >= ASPIRATION_MAX_WINDOW else score + window
+            # Nước vừa vượt beta được xét đầu tiên khi tìm lại
+            ctx.pv = [best_move]
+        else:
+            return best_move, score
+        window *= 4
+
+
+def principal_variation(pos: Position, depth: int) -> list:
+    """Lần theo nước tốt nhất trong bảng chuyển vị để dựng lại biến chính."""
+    pv = []
+    seen = set()
+    while len(pv) < depth:
+        entry = transposition_table.probe(pos.key)
+        if entry is None or pos.key in seen:
+            break
+        move = entry[3]
+        if not pos.is_legal(move):
+            break
+        seen.add(pos.key)
+        pv.append(move)
+        pos.make(move)
+    for _ in pv:
+        pos.unmake()
+    return pv
+
+
+def search(board: chess.Board, depth: int = None, time_limit: float = None,
+           ordering: bool = True, workers: int = None,
+           null_move: bool = True, late_move_reductions: bool = True, delta_pruning: bool = True,
+           batch_eval: bool = False, nnue_weights: str = None,
+           syzygy_path: str = None, control: SearchControl = None,
+           budget: time_manager.TimeBudget = None) -> SearchResult:
+    """Tìm kiếm sâu dần 1, 2, 3... đến độ sâu `depth` hoặc đến khi hết `time_limit` giây.
+
+    Luôn trả về kết quả của lần lặp cuối cùng đã hoàn thành; hết giờ trước khi xong
+    lần lặp đầu thì trả về nước được xét đầu tiên ở gốc (độ sâu 0). `ordering=False` duyệt nước đi theo
+    thứ tự sinh nước để so sánh số nút. `workers` > 1 chia các nước ở gốc cho
+    nhiều tiến trình (mặc định PARALLEL_WORKERS). `null_move`,
+    `late_move_reductions` và `delta_pruning` bật/tắt từng kỹ thuật cắt tỉa. `batch_eval` đánh giá
+    các nút con của nút sát lá theo lô bằng NumPy (cần cài NumPy). `nnue_weights`
+    là đường dẫn file trọng số để đánh giá bằng mạng NNUE thay cho evaluate_board.
+    `syzygy_path` là thư mục bảng tàn cuộc Syzygy (mặc định tablebase.SYZYGY_DIR);
+    khi thế cờ gốc có trong bảng thì nước đi được chọn theo DTZ, không cần tìm kiếm.
+    `control` cho phép luồng khác đổi thời hạn hoặc dừng tìm kiếm giữa chừng.
+    `budget` thay cho `time_limit`: dừng hẳn ở ngân sách cứng, còn sau mỗi lần lặp thì
+    dừng sớm theo ngân sách mềm và độ ổn định của nước tốt nhất (xem time_manager).
+    """
+    if workers is None:
+        workers = PARALLEL_WORKERS
+    if depth is None:
+        depth = DEFAULT_DEPTH if time_limit is None and budget is None else MAX_DEPTH
+    if control is None:
+        control = SearchControl()
+    if budget is not None:
+        control.deadline = budget.deadline
+    elif time_limit is not None:
+        control.deadline = time.monotonic() + time_limit
+    global _table_evaluator
+    if nnue_weights != _table_evaluator:
+        # Điểm trong bảng chuyển vị chỉ dùng lại được khi cùng một hàm đánh giá
+        transposition_table.clear()
+        _table_evaluator = nnue_weights
+    transposition_table.new_search()
+    board = board.copy()
+    ctx = SearchContext(ordering=ordering, null_move=null_move,
+                        late_move_reductions=late_move_reductions, delta_pruning=delta_pruning,
+                        batch_eval=batch_eval,
+                        nnue_weights=nnue_weights, syzygy_path=syzygy_path)
+    if ctx.tablebase is not None:
+        probe = tablebase.root_move(board)
+        if probe is not None:
+            move, wdl = probe
+            score = tablebase.wdl_score(wdl)
+            return SearchResult(move, score if board.turn == chess.WHITE else -score, 0, 0, [move])
+    pos = search_position(board, ctx)
+    result = SearchResult(None, 0, 0, 0, [])
+    root = search_root if workers <= 1 else partial(search_root_parallel, board=board, workers=workers)
+
+    ctx.control = control
+    score = None
+    for current_depth in range(1, depth + 1):
+        try:
+            best_move, score = search_root_aspiration(pos, current_depth, ctx, score, root)
+            pv = ctx.root_pv if workers > 1 else principal_variation(pos, current_depth)
+        except SearchTimeout:
+            break
+        if best_move is None:
+            break
+        # Biến chính của lần lặp này dẫn đường cho thứ tự nước đi của lần lặp sau
+        ctx.pv = pv
+        if not ctx.pv or ctx.pv[0] != best_move:
+            ctx.pv = [best_move]
+        white_score = score if board.turn == chess.WHITE else -score
+        result = SearchResult(decode_move(best_move), white_score, current_depth,
+                              ctx.nodes, [decode_move(move) for move in ctx.pv], ctx.qnodes)
+        if control.expired():
+            break
+        if budget is not None:
+            budget.update(best_move)
+            if budget.should_stop():
+                break
+    if result.move is None and not control.stopped:
+        # Hết giờ ngay trong lần lặp đầu: `pos` đang dở giữa cây nên xét lại từ thế cờ gốc
+        root_pos = search_position(board)
+        entry = transposition_table.probe(root_pos.key)
+        hash_move = entry[3] or None if entry is not None else None
+        for move in ordered_moves(root_pos, ctx, 0, hash_move):
+            if root_pos.is_legal(move):
+                result = SearchResult(decode_move(move), 0, 0, ctx.nodes, [decode_move(move)])
+                break
+    return result._replace(nodes=ctx.nodes, qnodes=ctx.qnodes)
+
+
+def engine_name(options: dict) -> str:
+    """Tên engine trong bộ nhớ đệm phân tích: đổi theo trọng số đánh giá và tùy chọn tìm kiếm."""
+    weights = (piece_values, mobility_weights, KING_SHIELD_BONUS, DOUBLED_PAWN_PENALTY,
+               ISOLATED_PAWN_PENALTY, [globals()[chess.piece_name(piece_type) + "_table"]
+                                       for piece_type in chess.PIECE_TYPES])
+    name = f"botbaka:{zlib.crc32(repr(weights).encode()):08x}"
+    return name + "".join(f":{option}={value}" for option, value in sorted(options.items()))
+
+
+def find_best_move(board: chess.Board, depth: int = None, time_limit: float = None,
+                   cache: bool = True, stop_token: threading.Event = None,
+                   budget: time_manager.TimeBudget = None, **options):
+    """Nước đi tốt nhất theo search(); với `cache` thì thế cờ đã được tìm đủ sâu (hoặc đủ lâu)
+    trước đó được trả về ngay từ bộ nhớ đệm phân tích, kết quả mới được lưu lại.
+
+    Bật `stop_token` từ luồng khác thì tìm kiếm dừng sau tối đa TIME_CHECK_INTERVAL nút và
+    trả về nước của lần lặp cuối đã hoàn thành (None nếu chưa xong lần lặp nào).
+    Với `budget` thì bộ nhớ đệm dùng ngân sách mềm làm thời gian yêu cầu.
+    """
+    control = SearchControl(stop_token=stop_token)
+    if not cache:
+        return search(board, depth, time_limit, control=control, budget=budget, **options).move
+    engine = engine_name(options)
+    store = analysis_cache.get_cache()
+    wanted_time = budget.soft if budget is not None else time_limit
+    wanted_depth = DEFAULT_DEPTH if depth is None and wanted_time is None else depth
+    analysis = store.lookup(board, engine, wanted_depth, wanted_time)
+    if analysis is not None:
+        return analysis.move
+    result = search(board, depth, time_limit, control=control, budget=budget, **options)
+    # Kết quả bị cắt ngang chưa đủ thời gian/độ sâu yêu cầu nên không lưu. Lưu thời gian được
+    # yêu cầu (không phải thời gian đã dùng) để lần tra sau với cùng yêu cầu vẫn trúng
+    if not control.stopped:
+        store.store(board, engine, result.move, result.score, result.depth, wanted_time)
+    return result.move
+
+
+# 11. Ponder: tìm kiếm trong lượt của đối phương trên thế cờ sau nước đi đoán trước
+PONDER_PREDICT_DEPTH = 2
+
+
+def expected_reply(board: chess.Board):
+    """Nước đáp đoán trước của đối phương: nước tốt nhất trong bảng chuyển vị (biến chính của lần
+    tìm trước), nếu không có thì tìm nhanh ở độ sâu thấp."""
+    pos = search_position(board)
+    entry = transposition_table.probe(pos.key)
+    if entry is not None and entry[3] and pos.is_legal(entry[3]):
+        return decode_move(entry[3])
+    return search(board, PONDER_PREDICT_DEPTH).move
+
+
+class Ponder:
+    """Tìm kiếm nền trong lượt của đối phương, giả sử đối phương đi nước đoán trước.
+
+    Đúng nước (ponder hit) thì tìm tiếp cho đủ thời gian tính từ lúc bắt đầu ponder,
+    nên nếu đối phương nghĩ lâu thì nước đi có ngay; sai nước thì bỏ tìm kiếm.
+    """
+
+    def __init__(self, board: chess.Board, **options):
+        self.board = board.copy()
+        self.options = options
+        self.control = SearchControl()
+        self.position = None  # thế cờ sau nước đoán trước, có khi đã đoán xong
+        self.result = None
+        self.started = time.monotonic()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        predicted = expected_reply(self.board)
+        if predicted is None or self.control.stopped:
+            return
+        position = self.board.copy()
+        position.push(predicted)
+        self.position = position
+        self.result = search(position, MAX_DEPTH, control=self.control, **self.options)
+
+    def hit(self, board: chess.Board, time_limit: float, stop_token: threading.Event = None):
+        """Nước đi cho `board` nếu đó đúng là thế cờ đã ponder (chờ cho đủ thời gian), None nếu sai.
+        `stop_token` của người gọi được gắn vào tìm kiếm để có thể hủy trong lúc chờ."""
+        if self.position is None or board.fen() != self.position.fen():
+            self.stop()
+            return None
+        if stop_token is not None:
+            self.control.stop_token = stop_token
+        self.control.deadline = self.started + time_limit
+        self.thread.join()
+        return self.result.move if self.result is not None else None
+
+    def stop(self):
+        self.control.stop()
+        self.thread.join()
@@ -5,40 +5,93 @@ import stockfish
 import botbaka
 import os
 import botaho
+import book
 import threading
+import time_manager
+import bitbase
 
 SQUARE_SIZE = 60
 WIDTH, HEIGHT = SQUARE_SIZE * 8, SQUARE_SIZE * 8
+BOT_TIME_LIMIT = 1.5  # số giây mỗi nước của BotBaka và Stockfish khi không tính giờ
+# Thời gian ván cờ dạng "giây+increment", ví dụ CHESS_CLOCK=180+2; để trống thì không tính giờ
+TIME_CONTROL = time_manager.parse_time_control(os.environ.get("CHESS_CLOCK", ""))
 
 
 class Bot:
-    def __init__(self, bot_type):
+    def __init__(self, bot_type, ponder=True):
         self.bot_type = bot_type
-
-    def make_move(self, board):
+        # Ponder: tìm kiếm trong lượt của người chơi, giả sử người chơi đi nước bot đoán trước
+        self.ponder = ponder and bot_type in ("BotBaka", "Stockfish")
+        self.pondering = None
+
+    def start_pondering(self, board):
+        """Gọi ngay sau nước đi của bot, khi đến lượt người chơi."""
+        self.stop_pondering()
+        if not self.ponder or board.is_game_over():
+            return
+        if self.bot_type == "BotBaka":
+            self.pondering = botbaka.Ponder(board)
+        else:
+            self.pondering = stockfish.Ponder(board)
+
+    def stop_pondering(self):
+        if self.pondering is not None:
+            self.pondering.stop()
+            self.pondering = None
+
+    def make_move(self, board, stop_token=None, budget=None):
+        """Nước đi cho `board`; bật `stop_token` (threading.Event) từ luồng khác thì bot dừng
+        nghĩ và trả về nước tốt nhất đến lúc đó (có thể là None). `budget` là ngân sách thời
+        gian (time_manager.TimeBudget), mặc định BOT_TIME_LIMIT giây."""
+        if budget is None:
+            budget = time_manager.TimeBudget(BOT_TIME_LIMIT, BOT_TIME_LIMIT)
+        pondering, self.pondering = self.pondering, None
+        move = None
+        # Thế cờ khai cuộc có trong sách thì đi ngay, không tốn thời gian tìm kiếm
+        if self.bot_type in ("BotBaka", "Stockfish"):
+            move = book.book_move(board)
+        if pondering is not None:
+            # Người chơi đi đúng nước đã đoán thì dùng luôn kết quả ponder, sai thì bỏ
+            if move is None:
+                move = pondering.hit(board, budget.soft, stop_token)
+            else:
+                pondering.stop()
+        if move is not None:
+            return move
         if self.bot_type == "BotBaka":
-            return botbaka.find_best_move(board, 3)
+            return botbaka.find_best_move(board, stop_token=stop_token, budget=budget)
         elif self.bot_type == "Stockfish":
-            return stockfish.move(board)
+            return stockfish.move(board, stop_token=stop_token, budget=budget)
         elif self.bot_type == "BotAho":
-            return botaho.random_move(board)
+            return botaho.random_move(board, stop_token, budget.soft)
 
 
 class BotWorker(threading.Thread):
-    def __init__(self, bot, board, callback):
-        super().__init__()
+    """Luồng tìm nước đi cho bot; callback nhận (nước đi, thế cờ đã dùng để tính nước đó)."""
+
+    def __init__(self, bot, board, callback, budget=None):
+        super().__init__(daemon=True)
         self.bot = bot
         self.board = board.copy()
         self.callback = callback
+        self.budget = budget
+        self.stop_token = threading.Event()
+
+    def cancel(self):
+        """Dừng bot đang nghĩ; nước đi của lần tìm kiếm bị hủy sẽ bị bỏ."""
+        self.stop_token.set()
 
     def run(self):
-        move = self.bot.make_move(self.board)
-        self.callback(move)
+        move = self.bot.make_move(self.board, self.stop_token, self.budget)
+        if not self.stop_token.is_set():
+            self.callback(move, self.board)
 
 
 class Chess_Game:
-    def __init__(self, opt1=None, opt2=None, opt3=None, theme=Themes("default")):
+    def __init__(self, opt1=None, opt2=None, opt3=None, theme=Themes("default"), time_control=TIME_CONTROL):
         self.board = chess.Board()
+        # Đồng hồ ván cờ (None nếu không tính giờ), đồng hồ của quân trắng chạy ngay
+        self.clock = time_manager.GameClock(*time_control) if time_control else None
         self.opt1 = opt1  # Chế độ chơi (PvP hoặc Bot)
         self.opt2 = opt2  # Loại bot (BotBaka, BotAho, Stockfish)
         self.opt3 = opt3  # Màu của bot (chess.WHITE hoặc chess.BLACK)
@@ -52,6 +105,29 @@ class Chess_Game:
 
     def new_Game(self):
         self.board.reset()
+        if self.clock:
+            self.clock.reset()
+
+    def push(self, move):
+        """Đi nước `move` và bấm đồng hồ."""
+        self.board.push(move)
+        if self.clock:
+            self.clock.press()
+
+    def pause_clock(self):
+        if self.clock:
+            self.clock.pause()
+
+    def resume_clock(self):
+        if self.clock:
+            self.clock.resume()
+
+    def time_budget(self):
+        """Ngân sách thời gian cho nước tiếp theo của bên đang đi, theo thời gian còn lại trên đồng hồ."""
+        if self.clock is None:
+            return time_manager.TimeBudget(BOT_TIME_LIMIT, BOT_TIME_LIMIT)
+        turn = self.board.turn
+        return time_manager.allocate(self.clock.time_left(turn), self.clock.increment, self.board.ply() // 2)
 
     def undo(self):
         """Undo the last move if the move stack is not empty."""
@@ -67,6 +143,8 @@ class Chess_Game:
             # If it's the bot's turn after undoing, undo one more move
             if self.opt3 == self.board.turn:
                 self.undo()
+        if self.clock:
+            self.clock.switch(self.board.turn)
 
     def display_move_history(self):
         pass
@@ -205,6 +283,8 @@ def main():
     waiting_for_bot = False
     bot_thread = None
 
+    # Tạo bitbase tàn cuộc còn thiếu trước khi vào ván, để không bot nào phải tạo khi đang tính giờ
+    bitbase.prepare()
     pygame.init()
     screen = pygame.display.set_mode((800, 600))
     pygame.display.set_caption("Chess Game")
@@ -226,18 +306,39 @@ def main():
     resign_button_y = esc_button_y + BUTTON_HEIGHT + \
         20  # Position below ESC Menu button
 
+    def stop_bots():
+        """Hủy lần tìm nước đi đang chạy và dừng ponder (hoàn tác, đầu hàng, ván mới, đổi chế độ)."""
+        nonlocal waiting_for_bot, bot_thread
+        if bot_thread is not None:
+            bot_thread.cancel()
+        bot_thread = None
+        waiting_for_bot = False
+        for bot in (bot1, bot2):
+            if bot:
+                bot.stop_pondering()
+
+    def undo_move():
+        stop_bots()
+        game.undo_move()
+
     # Create the Undo, ESC, and Resign buttons
     undo_button = Buttons(undo_button_x, undo_button_y, BUTTON_WIDTH, BUTTON_HEIGHT, "Undo Move",
-                          game.theme, lambda: game.undo_move())
+                          game.theme, undo_move)
     esc_button = Buttons(undo_button_x, esc_button_y, BUTTON_WIDTH, BUTTON_HEIGHT, "ESC Menu",
                          game.theme, lambda: "esc_menu")
     resign_button = Buttons(undo_button_x, resign_button_y, BUTTON_WIDTH, BUTTON_HEIGHT, "Resign",
                             game.theme, lambda: "resign")
 
-    def handle_bot_move(move):
+    def handle_bot_move(move, position):
         nonlocal waiting_for_bot
-        game.board.push(move)
         waiting_for_bot = False
+        # Nước đi được tính cho thế cờ khác với bàn cờ hiện tại thì đã cũ, bỏ đi
+        if move is None or position.fen() != game.board.fen() or move not in game.board.legal_moves:
+            return
+        game.push(move)
+        # Bot tìm kiếm tiếp trong lúc người chơi suy nghĩ
+        if game.opt1 == "bot" and bot1:
+            bot1.start_pondering(game.board)
 
     def get_player_name(game):
         if game.opt1 == "pvp":
@@ -254,6 +355,22 @@ def main():
         text2 = font.render(player2_name, True, Themes("default").title_text)
         screen.blit(text1, (15, 555))
         screen.blit(text2, (15, 15))
+
+    def print_clocks(game):
+        """Thời gian còn lại của mỗi bên, cùng hàng với tên người chơi (bên dưới là bên ở cuối bàn cờ)."""
+        if game.clock is None:
+            return
+        font = pygame.font.Font(None, 36)
+        bottom = chess.BLACK if game.opt3 == chess.WHITE else chess.WHITE
+        for color, y in ((bottom, 555), (not bottom, 15)):
+            seconds = max(0.0, game.clock.time_left(color))
+            # Dưới 20 giây thì hiện thêm phần mười giây
+            if seconds < 20:
+                text = f"{int(seconds) // 60}:{seconds % 60:04.1f}"
+            else:
+                text = f"{int(seconds) // 60}:{int(seconds) % 60:02d}"
+            rendered = font.render(text, True, Themes("default").title_text)
+            screen.blit(rendered, (490 - rendered.get_width(), y))
     clock = pygame.time.Clock()
     while running:
         clock.tick(60)
@@ -266,6 +383,7 @@ def main():
         game.draw_pieces(screen)
         player1_name, player2_name = get_player_name(game)
         print_player_name(player1_name, player2_name)
+        print_clocks(game)
         # Draw the Undo and ESC buttons
         if game.opt1 != "bvb":
             undo_button.draw(screen)
@@ -273,7 +391,11 @@ def main():
         esc_button.draw(screen)
         pygame.display.flip()
 
-        if game.board.is_game_over():
+        flagged = game.clock.flag() if game.clock else None
+        if game.board.is_game_over() or flagged is not None:
+            # Ván đã kết thúc: dừng bot đang nghĩ và dừng đồng hồ
+            stop_bots()
+            game.pause_clock()
             # Add a 2-second delay to display the final move
             game.draw_board(screen, highlighted_squares, selected_square)
             game.draw_pieces(screen)
@@ -283,18 +405,20 @@ def main():
             pygame.time.wait(3000)
             winner = chess.WHITE if game.board.is_checkmate(
             ) and not game.board.turn else chess.BLACK
+            if flagged is not None:
+                winner = not flagged
             action = game_over_menu(screen, game, winner)
             if action == "new_game":
+                stop_bots()
                 game.new_Game()
                 selected_square = None
                 highlighted_squares = []
-                waiting_for_bot = False
-                bot_thread = None
             elif action == "change_option":
                 selected_square = None
                 highlighted_squares = []
                 opt1, opt2, opt3 = select_game_mode(
                     screen, theme=Themes("default"))
+                stop_bots()
                 game = Chess_Game(opt1, opt2, opt3)
                 bot1 = Bot(opt2) if opt1 in ["bot", "bvb"] else None
                 bot2 = Bot(opt3) if opt1 == "bvb" else None
@@ -310,7 +434,7 @@ def main():
                 if current_bot:
                     waiting_for_bot = True
                     bot_thread = BotWorker(
-                        current_bot, game.board, handle_bot_move)
+                        current_bot, game.board, handle_bot_move, game.time_budget())
                     bot_thread.start()
 
             elif game.opt1 == "bot":
@@ -318,19 +442,22 @@ def main():
                     if bot_thread is None or not bot_thread.is_alive():
                         waiting_for_bot = True
                         bot_thread = BotWorker(
-                            bot1, game.board, handle_bot_move)
+                            bot1, game.board, handle_bot_move, game.time_budget())
                         bot_thread.start()
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                game.pause_clock()
                 action = esc_menu(screen, game.theme)
                 if action == "resume":
+                    game.resume_clock()
                     continue
                 elif action == "change_option":
                     opt1, opt2, opt3 = select_game_mode(
                         screen, theme=Themes("default"))
+                    stop_bots()
                     game = Chess_Game(opt1, opt2, opt3)
                     bot1 = Bot(opt2) if opt1 in ["bot", "bvb"] else None
                     bot2 = Bot(opt3) if opt1 == "bvb" else None
@@ -339,17 +466,19 @@ def main():
                     running = False
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if resign_button.check_event(event) == "resign":
+                    stop_bots()
+                    game.pause_clock()
                     winner = chess.BLACK if game.board.turn == chess.WHITE else chess.WHITE
                     action = game_over_menu(screen, game, winner)
                     if action == "new_game":
+                        stop_bots()
                         game.new_Game()
                         selected_square = None
                         highlighted_squares = []
-                        waiting_for_bot = False
-                        bot_thread = None
                     elif action == "change_option":
                         opt1, opt2, opt3 = select_game_mode(
                             screen, theme=Themes("default"))
+                        stop_bots()
                         game = Chess_Game(opt1, opt2, opt3)
                         bot1 = Bot(opt2) if opt1 in ["bot", "bvb"] else None
                         bot2 = Bot(opt3) if opt1 == "bvb" else None
@@ -359,21 +488,26 @@ def main():
                 esc_button.check_event(event)
                 if esc_button.is_clicked:
                     esc_button.is_clicked = False
+                    game.pause_clock()
                     action = esc_menu(screen, game.theme)
                     if action == "resume":
+                        game.resume_clock()
                         continue
                     elif action == "change_option":
                         opt1, opt2, opt3 = select_game_mode(
                             screen, theme=Themes("default"))
+                        stop_bots()
                         game = Chess_Game(opt1, opt2, opt3)
                         bot1 = Bot(opt2) if opt1 in ["bot", "bvb"] else None
                         bot2 = Bot(opt3) if opt1 == "bvb" else None
                         running = opt1 is not None
                     elif action == "exit":
                         running = False
+                # Hoàn tác được cả khi bot đang nghĩ (lần tìm kiếm đó bị hủy)
+                if game.opt1 != "bvb":
+                    undo_button.check_event(event)
                 if waiting_for_bot:
                     continue
-                undo_button.check_event(event)
                 # Xử lý sự kiện click chuột trên bàn cờ
                 if game.opt1 == "bot" and game.board.turn == game.opt3:
                     continue
@@ -396,10 +530,11 @@ def main():
                             move = chess.Move(
                                 selected_square, square, promotion=chess.PIECE_SYMBOLS.index(promoted_piece))
                     if move in game.board.legal_moves:
-                        game.board.push(move)
+                        game.push(move)
                     selected_square = None
                     highlighted_squares = []
 
+    stop_bots()
     pygame.quit()
 
 
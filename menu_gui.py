@@ -476,6 +476,8 @@ def game_over_menu(screen, game, winner=None):
             result_text += f" ({game.opt2 if winner == chess.WHITE else game.opt3})"
         elif game.opt1 == "bot":
             result_text += f" ({game.opt2})" if game.opt3 == winner else f" (Player)"
+    elif game.clock is not None and game.clock.flag() is not None:
+        result_text = f"{'White' if winner == chess.WHITE else 'Black'} wins on time!"
     elif game.board.is_stalemate():
         result_text = "Stalemate!"
     elif game.board.is_insufficient_material():
@@ -0,0 +1,116 @@
+from see import see_ge
+
+# Các mức ưu tiên, nhóm trên luôn được xét trước nhóm dưới
+PV_SCORE = 4_000_000
+HASH_SCORE = 3_000_000
+CAPTURE_SCORE = 2_000_000
+KILLER_SCORE = 1_000_000
+# Nước ăn quân bị lỗ theo SEE xếp sau mọi nước yên tĩnh
+BAD_CAPTURE_SCORE = -1_000_000
+# Khi bảng lịch sử vượt ngưỡng thì chia đôi để không lấn sang nhóm nước sát thủ
+HISTORY_LIMIT = 500_000
+
+KILLERS_PER_PLY = 2
+
+
+def mvv_lva(pos, move: int) -> int:
+    """Most Valuable Victim - Least Valuable Attacker: ăn quân lớn bằng quân nhỏ trước."""
+    victim = pos.captured_type(move)
+    attacker = pos.types[move & 63]
+    score = victim * 10 - attacker
+    if move >> 12:
+        score += (move >> 12) * 10
+    return score
+
+
+class MoveOrderer:
+    """Sắp xếp nước đi: biến chính/bảng chuyển vị, ăn quân (MVV-LVA), nước sát thủ, lịch sử."""
+
+    def __init__(self):
+        self.killers = []
+        # Bảng "butterfly" theo [màu][ô đi][ô đến], giữ nguyên trong suốt một lần tìm kiếm
+        self.history = [[[0] * 64 for _ in range(64)] for _ in range(2)]
+
+    def killers_at(self, ply: int) -> list:
+        while len(self.killers) <= ply:
+            self.killers.append([None] * KILLERS_PER_PLY)
+        return self.killers[ply]
+
+    def score(self, pos, move: int, ply: int, hash_move=None, pv_move=None) -> int:
+        if move == pv_move:
+            return PV_SCORE
+        if move == hash_move:
+            return HASH_SCORE
+        if move >> 12 or pos.is_capture(move):
+            if not see_ge(pos, move):
+                return BAD_CAPTURE_SCORE + mvv_lva(pos, move)
+            return CAPTURE_SCORE + mvv_lva(pos, move)
+        killers = self.killers_at(ply)
+        if move in killers:
+            return KILLER_SCORE - killers.index(move)
+        if ply == 0:
+            # Ở gốc giữ thứ tự sinh nước để tìm kiếm tuần tự và song song chọn giống nhau khi hòa điểm
+            return 0
+        return self.history[pos.turn][move & 63][(move >> 6) & 63]
+
+    def order(self, pos, moves: list, ply: int, hash_move=None, pv_move=None) -> list:
+        return sorted(moves, key=lambda move: self.score(pos, move, ply, hash_move, pv_move),
+                      reverse=True)
+
+    def staged(self, pos, ply: int, hash_move=None, pv_move=None):
+        """Sinh nước đi dần theo giai đoạn: biến chính/bảng chuyển vị -> ăn quân có lời -> nước sát thủ
+        -> nước yên tĩnh -> ăn quân bị lỗ (theo SEE).
+
+        Giai đoạn sau chỉ được sinh khi các nước trước chưa gây cắt tỉa; nước đi là giả
+        hợp lệ, tính hợp lệ được kiểm tra lúc đi nước.
+        """
+        tried = []
+        # Nước từ biến chính/bảng chuyển vị: chỉ kiểm tra giả hợp lệ, chưa sinh gì cả
+        for move in (pv_move, hash_move):
+            if move and move not in tried and pos.is_pseudo_legal(move):
+                tried.append(move)
+                yield move
+
+        captures = pos.generate_moves(captures_only=True)
+        captures.sort(key=lambda move: mvv_lva(pos, move), reverse=True)
+        bad_captures = []
+        for move in captures:
+            if move in tried:
+                continue
+            if see_ge(pos, move):
+                yield move
+            else:
+                bad_captures.append(move)
+
+        for move in list(self.killers_at(ply)):
+            if (move and move not in tried and not move >> 12 and not pos.is_capture(move)
+                    and pos.is_pseudo_legal(move)):
+                tried.append(move)
+                yield move
+
+        quiets = pos.generate_moves(quiets_only=True)
+        history = self.history[pos.turn]
+        quiets.sort(key=lambda move: history[move & 63][(move >> 6) & 63], reverse=True)
+        for move in quiets:
+            if move not in tried:
+                yield move
+        yield from bad_captures
+
+    def record_cutoff(self, pos, move: int, ply: int, depth: int):
+        """Ghi nhận nước đi yên tĩnh gây cắt tỉa beta (gọi khi thế cờ đã hoàn tác nước đi)."""
+        if move >> 12 or pos.is_capture(move):
+            return
+        killers = self.killers_at(ply)
+        if killers[0] != move:
+            killers[1:] = killers[:-1]
+            killers[0] = move
+        row = self.history[pos.turn][move & 63]
+        row[(move >> 6) & 63] += depth * depth
+        if row[(move >> 6) & 63] > HISTORY_LIMIT:
+            self.age_history()
+
+    def age_history(self):
+        for side in self.history:
+            for row in side:
+                for to_square in range(64):
+                    row[to_square] //= 2
@@ -0,0 +1,285 @@
+"""Mạng đánh giá kiểu NNUE cho BotBaka; huấn luyện: `python nnue.py --positions 4000`."""
+import argparse
+import math
+import os
+import random
+
+import chess
+import numpy as np
+
+from position import NULL_MOVE
+
+# Đặc trưng quân-ô tương đối theo vua (HalfKP rút gọn): vua mỗi bên chia 4 nhóm theo cột,
+# mỗi quân không phải vua bật một đặc trưng (nhóm vua, loại quân, quân mình/đối phương, ô)
+KING_BUCKETS = 4
+PIECE_PLANES = 10
+FEATURES = KING_BUCKETS * PIECE_PLANES * 64
+HIDDEN = 64
+# Lớp đầu lượng tử hóa thành số nguyên để cộng/trừ dòng trọng số không bị sai số tích lũy
+QA = 127
+NNUE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nnue.npz")
+
+# Huấn luyện: thang sigmoid (centipawn) và giới hạn điểm nhãn
+EVAL_SCALE = 400
+TARGET_LIMIT = 2000
+
+
+def king_bucket(king_square: int) -> int:
+    return (king_square & 7) // 2
+
+
+def feature_index(perspective: bool, bucket: int, piece_type: int, color: bool, square: int) -> int:
+    """Chỉ số đặc trưng nhìn từ phía `perspective` (quân đen nhìn bàn cờ lật dọc)."""
+    if perspective == chess.BLACK:
+        square ^= 56
+    plane = (piece_type - 1) * 2 + (color != perspective)
+    return (bucket * PIECE_PLANES + plane) * 64 + square
+
+
+def active_features(board, perspective: bool) -> list:
+    """Các đặc trưng đang bật của chess.Board hoặc Position theo góc nhìn một bên."""
+    bucket = king_bucket(board.king(perspective))
+    features = []
+    for piece_type, pieces in ((chess.PAWN, board.pawns), (chess.KNIGHT, board.knights),
+                               (chess.BISHOP, board.bishops), (chess.ROOK, board.rooks),
+                               (chess.QUEEN, board.queens)):
+        for color in (chess.WHITE, chess.BLACK):
+            for square in chess.scan_forward(pieces & board.occupied_co[color]):
+                features.append(feature_index(perspective, bucket, piece_type, color, square))
+    return features
+
+
+class Network:
+    """Trọng số mạng: lớp biến đổi đặc trưng (số nguyên, thang QA) và lớp ra tuyến tính (centipawn)."""
+
+    def __init__(self, w1, b1, w2, b2):
+        self.w1 = np.round(np.asarray(w1) * QA).astype(np.int32)
+        self.b1 = np.round(np.asarray(b1) * QA).astype(np.int32)
+        self.w2 = np.asarray(w2, dtype=np.float64) / QA
+        self.b2 = float(b2)
+
+    @classmethod
+    def load(cls, path: str = NNUE_FILE):
+        weights = np.load(path)
+        return cls(weights["w1"], weights["b1"], weights["w2"], weights["b2"])
+
+    @classmethod
+    def random(cls, seed: int = 0):
+        """Mạng khởi tạo ngẫu nhiên, chỉ dùng để đo tốc độ khi chưa có file trọng số."""
+        rng = np.random.default_rng(seed)
+        return cls(rng.normal(0, 0.05, (FEATURES, HIDDEN)), np.full(HIDDEN, 0.5),
+                   rng.normal(0, 20, 2 * HIDDEN), 0.0)
+
+    def refresh(self, board, perspective: bool):
+        """Tính lại toàn bộ bộ tích lũy của một góc nhìn."""
+        return self.b1 + self.w1[active_features(board, perspective)].sum(axis=0, dtype=np.int32)
+
+    def output(self, own, other) -> float:
+        """Điểm theo bên đang đi từ bộ tích lũy của bên đi (`own`) và của đối phương."""
+        return float(np.clip(own, 0, QA) @ self.w2[:HIDDEN]
+                     + np.clip(other, 0, QA) @ self.w2[HIDDEN:] + self.b2)
+
+    def evaluate(self, board) -> float:
+        """Đánh giá không tăng dần (tính lại cả hai bộ tích lũy), theo góc nhìn quân trắng."""
+        white = self.refresh(board, chess.WHITE)
+        black = self.refresh(board, chess.BLACK)
+        if board.turn == chess.WHITE:
+            return self.output(white, black)
+        return -self.output(black, white)
+
+
+_networks = {}
+
+
+def load_network(path: str = NNUE_FILE) -> Network:
+    """Đọc file trọng số một lần cho mỗi đường dẫn (dùng lại trong các tiến trình tìm kiếm)."""
+    if path not in _networks:
+        _networks[path] = Network.load(path)
+    return _networks[path]
+
+
+class Accumulator:
+    """Bộ tích lũy lớp đầu của một Position, cộng/trừ dòng trọng số theo make/unmake.
+
+    Gắn vào `pos.accumulator`: Position gọi make() sau mỗi nước hợp lệ và unmake()
+    trước khi hoàn tác. Chỉ tính lại toàn bộ khi vua của một góc nhìn đổi nhóm cột.
+    """
+
+    def __init__(self, network: Network, pos):
+        self.network = network
+        self.values = [network.refresh(pos, chess.BLACK), network.refresh(pos, chess.WHITE)]
+        self.changes = []
+
+    def make(self, pos):
+        move, piece, captured, _, ep_square = pos.stack[-1][:5]
+        from_square = move & 63
+        to_square = (move >> 6) & 63
+        them = pos.turn
+        us = not them
+        added, removed = [], []
+        if piece != chess.KING:
+            added.append(((move >> 12) or piece, us, to_square))
+            removed.append((piece, us, from_square))
+        elif to_square - from_square in (2, -2):
+            rook_from, rook_to = ((from_square + 3, from_square + 1) if to_square > from_square
+                                  else (from_square - 4, from_square - 1))
+            added.append((chess.ROOK, us, rook_to))
+            removed.append((chess.ROOK, us, rook_from))
+        if captured:
+            removed.append((captured, them, to_square))
+        elif piece == chess.PAWN and to_square == ep_square:
+            removed.append((chess.PAWN, them, to_square - 8 if us == chess.WHITE else to_square + 8))
+
+        w1 = self.network.w1
+        record = []
+        for perspective in (chess.BLACK, chess.WHITE):
+            if (piece == chess.KING and perspective == us
+                    and king_bucket(from_square) != king_bucket(to_square)):
+                # Vua đổi nhóm: mọi đặc trưng của góc nhìn này đổi theo, tính lại và giữ bản cũ
+                record.append(self.values[perspective])
+                self.values[perspective] = self.network.refresh(pos, perspective)
+                continue
+            bucket = king_bucket(pos.king(perspective))
+            adds = [feature_index(perspective, bucket, *feature) for feature in added]
+            subs = [feature_index(perspective, bucket, *feature) for feature in removed]
+            values = self.values[perspective]
+            for index in adds:
+                values += w1[index]
+            for index in subs:
+                values -= w1[index]
+            record.append((adds, subs))
+        self.changes.append(record)
+
+    def unmake(self, pos):
+        if pos.stack[-1][0] == NULL_MOVE:
+            return
+        w1 = self.network.w1
+        for perspective, entry in zip((chess.BLACK, chess.WHITE), self.changes.pop()):
+            if not isinstance(entry, tuple):
+                self.values[perspective] = entry
+                continue
+            adds, subs = entry
+            values = self.values[perspective]
+            for index in adds:
+                values -= w1[index]
+            for index in subs:
+                values += w1[index]
+
+    def evaluate(self, turn: bool) -> float:
+        """Điểm theo góc nhìn bên đang đi."""
+        return self.network.output(self.values[turn], self.values[not turn])
+
+
+# Huấn luyện: chưng cất điểm tìm kiếm tĩnh của BotBaka vào mạng bằng NumPy (Adam, mini-batch)
+def training_positions(count: int, seed: int = 0) -> list:
+    """Các thế cờ lấy từ ván đi ngẫu nhiên, bỏ thế cờ đã kết thúc."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = chess.Board()
+        for _ in range(rng.randint(4, 100)):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        if not board.is_game_over():
+            positions.append(board)
+    return positions
+
+
+def label_positions(boards: list) -> np.ndarray:
+    """Nhãn: điểm tìm kiếm tĩnh của BotBaka theo bên đang đi (centipawn, đã cắt ngưỡng)."""
+    import botbaka
+    labels = []
+    for board in boards:
+        pos = botbaka.search_position(board)
+        score = botbaka.quiesce(pos, -math.inf, math.inf, botbaka.SearchContext())
+        labels.append(max(-TARGET_LIMIT, min(TARGET_LIMIT, score)))
+    return np.array(labels, dtype=np.float64)
+
+
+def feature_matrix(boards: list, own_side: bool) -> np.ndarray:
+    """Chỉ số đặc trưng (N, 32) của bên đi (`own_side`) hoặc đối phương, đệm bằng dòng rỗng FEATURES."""
+    rows = np.full((len(boards), 32), FEATURES, dtype=np.int64)
+    for i, board in enumerate(boards):
+        perspective = board.turn if own_side else not board.turn
+        features = active_features(board, perspective)
+        rows[i, :len(features)] = features
+    return rows
+
+
+def train(boards: list, labels: np.ndarray, epochs: int = 30, batch_size: int = 256,
+          learning_rate: float = 0.01, seed: int = 0) -> dict:
+    """Huấn luyện mạng trên (thế cờ, nhãn centipawn), trả về trọng số dạng số thực."""
+    rng = np.random.default_rng(seed)
+    own, other = feature_matrix(boards, True), feature_matrix(boards, False)
+    target = 1 / (1 + np.exp(-labels / EVAL_SCALE))
+    # Dòng cuối của w1 là đặc trưng đệm, luôn bằng 0; lớp ra học theo đơn vị tốt (100 centipawn)
+    params = {"w1": rng.normal(0, 0.05, (FEATURES + 1, HIDDEN)),
+              "b1": np.full(HIDDEN, 0.5),
+              "w2": rng.normal(0, 0.1, 2 * HIDDEN),
+              "b2": np.zeros(1)}
+    params["w1"][FEATURES] = 0
+    moments = {name: (np.zeros_like(value), np.zeros_like(value)) for name, value in params.items()}
+    scale = 100 / EVAL_SCALE
+    step = 0
+    for epoch in range(epochs):
+        order = rng.permutation(len(boards))
+        total_loss = 0.0
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            x_own, x_other = own[batch], other[batch]
+            a_own = params["b1"] + params["w1"][x_own].sum(axis=1)
+            a_other = params["b1"] + params["w1"][x_other].sum(axis=1)
+            h_own, h_other = np.clip(a_own, 0, 1), np.clip(a_other, 0, 1)
+            y = h_own @ params["w2"][:HIDDEN] + h_other @ params["w2"][HIDDEN:] + params["b2"][0]
+            p = 1 / (1 + np.exp(-y * scale))
+            error = p - target[batch]
+            total_loss += float((error ** 2).sum())
+
+            dy = 2 * error * p * (1 - p) * scale / len(batch)
+            da_own = np.outer(dy, params["w2"][:HIDDEN]) * ((a_own > 0) & (a_own < 1))
+            da_other = np.outer(dy, params["w2"][HIDDEN:]) * ((a_other > 0) & (a_other < 1))
+            grads = {"w2": np.concatenate([h_own.T @ dy, h_other.T @ dy]),
+                     "b2": np.array([dy.sum()]),
+                     "b1": da_own.sum(axis=0) + da_other.sum(axis=0),
+                     "w1": np.zeros_like(params["w1"])}
+            np.add.at(grads["w1"], x_own, da_own[:, None, :])
+            np.add.at(grads["w1"], x_other, da_other[:, None, :])
+            grads["w1"][FEATURES] = 0
+
+            step += 1
+            for name, grad in grads.items():
+                m, v = moments[name]
+                m *= 0.9
+                m += 0.1 * grad
+                v *= 0.999
+                v += 0.001 * grad ** 2
+                params[name] -= (learning_rate * (m / (1 - 0.9 ** step))
+                                 / (np.sqrt(v / (1 - 0.999 ** step)) + 1e-8))
+        print(f"epoch {epoch + 1}/{epochs}: loss {total_loss / len(boards):.5f}")
+    return {"w1": params["w1"][:FEATURES], "b1": params["b1"],
+            "w2": params["w2"] * 100, "b2": params["b2"][0] * 100}
+
+
+def save_weights(path: str, weights: dict):
+    np.savez(path, **weights)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--positions", type=int, default=4000)
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=NNUE_FILE)
+    args = parser.parse_args()
+
+    boards = training_positions(args.positions, args.seed)
+    labels = label_positions(boards)
+    weights = train(boards, labels, args.epochs, seed=args.seed)
+    save_weights(args.out, weights)
+    print(f"đã lưu trọng số vào {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,678 @@
+import chess
+import chess.polyglot
+
+# Bàn cờ gọn nhẹ chỉ dùng cho tìm kiếm của BotBaka: bitboard số nguyên, nước đi mã hóa
+# thành số nguyên (from | to << 6 | promotion << 12, giống transposition.encode_move)
+# và make/unmake chỉ lưu một bản ghi nhỏ cho mỗi nước.
+
+NULL_MOVE = 0
+
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+
+# Bảng tấn công tính sẵn của python-chess: mã, vua, tốt và quân trượt (theo độ chiếm đã lọc)
+KNIGHT_ATTACKS = chess.BB_KNIGHT_ATTACKS
+KING_ATTACKS = chess.BB_KING_ATTACKS
+PAWN_ATTACKS = chess.BB_PAWN_ATTACKS
+DIAG_ATTACKS = chess.BB_DIAG_ATTACKS
+DIAG_MASKS = chess.BB_DIAG_MASKS
+RANK_ATTACKS = chess.BB_RANK_ATTACKS
+RANK_MASKS = chess.BB_RANK_MASKS
+FILE_ATTACKS = chess.BB_FILE_ATTACKS
+FILE_MASKS = chess.BB_FILE_MASKS
+BB_SQUARES = chess.BB_SQUARES
+
+PROMOTION_PIECES = (chess.QUEEN, chess.KNIGHT, chess.ROOK, chess.BISHOP)
+
+# Khóa Zobrist lấy từ bảng ngẫu nhiên của Polyglot để trùng với chess.polyglot.zobrist_hash
+_RANDOM = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+PIECE_KEYS = [[[0] * 64] + [[_RANDOM[64 * ((piece_type - 1) * 2 + color) + square]
+                             for square in range(64)]
+                            for piece_type in range(1, 7)]
+              for color in (chess.BLACK, chess.WHITE)]
+CASTLING_KEYS = [0] * 16
+for _rights in range(16):
+    for _bit in range(4):
+        if _rights & (1 << _bit):
+            CASTLING_KEYS[_rights] ^= _RANDOM[768 + _bit]
+EP_KEYS = [_RANDOM[772 + file] for file in range(8)]
+TURN_KEY = _RANDOM[780]
+
+# Quyền nhập thành còn lại sau khi có quân đi từ/đến một ô
+CASTLING_MASK = [15] * 64
+CASTLING_MASK[chess.E1] = 15 & ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASK[chess.H1] = 15 & ~WHITE_KINGSIDE
+CASTLING_MASK[chess.A1] = 15 & ~WHITE_QUEENSIDE
+CASTLING_MASK[chess.E8] = 15 & ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASK[chess.H8] = 15 & ~BLACK_KINGSIDE
+CASTLING_MASK[chess.A8] = 15 & ~BLACK_QUEENSIDE
+
+
+def bishop_attacks(square: int, occupied: int) -> int:
+    return DIAG_ATTACKS[square][DIAG_MASKS[square] & occupied]
+
+
+def rook_attacks(square: int, occupied: int) -> int:
+    return (RANK_ATTACKS[square][RANK_MASKS[square] & occupied] |
+            FILE_ATTACKS[square][FILE_MASKS[square] & occupied])
+
+
+def move_from(move: int) -> int:
+    return move & 63
+
+
+def move_to(move: int) -> int:
+    return (move >> 6) & 63
+
+
+def move_promotion(move: int) -> int:
+    return move >> 12
+
+
+def make_code(from_square: int, to_square: int, promotion: int = 0) -> int:
+    return from_square | (to_square << 6) | (promotion << 12)
+
+
+class Position:
+    """Thế cờ dùng riêng cho tìm kiếm, đặt tên thuộc tính giống chess.Board để dùng chung hàm đánh giá.
+
+    Ngoài bitboard, thế cờ còn cập nhật tăng dần khóa Zobrist, vật chất và điểm
+    bảng vị trí (theo bảng điểm truyền vào khi tạo) qua make/unmake. Nếu gắn
+    `accumulator` (ví dụ nnue.Accumulator) thì nó được báo sau mỗi nước hợp lệ và
+    trước mỗi lần hoàn tác.
+    """
+
+    __slots__ = ("bb", "occupied_co", "occupied", "types", "turn", "castling", "ep_square",
+                 "halfmove_clock", "key", "material", "positional", "stack", "keys",
+                 "piece_values", "square_scores", "accumulator")
+
+    @classmethod
+    def from_board(cls, board: chess.Board, piece_values=None, square_scores=None):
+        """Tạo thế cờ từ chess.Board; `piece_values[type]` và `square_scores[color][type][square]`
+        (mang dấu theo góc nhìn quân trắng) dùng cho vật chất và điểm vị trí tăng dần."""
+        pos = cls.__new__(cls)
+        pos.bb = [0, board.pawns, board.knights, board.bishops,
+                  board.rooks, board.queens, board.kings]
+        pos.occupied_co = [board.occupied_co[chess.BLACK], board.occupied_co[chess.WHITE]]
+        pos.occupied = board.occupied
+        pos.types = [board.piece_type_at(square) or 0 for square in chess.SQUARES]
+        pos.turn = board.turn
+        rights = board.castling_rights
+        pos.castling = ((WHITE_KINGSIDE if rights & chess.BB_H1 else 0) |
+                        (WHITE_QUEENSIDE if rights & chess.BB_A1 else 0) |
+                        (BLACK_KINGSIDE if rights & chess.BB_H8 else 0) |
+                        (BLACK_QUEENSIDE if rights & chess.BB_A8 else 0))
+        pos.ep_square = board.ep_square
+        pos.halfmove_clock = board.halfmove_clock
+        pos.stack = []
+        pos.accumulator = None
+        pos.piece_values = piece_values or [0] * 7
+        pos.square_scores = square_scores or [[[0] * 64] * 7] * 2
+        pos.key = pos.compute_key()
+
+        # Khóa của các thế cờ đã qua trong ván, để phát hiện lặp lại
+        history = board.copy()
+        pos.keys = []
+        while history.move_stack:
+            history.pop()
+            pos.keys.append(chess.polyglot.zobrist_hash(history))
+        pos.keys.reverse()
+
+        pos.material = 0
+        pos.positional = 0
+        for square, piece_type in enumerate(pos.types):
+            if piece_type:
+                color = pos.color_at(square)
+                pos.material += pos.piece_values[piece_type] if color else -pos.piece_values[piece_type]
+                pos.positional += pos.square_scores[color][piece_type][square]
+        return pos
+
+    # Bitboard theo loại quân, cùng tên với chess.Board
+    @property
+    def pawns(self) -> int:
+        return self.bb[chess.PAWN]
+
+    @property
+    def knights(self) -> int:
+        return self.bb[chess.KNIGHT]
+
+    @property
+    def bishops(self) -> int:
+        return self.bb[chess.BISHOP]
+
+    @property
+    def rooks(self) -> int:
+        return self.bb[chess.ROOK]
+
+    @property
+    def queens(self) -> int:
+        return self.bb[chess.QUEEN]
+
+    @property
+    def kings(self) -> int:
+        return self.bb[chess.KING]
+
+    def color_at(self, square: int) -> bool:
+        return bool(self.occupied_co[chess.WHITE] & BB_SQUARES[square])
+
+    def piece_type_at(self, square: int):
+        return self.types[square] or None
+
+    def piece_at(self, square: int):
+        piece_type = self.types[square]
+        return chess.Piece(piece_type, self.color_at(square)) if piece_type else None
+
+    def piece_map(self) -> dict:
+        return {square: chess.Piece(piece_type, self.color_at(square))
+                for square, piece_type in enumerate(self.types) if piece_type}
+
+    def pieces(self, piece_type: int, color: bool) -> chess.SquareSet:
+        return chess.SquareSet(self.bb[piece_type] & self.occupied_co[color])
+
+    def king(self, color: bool):
+        king_mask = self.bb[chess.KING] & self.occupied_co[color]
+        return king_mask.bit_length() - 1 if king_mask else None
+
+    def ep_hash(self) -> int:
+        """Polyglot chỉ tính ô bắt tốt qua đường khi có tốt của bên đang đi đứng cạnh."""
+        if self.ep_square is None:
+            return 0
+        pawn_square = self.ep_square - 8 if self.turn == chess.WHITE else self.ep_square + 8
+        neighbours = ((BB_SQUARES[pawn_square] << 1) & ~chess.BB_FILE_A |
+                      (BB_SQUARES[pawn_square] >> 1) & ~chess.BB_FILE_H)
+        if neighbours & self.bb[chess.PAWN] & self.occupied_co[self.turn]:
+            return EP_KEYS[self.ep_square & 7]
+        return 0
+
+    def compute_key(self) -> int:
+        key = CASTLING_KEYS[self.castling] ^ self.ep_hash()
+        for square, piece_type in enumerate(self.types):
+            if piece_type:
+                key ^= PIECE_KEYS[self.color_at(square)][piece_type][square]
+        if self.turn == chess.WHITE:
+            key ^= TURN_KEY
+        return key
+
+    # Tấn công và chiếu
+    def is_attacked(self, square: int, by_color: bool) -> bool:
+        bb = self.bb
+        attackers = self.occupied_co[by_color]
+        if KNIGHT_ATTACKS[square] & bb[chess.KNIGHT] & attackers:
+            return True
+        if KING_ATTACKS[square] & bb[chess.KING] & attackers:
+            return True
+        if PAWN_ATTACKS[not by_color][square] & bb[chess.PAWN] & attackers:
+            return True
+        queens = bb[chess.QUEEN]
+        if rook_attacks(square, self.occupied) & (bb[chess.ROOK] | queens) & attackers:
+            return True
+        return bool(bishop_attacks(square, self.occupied) & (bb[chess.BISHOP] | queens) & attackers)
+
+    def is_check(self) -> bool:
+        king_mask = self.bb[chess.KING] & self.occupied_co[self.turn]
+        return self.is_attacked(king_mask.bit_length() - 1, not self.turn)
+
+    # Sinh nước đi giả hợp lệ; tính hợp lệ được kiểm tra khi make
+    def generate_moves(self, captures_only: bool = False, quiets_only: bool = False) -> list:
+        """Nước đi giả hợp lệ.
+
+        `captures_only` chỉ lấy nước "ồn" (ăn quân, bắt tốt qua đường, phong hậu);
+        `quiets_only` lấy phần còn lại (nước thường, phong cấp thấp, nhập thành).
+        Hai nhóm cộng lại đúng bằng danh sách đầy đủ.
+        """
+        moves = []
+        append = moves.append
+        bb = self.bb
+        us = self.turn
+        own = self.occupied_co[us]
+        enemy = self.occupied_co[not us]
+        occupied = self.occupied
+        noisy = not quiets_only
+        quiet = not captures_only
+        if captures_only:
+            targets = enemy
+        elif quiets_only:
+            targets = ~occupied & chess.BB_ALL
+        else:
+            targets = ~own & chess.BB_ALL
+
+        # Tốt
+        pawns = bb[chess.PAWN] & own
+        if us == chess.WHITE:
+            single = (pawns << 8) & ~occupied & chess.BB_ALL
+            double = ((single & chess.BB_RANK_3) << 8) & ~occupied
+            forward, last_rank = 8, chess.BB_RANK_8
+        else:
+            single = (pawns >> 8) & ~occupied
+            double = ((single & chess.BB_RANK_6) >> 8) & ~occupied
+            forward, last_rank = -8, chess.BB_RANK_1
+        promotions = single & last_rank
+        single &= ~last_rank
+        if not quiet:
+            single = double = 0
+        while single:
+            to_square = (single & -single).bit_length() - 1
+            append((to_square - forward) | to_square << 6)
+            single &= single - 1
+        while double:
+            to_square = (double & -double).bit_length() - 1
+            append((to_square - 2 * forward) | to_square << 6)
+            double &= double - 1
+        while promotions:
+            to_square = (promotions & -promotions).bit_length() - 1
+            self.append_promotions(moves, to_square - forward, to_square, noisy, quiet)
+            promotions &= promotions - 1
+        pawn_attacks = PAWN_ATTACKS[us]
+        # Nước ăn quân thường của tốt thuộc nhóm ồn, ăn quân kèm phong cấp thấp thuộc nhóm yên tĩnh
+        remaining = pawns if noisy else pawns & (chess.BB_RANK_7 if us == chess.WHITE else chess.BB_RANK_2)
+        while remaining:
+            from_square = (remaining & -remaining).bit_length() - 1
+            remaining &= remaining - 1
+            attacks = pawn_attacks[from_square] & enemy
+            while attacks:
+                to_square = (attacks & -attacks).bit_length() - 1
+                attacks &= attacks - 1
+                if BB_SQUARES[to_square] & last_rank:
+                    self.append_promotions(moves, from_square, to_square, noisy, quiet)
+                else:
+                    append(from_square | to_square << 6)
+        if noisy and self.ep_square is not None:
+            attackers = PAWN_ATTACKS[not us][self.ep_square] & pawns
+            while attackers:
+                from_square = (attackers & -attackers).bit_length() - 1
+                attackers &= attackers - 1
+                append(from_square | self.ep_square << 6)
+
+        # Mã, tượng, xe, hậu, vua
+        knights = bb[chess.KNIGHT] & own
+        while knights:
+            from_square = (knights & -knights).bit_length() - 1
+            knights &= knights - 1
+            self.append_targets(moves, from_square, KNIGHT_ATTACKS[from_square] & targets)
+        diagonal = (bb[chess.BISHOP] | bb[chess.QUEEN]) & own
+        while diagonal:
+            from_square = (diagonal & -diagonal).bit_length() - 1
+            diagonal &= diagonal - 1
+            self.append_targets(moves, from_square, bishop_attacks(from_square, occupied) & targets)
+        straight = (bb[chess.ROOK] | bb[chess.QUEEN]) & own
+        while straight:
+            from_square = (straight & -straight).bit_length() - 1
+            straight &= straight - 1
+            self.append_targets(moves, from_square, rook_attacks(from_square, occupied) & targets)
+        king_square = (bb[chess.KING] & own).bit_length() - 1
+        self.append_targets(moves, king_square, KING_ATTACKS[king_square] & targets)
+
+        if quiet and self.castling:
+            moves.extend(self.castling_moves(king_square))
+        return moves
+
+    def castling_moves(self, king_square: int) -> list:
+        """Nhập thành: các ô giữa trống, vua không bị chiếu và không đi qua ô bị tấn công."""
+        moves = []
+        us = self.turn
+        them = not us
+        occupied = self.occupied
+        if us == chess.WHITE:
+            rights = self.castling & (WHITE_KINGSIDE | WHITE_QUEENSIDE)
+            kingside, queenside = WHITE_KINGSIDE, WHITE_QUEENSIDE
+        else:
+            rights = self.castling & (BLACK_KINGSIDE | BLACK_QUEENSIDE)
+            kingside, queenside = BLACK_KINGSIDE, BLACK_QUEENSIDE
+        if rights and not self.is_attacked(king_square, them):
+            if (rights & kingside and not occupied & (BB_SQUARES[king_square + 1] | BB_SQUARES[king_square + 2])
+                    and not self.is_attacked(king_square + 1, them)):
+                moves.append(make_code(king_square, king_square + 2))
+            if (rights & queenside
+                    and not occupied & (BB_SQUARES[king_square - 1] | BB_SQUARES[king_square - 2] |
+                                        BB_SQUARES[king_square - 3])
+                    and not self.is_attacked(king_square - 1, them)):
+                moves.append(make_code(king_square, king_square - 2))
+        return moves
+
+    @staticmethod
+    def append_targets(moves: list, from_square: int, targets: int):
+        while targets:
+            moves.append(from_square | ((targets & -targets).bit_length() - 1) << 6)
+            targets &= targets - 1
+
+    @staticmethod
+    def append_promotions(moves: list, from_square: int, to_square: int, queen: bool, under: bool):
+        if queen:
+            moves.append(make_code(from_square, to_square, chess.QUEEN))
+        if under:
+            moves.extend(make_code(from_square, to_square, promotion)
+                         for promotion in PROMOTION_PIECES[1:])
+
+    def is_pseudo_legal(self, move: int) -> bool:
+        """Nước đi (ví dụ lấy từ bảng chuyển vị hoặc nước sát thủ) có nằm trong generate_moves() không,
+        kiểm tra mà không phải sinh cả danh sách."""
+        if move == NULL_MOVE:
+            return False
+        from_square = move & 63
+        to_square = (move >> 6) & 63
+        promotion = move >> 12
+        us = self.turn
+        own = self.occupied_co[us]
+        from_mask = BB_SQUARES[from_square]
+        to_mask = BB_SQUARES[to_square]
+        if not own & from_mask or own & to_mask:
+            return False
+        piece = self.types[from_square]
+        occupied = self.occupied
+        if piece == chess.PAWN:
+            last_rank = chess.BB_RANK_8 if us == chess.WHITE else chess.BB_RANK_1
+            if bool(to_mask & last_rank) != bool(promotion) or promotion == chess.PAWN or promotion > chess.QUEEN:
+                return False
+            if PAWN_ATTACKS[us][from_square] & to_mask:
+                return bool(self.occupied_co[not us] & to_mask) or to_square == self.ep_square
+            forward = 8 if us == chess.WHITE else -8
+            if occupied & to_mask:
+                return False
+            if to_square == from_square + forward:
+                return True
+            start_rank = chess.BB_RANK_2 if us == chess.WHITE else chess.BB_RANK_7
+            return (to_square == from_square + 2 * forward and bool(from_mask & start_rank)
+                    and not occupied & BB_SQUARES[from_square + forward])
+        if promotion:
+            return False
+        if piece == chess.KNIGHT:
+            return bool(KNIGHT_ATTACKS[from_square] & to_mask)
+        if piece == chess.BISHOP:
+            return bool(bishop_attacks(from_square, occupied) & to_mask)
+        if piece == chess.ROOK:
+            return bool(rook_attacks(from_square, occupied) & to_mask)
+        if piece == chess.QUEEN:
+            return bool((bishop_attacks(from_square, occupied) | rook_attacks(from_square, occupied)) & to_mask)
+        if to_square - from_square in (2, -2):
+            return move in self.castling_moves(from_square)
+        return bool(KING_ATTACKS[from_square] & to_mask)
+
+    def is_capture(self, move: int) -> bool:
+        to_square = (move >> 6) & 63
+        return bool(self.types[to_square]) or (
+            to_square == self.ep_square and self.types[move & 63] == chess.PAWN)
+
+    def captured_type(self, move: int) -> int:
+        """Loại quân bị ăn (kể cả bắt tốt qua đường), 0 nếu không ăn quân."""
+        to_square = (move >> 6) & 63
+        captured = self.types[to_square]
+        if not captured and to_square == self.ep_square and self.types[move & 63] == chess.PAWN:
+            return chess.PAWN
+        return captured
+
+    # Thực hiện và hoàn tác nước đi
+    def make(self, move: int) -> bool:
+        """Đi nước giả hợp lệ; nếu nước đi để vua bị chiếu thì tự hoàn tác và trả về False."""
+        if move == NULL_MOVE:
+            self.make_null()
+            return True
+        from_square = move & 63
+        to_square = (move >> 6) & 63
+        promotion = move >> 12
+        types = self.types
+        bb = self.bb
+        us = self.turn
+        them = not us
+        piece = types[from_square]
+        captured = types[to_square]
+        key = self.key
+        material = self.material
+        positional = self.positional
+        self.stack.append((move, piece, captured, self.castling, self.ep_square,
+                           self.halfmove_clock, key, material, positional))
+        self.keys.append(key)
+
+        own_scores = self.square_scores[us]
+        enemy_scores = self.square_scores[them]
+        values = self.piece_values
+        sign = 1 if us == chess.WHITE else -1
+        own_keys = PIECE_KEYS[us]
+        from_mask = BB_SQUARES[from_square]
+        to_mask = BB_SQUARES[to_square]
+        own = self.occupied_co[us]
+        enemy = self.occupied_co[them]
+        key ^= self.ep_hash() ^ CASTLING_KEYS[self.castling] ^ TURN_KEY
+        halfmove_clock = self.halfmove_clock + 1
+
+        if captured:
+            bb[captured] ^= to_mask
+            enemy ^= to_mask
+            material += sign * values[captured]
+            positional -= enemy_scores[captured][to_square]
+            key ^= PIECE_KEYS[them][captured][to_square]
+            halfmove_clock = 0
+
+        new_piece = promotion or piece
+        bb[piece] ^= from_mask
+        bb[new_piece] |= to_mask
+        own ^= from_mask | to_mask
+        types[from_square] = 0
+        types[to_square] = new_piece
+        positional += own_scores[new_piece][to_square] - own_scores[piece][from_square]
+        key ^= own_keys[piece][from_square] ^ own_keys[new_piece][to_square]
+        if promotion:
+            material += sign * (values[promotion] - values[chess.PAWN])
+
+        ep_square = None
+        if piece == chess.PAWN:
+            halfmove_clock = 0
+            if to_square == self.ep_square:
+                captured_square = to_square - 8 * sign
+                captured_mask = BB_SQUARES[captured_square]
+                bb[chess.PAWN] ^= captured_mask
+                enemy ^= captured_mask
+                types[captured_square] = 0
+                material += sign * values[chess.PAWN]
+                positional -= enemy_scores[chess.PAWN][captured_square]
+                key ^= PIECE_KEYS[them][chess.PAWN][captured_square]
+            elif to_square - from_square in (16, -16):
+                ep_square = (from_square + to_square) // 2
+        elif piece == chess.KING and to_square - from_square in (2, -2):
+            if to_square > from_square:
+                rook_from, rook_to = from_square + 3, from_square + 1
+            else:
+                rook_from, rook_to = from_square - 4, from_square - 1
+            rook_mask = BB_SQUARES[rook_from] | BB_SQUARES[rook_to]
+            bb[chess.ROOK] ^= rook_mask
+            own ^= rook_mask
+            types[rook_from] = 0
+            types[rook_to] = chess.ROOK
+            positional += own_scores[chess.ROOK][rook_to] - own_scores[chess.ROOK][rook_from]
+            key ^= own_keys[chess.ROOK][rook_from] ^ own_keys[chess.ROOK][rook_to]
+
+        self.castling &= CASTLING_MASK[from_square] & CASTLING_MASK[to_square]
+        self.occupied_co[us] = own
+        self.occupied_co[them] = enemy
+        self.occupied = own | enemy
+        self.turn = them
+        self.ep_square = ep_square
+        self.halfmove_clock = halfmove_clock
+        self.material = material
+        self.positional = positional
+        self.key = key ^ CASTLING_KEYS[self.castling] ^ self.ep_hash()
+
+        king_mask = bb[chess.KING] & own
+        if self.is_attacked(king_mask.bit_length() - 1, them):
+            self.take_back()
+            return False
+        if self.accumulator is not None:
+            self.accumulator.make(self)
+        return True
+
+    def make_null(self):
+        self.stack.append((NULL_MOVE, 0, 0, self.castling, self.ep_square,
+                           self.halfmove_clock, self.key, self.material, self.positional))
+        self.keys.append(self.key)
+        self.key ^= self.ep_hash() ^ TURN_KEY
+        self.ep_square = None
+        self.halfmove_clock += 1
+        self.turn = not self.turn
+
+    def unmake(self):
+        if self.accumulator is not None:
+            self.accumulator.unmake(self)
+        self.take_back()
+
+    def take_back(self):
+        """Hoàn tác nước cuối trên bàn cờ (không báo cho bộ tích lũy đánh giá)."""
+        (move, piece, captured, self.castling, self.ep_square, self.halfmove_clock,
+         self.key, self.material, self.positional) = self.stack.pop()
+        self.keys.pop()
+        them = self.turn
+        us = not them
+        self.turn = us
+        if move == NULL_MOVE:
+            return
+
+        from_square = move & 63
+        to_square = (move >> 6) & 63
+        new_piece = (move >> 12) or piece
+        bb = self.bb
+        types = self.types
+        from_mask = BB_SQUARES[from_square]
+        to_mask = BB_SQUARES[to_square]
+        own = self.occupied_co[us] ^ (from_mask | to_mask)
+        enemy = self.occupied_co[them]
+
+        bb[new_piece] ^= to_mask
+        bb[piece] |= from_mask
+        types[from_square] = piece
+        types[to_square] = captured
+        if captured:
+            bb[captured] |= to_mask
+            enemy |= to_mask
+        elif piece == chess.PAWN and to_square == self.ep_square:
+            captured_square = to_square - 8 if us == chess.WHITE else to_square + 8
+            bb[chess.PAWN] |= BB_SQUARES[captured_square]
+            enemy |= BB_SQUARES[captured_square]
+            types[captured_square] = chess.PAWN
+        elif piece == chess.KING and to_square - from_square in (2, -2):
+            if to_square > from_square:
+                rook_from, rook_to = from_square + 3, from_square + 1
+            else:
+                rook_from, rook_to = from_square - 4, from_square - 1
+            rook_mask = BB_SQUARES[rook_from] | BB_SQUARES[rook_to]
+            bb[chess.ROOK] ^= rook_mask
+            own ^= rook_mask
+            types[rook_from] = chess.ROOK
+            types[rook_to] = 0
+
+        self.occupied_co[us] = own
+        self.occupied_co[them] = enemy
+        self.occupied = own | enemy
+
+    # Nước đi hợp lệ và trạng thái kết thúc ván
+    def legal_moves(self) -> list:
+        moves = []
+        for move in self.generate_moves():
+            if self.make(move):
+                self.unmake()
+                moves.append(move)
+        return moves
+
+    def has_legal_move(self) -> bool:
+        """Dừng ngay khi thấy một nước hợp lệ: thử nước của vua và các quân trước khi sinh đủ danh sách."""
+        bb = self.bb
+        own = self.occupied_co[self.turn]
+        occupied = self.occupied
+        targets = ~own & chess.BB_ALL
+        king_square = (bb[chess.KING] & own).bit_length() - 1
+        candidates = [(king_square, KING_ATTACKS[king_square] & targets)]
+        for from_square in chess.scan_forward(bb[chess.KNIGHT] & own):
+            candidates.append((from_square, KNIGHT_ATTACKS[from_square] & targets))
+        for from_square in chess.scan_forward((bb[chess.BISHOP] | bb[chess.QUEEN]) & own):
+            candidates.append((from_square, bishop_attacks(from_square, occupied) & targets))
+        for from_square in chess.scan_forward((bb[chess.ROOK] | bb[chess.QUEEN]) & own):
+            candidates.append((from_square, rook_attacks(from_square, occupied) & targets))
+        for from_square, attacks in candidates:
+            for to_square in chess.scan_forward(attacks):
+                if self.make(from_square | to_square << 6):
+                    self.unmake()
+                    return True
+        # Chỉ còn nước của tốt (nhập thành hợp lệ thì nước vua đi một ô cũng hợp lệ)
+        pawns = bb[chess.PAWN]
+        for move in self.generate_moves():
+            if BB_SQUARES[move & 63] & pawns and self.make(move):
+                self.unmake()
+                return True
+        return False
+
+    def is_legal(self, move: int) -> bool:
+        if not self.is_pseudo_legal(move):
+            return False
+        if self.make(move):
+            self.unmake()
+            return True
+        return False
+
+    def is_checkmate(self) -> bool:
+        return self.is_check() and not self.has_legal_move()
+
+    def is_stalemate(self) -> bool:
+        return not self.is_check() and not self.has_legal_move()
+
+    def has_insufficient_material(self, color: bool) -> bool:
+        """Cùng quy tắc với chess.Board.has_insufficient_material."""
+        bb = self.bb
+        own = self.occupied_co[color]
+        if own & (bb[chess.PAWN] | bb[chess.ROOK] | bb[chess.QUEEN]):
+            return False
+        if own & bb[chess.KNIGHT]:
+            return (chess.popcount(own) <= 2 and
+                    not self.occupied_co[not color] & ~bb[chess.KING] & ~bb[chess.QUEEN])
+        if own & bb[chess.BISHOP]:
+            same_color = (not bb[chess.BISHOP] & chess.BB_DARK_SQUARES or
+                          not bb[chess.BISHOP] & chess.BB_LIGHT_SQUARES)
+            return same_color and not bb[chess.PAWN] and not bb[chess.KNIGHT]
+        return True
+
+    def is_insufficient_material(self) -> bool:
+        return (self.has_insufficient_material(chess.WHITE) and
+                self.has_insufficient_material(chess.BLACK))
+
+    def repetition_count(self) -> int:
+        """Số lần thế cờ hiện tại đã xuất hiện (tính cả lần này) kể từ nước không thể đảo ngược cuối."""
+        count = 1
+        keys = self.keys
+        for i in range(len(keys) - 2, max(-1, len(keys) - 1 - self.halfmove_clock), -2):
+            if keys[i] == self.key:
+                count += 1
+        return count
+
+    def is_repetition(self) -> bool:
+        """Thế cờ đã xuất hiện trước đó (một lần là đủ) kể từ nước không thể đảo ngược cuối.
+
+        Chỉ so khóa Zobrist của các thế cờ cùng bên đi trong phạm vi bộ đếm 50 nước.
+        """
+        key = self.key
+        keys = self.keys
+        for i in range(len(keys) - 4, max(-1, len(keys) - 1 - self.halfmove_clock), -2):
+            if keys[i] == key:
+                return True
+        return False
+
+    def is_draw(self) -> bool:
+        """Hòa trong cây tìm kiếm: luật 50 nước, lặp lại hoặc không đủ quân chiếu bí.
+
+        Không sinh nước đi; hết nước (chiếu bí/hết nước đi) do nơi gọi tự phát hiện.
+        """
+        return (self.halfmove_clock >= 100 or self.is_repetition()
+                or self.is_insufficient_material())
+
+    def is_game_over(self) -> bool:
+        """Cùng điều kiện với chess.Board.is_game_over(): hết nước, thiếu quân, luật 75 nước, lặp 5 lần."""
+        return (not self.has_legal_move() or self.is_insufficient_material()
+                or self.halfmove_clock >= 150 or self.repetition_count() >= 5)
+
+    def perft(self, depth: int) -> int:
+        """Đếm số nút lá ở độ sâu `depth`, dùng để đối chiếu bộ sinh nước với python-chess."""
+        if depth == 0:
+            return 1
+        nodes = 0
+        for move in self.generate_moves():
+            if self.make(move):
+                nodes += self.perft(depth - 1) if depth > 1 else 1
+                self.unmake()
+        return nodes
@@ -0,0 +1,78 @@
+import chess
+
+from position import BB_SQUARES, KING_ATTACKS, KNIGHT_ATTACKS, PAWN_ATTACKS, bishop_attacks, rook_attacks
+
+# Giá trị quân trong trao đổi; vua lớn hơn mọi quân để chỉ được ăn lại khi đối phương hết quân tấn công
+SEE_VALUES = [0, 100, 320, 330, 500, 900, 20000]
+
+
+def attackers_to(pos, square: int, occupied: int) -> int:
+    """Quân của cả hai bên tấn công `square` khi các ô chiếm giữ là `occupied` (để lộ quân trượt phía sau)."""
+    bb = pos.bb
+    queens = bb[chess.QUEEN]
+    return ((PAWN_ATTACKS[chess.WHITE][square] & bb[chess.PAWN] & pos.occupied_co[chess.BLACK]) |
+            (PAWN_ATTACKS[chess.BLACK][square] & bb[chess.PAWN] & pos.occupied_co[chess.WHITE]) |
+            (KNIGHT_ATTACKS[square] & bb[chess.KNIGHT]) |
+            (KING_ATTACKS[square] & bb[chess.KING]) |
+            (bishop_attacks(square, occupied) & (bb[chess.BISHOP] | queens)) |
+            (rook_attacks(square, occupied) & (bb[chess.ROOK] | queens))) & occupied
+
+
+def see(pos, move: int) -> int:
+    """Static exchange evaluation: lời/lỗ vật chất của chuỗi ăn qua ăn lại trên ô đến.
+
+    Mỗi bên luôn ăn lại bằng quân nhỏ nhất và được dừng khi ăn tiếp bị lỗ; quân trượt
+    đứng sau (x-ray) được tính khi quân phía trước đã rời ô.
+    """
+    from_square = move & 63
+    to_square = (move >> 6) & 63
+    promotion = move >> 12
+    bb = pos.bb
+    occupied_co = pos.occupied_co
+    occupied = pos.occupied ^ BB_SQUARES[from_square]
+
+    gain = [SEE_VALUES[pos.captured_type(move)]]
+    attacker_type = pos.types[from_square]
+    if attacker_type == chess.PAWN and to_square == pos.ep_square:
+        occupied ^= BB_SQUARES[to_square - 8 if pos.turn == chess.WHITE else to_square + 8]
+    if promotion:
+        gain[0] += SEE_VALUES[promotion] - SEE_VALUES[chess.PAWN]
+        attacker_type = promotion
+
+    attackers = attackers_to(pos, to_square, occupied)
+    diagonal = bb[chess.BISHOP] | bb[chess.QUEEN]
+    straight = bb[chess.ROOK] | bb[chess.QUEEN]
+    side = not pos.turn
+    while True:
+        own = attackers & occupied_co[side]
+        if not own:
+            break
+        for piece_type in chess.PIECE_TYPES:
+            candidates = own & bb[piece_type]
+            if candidates:
+                break
+        # Vua không được ăn vào ô còn bị đối phương tấn công
+        if piece_type == chess.KING and attackers & occupied_co[not side]:
+            break
+        gain.append(SEE_VALUES[attacker_type] - gain[-1])
+        occupied ^= candidates & -candidates
+        if piece_type in (chess.PAWN, chess.BISHOP, chess.QUEEN):
+            attackers |= bishop_attacks(to_square, occupied) & diagonal
+        if piece_type in (chess.ROOK, chess.QUEEN):
+            attackers |= rook_attacks(to_square, occupied) & straight
+        attackers &= occupied
+        attacker_type = piece_type
+        side = not side
+
+    for i in range(len(gain) - 1, 0, -1):
+        gain[i - 1] = -max(-gain[i - 1], gain[i])
+    return gain[0]
+
+
+def see_ge(pos, move: int, threshold: int = 0) -> bool:
+    """see(pos, move) >= threshold; trả lời ngay khi ăn quân không nhỏ hơn quân đi."""
+    if not move >> 12:
+        gain = SEE_VALUES[pos.captured_type(move)] - SEE_VALUES[pos.types[move & 63]]
+        if gain >= threshold:
+            return True
+    return see(pos, move) >= threshold
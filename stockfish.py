@@ -1,14 +1,324 @@
+"""Nhóm tiến trình Stockfish dùng chung giữa các ván, chỉ khởi động khi cần đến nước đi đầu tiên."""
+import atexit
+import os
+import shutil
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+
 import chess
 import chess.engine
-import subprocess
 
+import analysis_cache
+import time_manager
+from transposition import zobrist_key
+
+# Cấu hình mặc định, đổi bằng biến môi trường hoặc configure()
+WINDOWS_PATH = "stockfish-windows-x86-64-avx2/stockfish/stockfish-windows-x86-64-avx2.exe"
+STOCKFISH_PATH = os.environ.get(
+    "STOCKFISH_PATH", WINDOWS_PATH if os.name == "nt" else shutil.which("stockfish") or "stockfish")
+THREADS = int(os.environ.get("STOCKFISH_THREADS", 1))
+HASH_MB = int(os.environ.get("STOCKFISH_HASH", 16))
+POOL_SIZE = int(os.environ.get("STOCKFISH_POOL", 1))
+# Chu kỳ (giây) kiểm tra stop token trong lúc engine đang nghĩ
+STOP_POLL_INTERVAL = 0.005
+
+
+class EnginePool:
+    """Tối đa `size` tiến trình engine; mượn bằng checkout() và trả bằng checkin().
+
+    Engine chỉ được mở khi có người mượn mà không còn engine rảnh; engine bị
+    chết giữa chừng được đóng hẳn và lần mượn sau sẽ mở engine mới.
+    """
+
+    def __init__(self, path: str = None, size: int = None, threads: int = None, hash_mb: int = None):
+        self.path = path or STOCKFISH_PATH
+        self.size = size or POOL_SIZE
+        self.threads = threads or THREADS
+        self.hash_mb = hash_mb or HASH_MB
+        self.idle = []
+        self.started = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def open_engine(self) -> chess.engine.SimpleEngine:
+        # Trên Windows ẩn cửa sổ console của engine
+        options = {"creationflags": subprocess.CREATE_NO_WINDOW} if os.name == "nt" else {}
+        engine = chess.engine.SimpleEngine.popen_uci(self.path, **options)
+        settings = {"Threads": self.threads, "Hash": self.hash_mb}
+        engine.configure({name: value for name, value in settings.items() if name in engine.options})
+        return engine
+
+    def checkout(self) -> chess.engine.SimpleEngine:
+        """Mượn một engine, chờ nếu cả nhóm đang bận."""
+        with self.condition:
+            while not self.idle and self.started >= self.size:
+                self.condition.wait()
+            if self.idle:
+                return self.idle.pop()
+            self.started += 1
+        try:
+            return self.open_engine()
+        except BaseException:
+            with self.condition:
+                self.started -= 1
+                self.condition.notify()
+            raise
+
+    def checkin(self, engine: chess.engine.SimpleEngine, broken: bool = False):
+        """Trả engine về nhóm; engine hỏng thì đóng lại để lần sau mở engine mới."""
+        broken = broken or self.closed
+        with self.condition:
+            if broken:
+                self.started -= 1
+            else:
+                self.idle.append(engine)
+            self.condition.notify()
+        if broken:
+            close_engine(engine)
+
+    def play(self, board: chess.Board, limit: chess.engine.Limit, stop_token: threading.Event = None,
+             budget: time_manager.TimeBudget = None, **options) -> chess.engine.PlayResult:
+        """engine.play trên một engine mượn từ nhóm; engine chết thì khởi động lại và thử thêm một lần.
+        Có `stop_token` thì engine nhận lệnh `stop` ngay khi token được bật, có `budget` thì
+        engine được dừng theo ngân sách mềm (xem play_stoppable)."""
+        for attempt in range(2):
+            engine = self.checkout()
+            try:
+                if stop_token is None and budget is None:
+                    result = engine.play(board, limit, **options)
+                else:
+                    result = play_stoppable(engine, board, limit, stop_token or threading.Event(),
+                                            budget, **options)
+            except chess.engine.EngineTerminatedError:
+                self.checkin(engine, broken=True)
+                if attempt:
+                    raise
+                continue
+            except BaseException:
+                self.checkin(engine, broken=True)
+                raise
+            self.checkin(engine)
+            return result
+
+    def close(self):
+        """Đóng các engine đang rảnh (engine đang được mượn sẽ bị đóng khi trả về)."""
+        with self.condition:
+            self.closed = True
+            idle, self.idle = self.idle, []
+            self.started -= len(idle)
+        for engine in idle:
+            close_engine(engine)
+
+
+def play_stoppable(engine: chess.engine.SimpleEngine, board: chess.Board, limit: chess.engine.Limit,
+                   stop_token: threading.Event, budget: time_manager.TimeBudget = None,
+                   info=chess.engine.INFO_NONE) -> chess.engine.PlayResult:
+    """Như engine.play nhưng chạy bằng phân tích có giới hạn để gửi được lệnh `stop` khi
+    `stop_token` được bật hoặc khi hết ngân sách mềm của `budget`; khi đó nước đi là nước
+    tốt nhất engine tìm được đến lúc dừng."""
+    done = threading.Event()
+    if budget is not None:
+        info |= chess.engine.INFO_PV
+    with engine.analysis(board, limit, info=info) as analysis:
+        watcher = threading.Thread(target=stop_when_set, args=(stop_token, done, analysis), daemon=True)
+        watcher.start()
+        try:
+            if budget is not None:
+                follow_budget(analysis, budget)
+            best = analysis.wait()
+        finally:
+            done.set()
+        info = dict(analysis.info)
+    watcher.join()
+    return chess.engine.PlayResult(best.move, best.ponder, info)
+
+
+def follow_budget(analysis, budget: time_manager.TimeBudget):
+    """Theo dõi biến chính sau mỗi độ sâu mới và dừng engine khi budget.should_stop()."""
+    depth = 0
+    for info in analysis:
+        if info.get("depth", 0) > depth and info.get("pv"):
+            depth = info["depth"]
+            budget.update(info["pv"][0])
+            if budget.should_stop():
+                analysis.stop()
+                return
+
+
+def stop_when_set(stop_token: threading.Event, done: threading.Event, analysis):
+    while not done.is_set():
+        if stop_token.wait(STOP_POLL_INTERVAL):
+            analysis.stop()
+            return
+
+
+def close_engine(engine: chess.engine.SimpleEngine):
+    try:
+        engine.quit()
+    except (chess.engine.EngineError, OSError, TimeoutError):
+        engine.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def configure(path: str = None, threads: int = None, hash_mb: int = None, size: int = None):
+    """Đổi cấu hình engine; nhóm cũ được đóng và nhóm mới chỉ khởi động khi cần."""
+    global STOCKFISH_PATH, THREADS, HASH_MB, POOL_SIZE
+    STOCKFISH_PATH = path or STOCKFISH_PATH
+    THREADS = threads or THREADS
+    HASH_MB = hash_mb or HASH_MB
+    POOL_SIZE = size or POOL_SIZE
+    close()
+
+
+def get_pool() -> EnginePool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = EnginePool()
+        return _pool
+
+
+def close():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+atexit.register(close)
+
+
+def engine_name(pool: EnginePool) -> str:
+    """Tên engine trong bộ nhớ đệm phân tích (file chạy và cấu hình)."""
+    return f"stockfish:{os.path.basename(pool.path)}:threads={pool.threads}:hash={pool.hash_mb}"
+
+
+def move(board, time=1.5, cache=True, stop_token=None, budget=None):
+    """Nước đi của Stockfish trong `time` giây; thế cờ đã phân tích với thời gian ít nhất bằng
+    vậy thì lấy ngay từ bộ nhớ đệm phân tích. Bật `stop_token` thì engine dừng ngay và
+    trả về nước tốt nhất đến lúc đó. `budget` (time_manager.TimeBudget) thay cho `time`:
+    engine nghĩ tối đa đến ngân sách cứng và dừng sớm theo ngân sách mềm."""
+    pool = get_pool()
+    if budget is not None:
+        time = budget.soft
+        limit = chess.engine.Limit(max(budget.remaining(), time_manager.MIN_TIME))
+    else:
+        limit = chess.engine.Limit(time)
+    if not cache:
+        return pool.play(board, limit, stop_token, budget).move
+    engine = engine_name(pool)
+    store = analysis_cache.get_cache()
+    analysis = store.lookup(board, engine, time_limit=time)
+    if analysis is not None:
+        return analysis.move
+    result = pool.play(board, limit, stop_token, budget,
+                       info=chess.engine.INFO_BASIC | chess.engine.INFO_SCORE)
+    # Kết quả bị cắt ngang chưa đủ thời gian yêu cầu nên không lưu
+    if stop_token is not None and stop_token.is_set():
+        return result.move
+    remember_reply(board, result)
+    score = result.info.get("score")
+    store.store(board, engine, result.move, score.white().score(mate_score=100000) if score else None,
+                result.info.get("depth", 0), time)
+    return result.move
+
+
+# Ponder: nước đáp đoán trước ("bestmove ... ponder ...") theo khóa của thế cờ sau nước đi của engine
+PREDICT_TIME = 0.1
+_expected_replies = OrderedDict()
+
+
+def remember_reply(board: chess.Board, result: chess.engine.PlayResult):
+    if result.move is None or result.ponder is None:
+        return
+    after = board.copy(stack=False)
+    after.push(result.move)
+    _expected_replies[zobrist_key(after)] = result.ponder
+    if len(_expected_replies) > 1024:
+        _expected_replies.popitem(last=False)
+
+
+class Ponder:
+    """Stockfish phân tích thế cờ sau nước đoán trước của đối phương trên một engine mượn từ nhóm.
+
+    python-chess không có lệnh ponderhit nên ponder được làm bằng phân tích vô hạn: đúng
+    nước thì phân tích tiếp cho đủ thời gian tính từ lúc bắt đầu rồi dừng, sai nước thì dừng ngay.
+    """
+
+    def __init__(self, board: chess.Board):
+        self.board = board.copy()
+        self.position = None
+        self.analysis = None
+        self.engine = None
+        self.stopped = False
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        pool = get_pool()
+        engine = pool.checkout()
+        # Lỗi bất kỳ (không chỉ EngineError) thì engine vẫn được trả về nhóm nhưng bị bỏ, không dùng lại
+        broken = True
+        try:
+            predicted = _expected_replies.get(zobrist_key(self.board))
+            if predicted is None or not self.board.is_legal(predicted):
+                predicted = engine.play(self.board, chess.engine.Limit(PREDICT_TIME)).move
+            position = self.board.copy()
+            position.push(predicted)
+            with self.lock:
+                if not self.stopped:
+                    self.analysis = engine.analysis(position)
+                    # Từ đây finish() trả engine về nhóm
+                    self.engine, self.position, engine = engine, position, None
+            broken = False
+        except chess.engine.EngineError:
+            pass
+        finally:
+            if engine is not None:
+                pool.checkin(engine, broken=broken)
 
-def move(board, time=1.5):
-    return engine.play(board, chess.engine.Limit(time)).move
+    def finish(self):
+        """Dừng phân tích, trả engine về nhóm và lấy nước tốt nhất (None nếu engine lỗi)."""
+        with self.lock:
+            self.stopped = True
+        self.thread.join()
+        with self.lock:
+            analysis, engine, self.analysis = self.analysis, self.engine, None
+        if analysis is None:
+            return None
+        broken = True
+        try:
+            analysis.stop()
+            best = analysis.wait().move
+            broken = False
+        except chess.engine.EngineError:
+            return None
+        finally:
+            get_pool().checkin(engine, broken=broken)
+        return best
 
+    def hit(self, board: chess.Board, time_limit: float, stop_token: threading.Event = None):
+        """Nước đi cho `board` nếu đúng thế cờ đã ponder, None nếu sai nước; bật `stop_token`
+        thì thôi chờ và dừng phân tích ngay."""
+        self.thread.join()
+        if self.position is None or board.fen() != self.position.fen():
+            self.stop()
+            return None
+        remaining = self.started + time_limit - time.monotonic()
+        if remaining > 0:
+            if stop_token is None:
+                time.sleep(remaining)
+            else:
+                stop_token.wait(remaining)
+        return self.finish()
 
-STOCKFISH_PATH = "stockfish-windows-x86-64-avx2/stockfish/stockfish-windows-x86-64-avx2.exe"
-engine = chess.engine.SimpleEngine.popen_uci(
-    STOCKFISH_PATH,
-    creationflags=subprocess.CREATE_NO_WINDOW  # Ẩn cửa sổ console trên Windows
-)
+    def stop(self):
+        self.finish()
@@ -0,0 +1,122 @@
+"""Tra bảng tàn cuộc Syzygy (WDL/DTZ) trong một thư mục trên máy cho BotBaka."""
+import os
+from collections import OrderedDict
+
+import chess
+import chess.syzygy
+
+from transposition import zobrist_key
+
+# Thư mục chứa các file .rtbw/.rtbz; đổi bằng biến môi trường SYZYGY_PATH hoặc tùy chọn tìm kiếm
+SYZYGY_DIR = os.environ.get(
+    "SYZYGY_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "syzygy"))
+# Điểm thắng theo bảng tàn cuộc: thấp hơn điểm chiếu bí để chiếu bí thật vẫn được ưu tiên
+TB_WIN_SCORE = 90000
+PROBE_CACHE_ENTRIES = 65536
+
+# Các bảng được mở một lần cho mỗi tiến trình (file được python-chess mở dần khi tra lần đầu)
+_tablebase = None
+_tablebase_dir = None
+max_pieces = 0
+# Bộ nhớ đệm LRU của kết quả WDL theo khóa Zobrist (None = thiếu bảng cho thế cờ đó)
+_wdl_cache = OrderedDict()
+
+
+def open_tablebase(directory: str = None):
+    """Bảng tàn cuộc của thư mục `directory` (mặc định SYZYGY_DIR), None khi không có file nào."""
+    global _tablebase, _tablebase_dir, max_pieces
+    directory = directory or SYZYGY_DIR
+    if directory == _tablebase_dir:
+        return _tablebase
+    if _tablebase is not None:
+        _tablebase.close()
+    _wdl_cache.clear()
+    _tablebase, _tablebase_dir, max_pieces = None, directory, 0
+    if os.path.isdir(directory):
+        tablebase = chess.syzygy.Tablebase()
+        if tablebase.add_directory(directory) and tablebase.wdl:
+            _tablebase = tablebase
+            # Tên bảng dạng "KRPvKR": số quân bằng số chữ cái trừ chữ "v"
+            max_pieces = max(len(name) - 1 for name in tablebase.wdl)
+    return _tablebase
+
+
+def can_probe(board) -> bool:
+    """Thế cờ (chess.Board hoặc Position) đủ ít quân và không còn quyền nhập thành."""
+    castling = board.castling if hasattr(board, "castling") else board.castling_rights
+    return _tablebase is not None and not castling and chess.popcount(board.occupied) <= max_pieces
+
+
+def position_board(pos) -> chess.Board:
+    """Dựng chess.Board từ Position để tra bảng (không cần lịch sử nước đi)."""
+    board = chess.Board(None)
+    board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings = pos.bb[1:]
+    board.occupied_co[chess.WHITE] = pos.occupied_co[chess.WHITE]
+    board.occupied_co[chess.BLACK] = pos.occupied_co[chess.BLACK]
+    board.occupied = pos.occupied
+    board.turn = pos.turn
+    board.ep_square = pos.ep_square
+    board.halfmove_clock = pos.halfmove_clock
+    return board
+
+
+def probe_wdl(board, key: int = None):
+    """WDL theo bên đang đi (2 thắng, 1 thắng nhưng quá 50 nước, 0 hòa, -1, -2 thua) hoặc None."""
+    if key is None:
+        key = board.key if hasattr(board, "key") else zobrist_key(board)
+    if key in _wdl_cache:
+        _wdl_cache.move_to_end(key)
+        return _wdl_cache[key]
+    if not isinstance(board, chess.Board):
+        board = position_board(board)
+    try:
+        wdl = _tablebase.probe_wdl(board)
+    except KeyError:  # thiếu bảng (MissingTableError) hoặc thế cờ không tra được
+        wdl = None
+    _wdl_cache[key] = wdl
+    if len(_wdl_cache) > PROBE_CACHE_ENTRIES:
+        _wdl_cache.popitem(last=False)
+    return wdl
+
+
+def wdl_score(wdl: int, ply: int = 0) -> int:
+    """Đổi WDL thành điểm tìm kiếm; thắng sớm hơn được điểm cao hơn, thắng/thua quá 50 nước tính hòa."""
+    if wdl == 2:
+        return TB_WIN_SCORE - ply
+    if wdl == -2:
+        return -TB_WIN_SCORE + ply
+    return 0
+
+
+def root_move(board: chess.Board):
+    """Chọn nước ở gốc theo DTZ: giữ kết quả WDL tốt nhất, thắng nhanh nhất, thua chậm nhất.
+
+    Trả về (nước đi, WDL theo bên đi) hoặc None khi không tra được.
+    """
+    if not can_probe(board):
+        return None
+    best, best_rank, best_wdl = None, None, None
+    board = board.copy(stack=False)
+    for move in board.legal_moves:
+        zeroing = board.is_zeroing(move)
+        board.push(move)
+        if board.is_checkmate():
+            board.pop()
+            return move, 2
+        try:
+            wdl = -_tablebase.probe_wdl(board)
+            dtz = -_tablebase.probe_dtz(board)
+        except KeyError:  # thiếu bảng (MissingTableError) hoặc thế cờ không tra được
+            return None
+        finally:
+            board.pop()
+        if wdl > 0:
+            # Thắng: nước ăn quân/đi tốt giữ thắng đặt lại luật 50 nước nên được xét trước
+            rank = (wdl, 1 if zeroing else 0, -abs(dtz))
+        elif wdl < 0:
+            rank = (wdl, 0, abs(dtz))
+        else:
+            rank = (wdl, 0, 0)
+        if best_rank is None or rank > best_rank:
+            best, best_rank, best_wdl = move, rank, wdl
+    return (best, best_wdl) if best is not None else None
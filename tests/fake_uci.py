@@ -0,0 +1,51 @@
+"""Engine UCI giả cho kiểm thử: luôn đi nước hợp lệ đầu tiên, trả lời ngay lệnh `go`.
+
+Chạy `python fake_uci.py [file]`: nếu `file` tồn tại thì lần `go` tiếp theo xóa file
+rồi thoát với mã 1, giả lập engine bị chết giữa chừng.
+"""
+import os
+import sys
+
+import chess
+
+
+def main():
+    crash_file = sys.argv[1] if len(sys.argv) > 1 else None
+    board = chess.Board()
+    pending = None  # trả lời của `go infinite`, gửi khi nhận `stop`
+    for line in sys.stdin:
+        command = line.split()
+        if not command:
+            continue
+        if command[0] == "uci":
+            print("id name FakeFish")
+            print("option name Threads type spin default 1 min 1 max 8")
+            print("option name Hash type spin default 16 min 1 max 1024")
+            print("uciok")
+        elif command[0] == "isready":
+            print("readyok")
+        elif command[0] == "position":
+            moves = command.index("moves") if "moves" in command else len(command)
+            board = chess.Board() if command[1] == "startpos" else chess.Board(" ".join(command[2:moves]))
+            for move in command[moves + 1:]:
+                board.push_uci(move)
+        elif command[0] == "go":
+            if crash_file is not None and os.path.exists(crash_file):
+                os.remove(crash_file)
+                sys.exit(1)
+            best = next(iter(board.legal_moves))
+            print(f"info depth 1 score cp 0 pv {best.uci()}")
+            if "infinite" in command:
+                pending = f"bestmove {best.uci()}"
+            else:
+                print(f"bestmove {best.uci()}")
+        elif command[0] == "stop" and pending is not None:
+            print(pending)
+            pending = None
+        elif command[0] == "quit":
+            break
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import chess
+
+import bitbase
+import botbaka
+
+KPK_FEN = "8/8/8/4k3/8/8/4P3/4K3 w - - 0 1"
+
+
+class MissingBitbaseTest(unittest.TestCase):
+    def test_search_never_generates_tables(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(bitbase, "BITBASE_DIR", directory), \
+                mock.patch.dict(bitbase._tables, clear=True):
+            board = chess.Board(KPK_FEN)
+            self.assertIsNone(bitbase.probe(board))
+            start = time.monotonic()
+            result = botbaka.search(board, time_limit=0.1)
+            self.assertLess(time.monotonic() - start, 0.5)
+            self.assertIn(result.move, board.legal_moves)
+            self.assertEqual(os.listdir(directory), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
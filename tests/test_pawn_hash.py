@@ -0,0 +1,39 @@
+import random
+
+import chess
+
+import botbaka
+
+
+def random_positions(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    positions = []
+    board = chess.Board()
+    while len(positions) < count:
+        if board.is_game_over():
+            board = chess.Board()
+        board.push(rng.choice(list(board.legal_moves)))
+        positions.append(board.copy(stack=False))
+    return positions
+
+
+def test_probe_matches_direct_evaluation():
+    table = botbaka.PawnHashTable()
+    for board in random_positions(300) * 2:
+        expected = (botbaka.evaluate_pawn_structure(board), botbaka.evaluate_king_safety(board))
+        assert table.probe(board) == expected
+    assert table.hits and table.misses
+
+
+def test_king_moves_do_not_grow_an_entry():
+    table = botbaka.PawnHashTable(max_entries=8)
+    # Cùng cấu trúc tốt, vua đi khắp bàn cờ: số ô của bảng vẫn bị giới hạn
+    for square in chess.SQUARES:
+        if square == chess.A2 or chess.square_distance(square, chess.E8) <= 1:
+            continue
+        board = chess.Board(None)
+        board.set_piece_at(chess.E8, chess.Piece(chess.KING, chess.BLACK))
+        board.set_piece_at(chess.A2, chess.Piece(chess.PAWN, chess.WHITE))
+        board.set_piece_at(square, chess.Piece(chess.KING, chess.WHITE))
+        table.probe(board)
+    assert len(table.entries) == 8
@@ -0,0 +1,25 @@
+import chess
+import pytest
+
+from position import Position
+
+# Số nút perft đã biết (chessprogramming.org) ở độ sâu 1, 2, 3
+PERFT_CASES = [
+    (chess.STARTING_FEN, [20, 400, 8902]),
+    # Kiwipete: nhập thành, ghim, phong cấp
+    ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862]),
+    # Bắt tốt qua đường để lộ vua theo hàng ngang
+    ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812]),
+    ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467]),
+    ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379]),
+]
+
+
+@pytest.mark.parametrize("fen, counts", PERFT_CASES)
+def test_perft_matches_known_counts(fen, counts):
+    pos = Position.from_board(chess.Board(fen))
+    key, pieces = pos.key, pos.piece_map()
+    for depth, expected in enumerate(counts, 1):
+        assert pos.perft(depth) == expected, f"độ sâu {depth}"
+    # perft phải trả thế cờ về nguyên trạng sau khi make/unmake
+    assert (pos.key, pos.piece_map()) == (key, pieces)
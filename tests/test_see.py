@@ -0,0 +1,28 @@
+import chess
+import pytest
+
+from position import Position, make_code
+from see import see
+
+# Thế cờ có kết quả trao đổi đã biết: (FEN, nước đi, SEE mong đợi)
+SEE_CASES = [
+    ("1k1r4/1pp4p/p7/4p3/8/P5P1/1PP4P/2K1R3 w - - 0 1", "e1e5", 100),
+    ("1k1r3q/1ppn3p/p4b2/4p3/8/P2N2P1/1PP1R1BP/2K1Q3 w - - 0 1", "d3e5", -220),
+    ("4R3/2r3p1/5bk1/1p1r3p/p2PR1P1/P1BK1P2/1P6/8 b - - 0 1", "h5g4", 0),
+    ("4r1k1/5pp1/nbp4p/1p2p2q/1P2P1b1/1BP2N1P/1B2QPPK/3R4 b - - 0 1", "g4f3", -10),
+    ("4k3/8/3q4/4P3/8/8/8/4K3 w - - 0 1", "e5d6", 900),
+    ("4k3/8/2p5/3p4/8/8/3Q4/4K3 w - - 0 1", "d2d5", -800),
+    ("3r2k1/8/8/3p4/8/8/3R4/3RK3 w - - 0 1", "d2d5", 100),
+    ("3r2k1/8/8/3p4/8/8/3R4/4K3 w - - 0 1", "d2d5", -400),
+    ("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1", "e5d6", 100),
+    ("2k5/1P6/8/8/8/8/8/4K3 w - - 0 1", "b7b8q", -100),
+    ("4k3/1P6/8/8/8/8/8/4K3 w - - 0 1", "b7b8q", 800),
+    ("4k3/3p4/8/8/8/8/3R4/3RK3 w - - 0 1", "d2d7", 100),
+]
+
+
+@pytest.mark.parametrize("fen, uci, expected", SEE_CASES)
+def test_see_known_exchanges(fen, uci, expected):
+    move = chess.Move.from_uci(uci)
+    code = make_code(move.from_square, move.to_square, move.promotion or 0)
+    assert see(Position.from_board(chess.Board(fen)), code) == expected
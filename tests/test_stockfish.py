@@ -0,0 +1,88 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import chess
+import chess.engine
+
+import stockfish
+
+FAKE_UCI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_uci.py")
+
+
+class EnginePoolTest(unittest.TestCase):
+    def setUp(self):
+        self.crash_file = os.path.join(tempfile.mkdtemp(), "crash")
+        self.pool = stockfish.EnginePool([sys.executable, FAKE_UCI, self.crash_file], size=1)
+
+    def tearDown(self):
+        self.pool.close()
+        if os.path.exists(self.crash_file):
+            os.remove(self.crash_file)
+        os.rmdir(os.path.dirname(self.crash_file))
+
+    def test_lazy_start(self):
+        self.assertEqual(self.pool.started, 0)
+        self.assertEqual(self.pool.idle, [])
+        engine = self.pool.checkout()
+        self.assertEqual(self.pool.started, 1)
+        self.assertEqual(engine.id["name"], "FakeFish")
+        self.pool.checkin(engine)
+        self.assertEqual(self.pool.idle, [engine])
+        # Mượn lại thì dùng engine đang rảnh, không mở tiến trình mới
+        self.assertIs(self.pool.checkout(), engine)
+        self.pool.checkin(engine)
+        self.assertEqual(self.pool.started, 1)
+
+    def test_play_restarts_crashed_engine(self):
+        engine = self.pool.checkout()
+        self.pool.checkin(engine)
+        open(self.crash_file, "w").close()
+        board = chess.Board()
+        result = self.pool.play(board, chess.engine.Limit(time=0.01))
+        self.assertIn(result.move, board.legal_moves)
+        self.assertFalse(os.path.exists(self.crash_file))
+        self.assertEqual(self.pool.started, 1)
+        self.assertIsNot(self.pool.idle[0], engine)
+
+    def test_checkout_blocks_when_full(self):
+        engine = self.pool.checkout()
+        borrowed = []
+        waiter = threading.Thread(target=lambda: borrowed.append(self.pool.checkout()))
+        waiter.start()
+        waiter.join(0.2)
+        self.assertTrue(waiter.is_alive())
+        self.pool.checkin(engine)
+        waiter.join(5)
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual(borrowed, [engine])
+        self.pool.checkin(engine)
+        self.assertEqual(self.pool.started, 1)
+
+    def test_ponder_hit_returns_engine(self):
+        with mock.patch.object(stockfish, "_pool", self.pool):
+            board = chess.Board()
+            pondering = stockfish.Ponder(board)
+            pondering.thread.join()
+            board.push(pondering.position.peek())
+            move = pondering.hit(board, 0)
+        self.assertIn(move, board.legal_moves)
+        self.assertEqual(len(self.pool.idle), 1)
+
+    def test_ponder_discards_engine_after_unexpected_error(self):
+        with mock.patch.object(stockfish, "_pool", self.pool), \
+                mock.patch.object(chess.engine.SimpleEngine, "play", side_effect=RuntimeError), \
+                mock.patch.object(threading, "excepthook"):
+            pondering = stockfish.Ponder(chess.Board())
+            pondering.thread.join()
+        self.assertEqual(self.pool.started, 0)
+        self.assertIsNone(pondering.stop())
+        # Nhóm một engine không bị kẹt: mượn được engine mới ngay
+        self.pool.checkin(self.pool.checkout())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import random
+import unittest
+from unittest import mock
+
+import chess
+
+import time_manager
+
+
+class FakeTime:
+    """Đồng hồ giả thay cho time.monotonic: chỉ chạy khi được gọi advance()."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+def play_game(base: float, increment: float, max_plies: int = 300, overhead: float = 0.005):
+    """Ván cờ nước ngẫu nhiên có đồng hồ, mỗi nước tiêu hết ngân sách cứng cộng thêm `overhead`.
+
+    Trả về (số nửa nước đã đi, màu hết giờ hoặc None).
+    """
+    fake_time = FakeTime()
+    rng = random.Random(0)
+    with mock.patch.object(time_manager.time, "monotonic", fake_time):
+        board = chess.Board()
+        clock = time_manager.GameClock(base, increment)
+        while not board.is_game_over() and board.ply() < max_plies:
+            budget = time_manager.allocate(clock.time_left(board.turn), increment, board.ply() // 2)
+            fake_time.advance(budget.hard + overhead)
+            board.push(rng.choice(list(board.legal_moves)))
+            if clock.flag() is not None:
+                return board.ply(), clock.flag()
+            clock.press()
+    return board.ply(), None
+
+
+class AllocateTest(unittest.TestCase):
+    def test_sudden_death_never_flags(self):
+        for base, increment in ((3, 0), (10, 0), (60, 0), (10, 0.1)):
+            with self.subTest(base=base, increment=increment):
+                self.assertIsNone(play_game(base, increment)[1])
+
+    def test_hard_limit_is_a_few_times_soft(self):
+        for moves_played in (0, 30, 60, 120):
+            budget = time_manager.allocate(60.0, 0.0, moves_played)
+            self.assertLessEqual(budget.hard, budget.soft * time_manager.HARD_FACTOR + 1e-9)
+            self.assertLess(budget.hard, 60.0 / 10)
+
+    def test_moves_instantly_below_safety_margin(self):
+        budget = time_manager.allocate(time_manager.SAFETY_MARGIN / 2, 0.0, 40)
+        self.assertEqual((budget.soft, budget.hard), (0.0, 0.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
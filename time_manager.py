@@ -0,0 +1,131 @@
+"""Đồng hồ ván cờ (thời gian gốc + increment cho mỗi bên) và chia thời gian nghĩ cho các bot."""
+import time
+
+import chess
+
+# Chia thời gian: giả sử ván còn GAME_MOVES - số nước đã đi nước nữa, nhưng không bao giờ
+# ít hơn MIN_MOVES_TO_GO để ván dài vẫn chỉ tiêu một phần nhỏ thời gian còn lại mỗi nước
+GAME_MOVES = 80
+MIN_MOVES_TO_GO = 50
+INCREMENT_SHARE = 0.75  # phần increment được tiêu ngay ở nước này
+HARD_FACTOR = 3.0  # ngân sách cứng gấp tối đa bấy nhiêu lần ngân sách mềm
+MOVE_OVERHEAD = 0.03  # giây mất thêm mỗi nước ngoài tìm kiếm (luồng bot, vòng lặp giao diện)
+SAFETY_MARGIN = 0.1  # giây luôn chừa lại; còn ít hơn thì đi ngay không nghĩ
+MIN_TIME = 0.01
+# Hệ số nhân ngân sách mềm theo số lần lặp liên tiếp giữ nguyên nước tốt nhất:
+# nước tốt nhất vừa đổi thì nghĩ lâu hơn, ổn định lâu thì đi sớm
+STABILITY_SCALE = (1.6, 1.2, 1.0, 0.8, 0.6)
+
+
+def parse_time_control(text: str):
+    """"180+2" -> (180.0, 2.0) giây; chuỗi rỗng -> None (không tính giờ)."""
+    if not text:
+        return None
+    base, _, increment = text.partition("+")
+    return float(base), float(increment or 0)
+
+
+class GameClock:
+    """Đồng hồ cờ: đồng hồ của bên đang đi chạy, bấm đồng hồ sau mỗi nước thì cộng increment."""
+
+    def __init__(self, base: float, increment: float = 0.0):
+        self.base = base
+        self.increment = increment
+        self.reset()
+
+    def reset(self):
+        self.remaining = {chess.WHITE: self.base, chess.BLACK: self.base}
+        self.turn = chess.WHITE
+        self.started = time.monotonic()
+        self.paused = False
+
+    def charge(self):
+        """Trừ thời gian đã trôi vào đồng hồ đang chạy."""
+        now = time.monotonic()
+        if not self.paused:
+            self.remaining[self.turn] -= now - self.started
+        self.started = now
+
+    def time_left(self, color: chess.Color) -> float:
+        if color == self.turn and not self.paused:
+            return self.remaining[color] - (time.monotonic() - self.started)
+        return self.remaining[color]
+
+    def press(self):
+        """Bên vừa đi bấm đồng hồ: được cộng increment (nếu chưa hết giờ), đồng hồ đối phương chạy."""
+        self.charge()
+        if self.remaining[self.turn] > 0:
+            self.remaining[self.turn] += self.increment
+        self.turn = not self.turn
+
+    def switch(self, color: chess.Color):
+        """Cho đồng hồ của `color` chạy mà không cộng increment (sau khi hoàn tác nước đi)."""
+        self.charge()
+        self.turn = color
+
+    def pause(self):
+        self.charge()
+        self.paused = True
+
+    def resume(self):
+        self.started = time.monotonic()
+        self.paused = False
+
+    def flag(self):
+        """Màu của bên đã hết giờ, None nếu cả hai còn giờ."""
+        for color in chess.COLORS:
+            if self.time_left(color) <= 0:
+                return color
+        return None
+
+
+class TimeBudget:
+    """Thời gian nghĩ cho một nước: không bao giờ quá `hard` giây; sau mỗi lần lặp sâu dần thì
+    dừng khi đã dùng quá `soft` giây nhân hệ số theo độ ổn định của nước tốt nhất."""
+
+    def __init__(self, soft: float, hard: float):
+        self.soft = soft
+        self.hard = hard
+        self.started = time.monotonic()
+        self.best_move = None
+        self.stable_iterations = 0
+
+    @property
+    def deadline(self) -> float:
+        return self.started + self.hard
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def update(self, best_move):
+        """Ghi nhận nước tốt nhất của lần lặp vừa xong."""
+        if best_move == self.best_move:
+            self.stable_iterations += 1
+        else:
+            self.best_move = best_move
+            self.stable_iterations = 0
+
+    def should_stop(self) -> bool:
+        scale = STABILITY_SCALE[min(self.stable_iterations, len(STABILITY_SCALE) - 1)]
+        return self.elapsed() >= min(self.soft * scale, self.hard)
+
+
+def allocate(remaining: float, increment: float = 0.0, moves_played: int = 0) -> TimeBudget:
+    """Ngân sách cho nước tiếp theo khi còn `remaining` giây và đã đi `moves_played` nước.
+
+    Còn dưới SAFETY_MARGIN giây thì ngân sách bằng 0: bot đi ngay (BotBaka lấy nước của
+    lần lặp đầu hoặc nước trong bảng chuyển vị).
+    """
+    reserve = remaining - SAFETY_MARGIN
+    if reserve <= 0:
+        return TimeBudget(0.0, 0.0)
+    moves_to_go = max(MIN_MOVES_TO_GO, GAME_MOVES - moves_played)
+    # Trừ trước thời gian phụ của mọi nước còn lại rồi mới chia
+    usable = max(0.0, reserve - MOVE_OVERHEAD * moves_to_go)
+    soft = usable / moves_to_go + increment * INCREMENT_SHARE
+    hard = min(usable / moves_to_go * HARD_FACTOR + increment * INCREMENT_SHARE, reserve)
+    soft = min(soft, hard)
+    return TimeBudget(max(soft, MIN_TIME), max(hard, MIN_TIME))
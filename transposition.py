@@ -0,0 +1,121 @@
+import multiprocessing
+from array import array
+
+import chess
+import chess.polyglot
+
+# Loại cận của điểm số được lưu trong bảng chuyển vị
+EXACT = 0
+LOWER = 1  # điểm thật >= điểm lưu (fail-high)
+UPPER = 2  # điểm thật <= điểm lưu (fail-low)
+
+# Mỗi ô gồm 8 byte khóa Zobrist + 8 byte dữ liệu đã đóng gói. Khóa được lưu XOR với dữ liệu:
+# khi bảng dùng chung giữa các tiến trình, ô bị ghi dở (khóa và dữ liệu lệch nhau) bị coi là trống
+ENTRY_BYTES = 16
+# Mỗi bucket có 2 ô: ô 0 ưu tiên độ sâu, ô 1 luôn bị thay thế
+BUCKET_SIZE = 2
+
+SCORE_OFFSET = 1 << 31
+
+
+def zobrist_key(board: chess.Board) -> int:
+    """Khóa Zobrist 64 bit của thế cờ (cùng khóa với sách khai cuộc Polyglot)."""
+    return chess.polyglot.zobrist_hash(board)
+
+
+def encode_move(move) -> int:
+    """Mã hóa nước đi thành số nguyên 15 bit: from | to << 6 | promotion << 12."""
+    if move is None:
+        return 0
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def decode_move(code: int):
+    if not code:
+        return None
+    promotion = code >> 12
+    return chess.Move(code & 63, (code >> 6) & 63, promotion=promotion or None)
+
+
+class TranspositionTable:
+    """Bảng chuyển vị kích thước cố định, giới hạn theo số MB."""
+
+    def __init__(self, size_mb: float = 16):
+        self.generation = 0
+        self.resize(size_mb)
+
+    def resize(self, size_mb: float):
+        self.size_mb = size_mb
+        self.bucket_count = max(
+            1, int(size_mb * 1024 * 1024) // (ENTRY_BYTES * BUCKET_SIZE))
+        slots = self.bucket_count * BUCKET_SIZE
+        self.keys = array('Q', bytes(8 * slots))
+        self.data = array('Q', bytes(8 * slots))
+        self.shared = None
+
+    def share(self):
+        """Chuyển bảng sang bộ nhớ dùng chung (giữ nguyên các ô đang có); trả về cặp mảng
+        để gắn vào bảng ở tiến trình con bằng attach()."""
+        if self.shared is None:
+            keys = multiprocessing.RawArray('Q', len(self.keys))
+            data = multiprocessing.RawArray('Q', len(self.data))
+            memoryview(keys).cast('B')[:] = memoryview(self.keys).cast('B')
+            memoryview(data).cast('B')[:] = memoryview(self.data).cast('B')
+            self.attach((keys, data))
+        return self.shared
+
+    def attach(self, shared):
+        """Dùng cặp mảng dùng chung do share() tạo ở tiến trình khác."""
+        keys, data = shared
+        self.shared = shared
+        self.bucket_count = len(keys) // BUCKET_SIZE
+        self.keys = memoryview(keys).cast('B').cast('Q')
+        self.data = memoryview(data).cast('B').cast('Q')
+
+    def clear(self):
+        """Xóa mọi ô tại chỗ (bảng dùng chung vẫn dùng chung)."""
+        for table in (self.keys, self.data):
+            view = memoryview(table).cast('B')
+            view[:] = bytes(len(view))
+
+    def new_search(self):
+        """Tăng thế hệ để các ô của lần tìm kiếm trước dễ bị thay thế hơn."""
+        self.generation = (self.generation + 1) & 63
+
+    def probe(self, key: int):
+        """Trả về (depth, score, flag, move_code) hoặc None nếu không có."""
+        slot = (key % self.bucket_count) * BUCKET_SIZE
+        keys = self.keys
+        data = self.data
+        for i in (slot, slot + 1):
+            packed = data[i]
+            if packed and keys[i] ^ packed == key:
+                return ((packed >> 32) & 0xFF,
+                        (packed & 0xFFFFFFFF) - SCORE_OFFSET,
+                        (packed >> 40) & 3,
+                        (packed >> 42) & 0x7FFF)
+        return None
+
+    def store(self, key: int, depth: int, score: int, flag: int, move_code: int):
+        slot = (key % self.bucket_count) * BUCKET_SIZE
+        score = max(-SCORE_OFFSET + 1, min(SCORE_OFFSET - 1, int(score)))
+        packed = ((score + SCORE_OFFSET)
+                  | (min(depth, 255) << 32)
+                  | (flag << 40)
+                  | (move_code << 42)
+                  | (self.generation << 58))
+        old = self.data[slot]
+        same = self.keys[slot] ^ old == key
+        # Ô ưu tiên độ sâu chỉ bị ghi đè khi cùng thế cờ, còn trống,
+        # thuộc lần tìm kiếm cũ hoặc nước mới được tìm sâu hơn
+        if (same or not old
+                or (old >> 58) != self.generation
+                or depth >= (old >> 32) & 0xFF):
+            if same and not move_code:
+                # Giữ lại nước tốt nhất cũ nếu lần này không tìm ra nước nào
+                packed |= ((old >> 42) & 0x7FFF) << 42
+            self.keys[slot] = key ^ packed
+            self.data[slot] = packed
+        else:
+            self.keys[slot + 1] = key ^ packed
+            self.data[slot + 1] = packed
@@ -0,0 +1,292 @@
+"""Tinh chỉnh trọng số đánh giá của BotBaka kiểu Texel: `python tune.py positions.epd`.
+
+Mỗi dòng của file dữ liệu là một FEN kèm kết quả ván theo quân trắng, ví dụ
+`<fen> [1.0]`, `<fen> [0.5]` hoặc `<fen> c9 "1-0";`.
+"""
+import argparse
+import json
+import math
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import chess
+import numpy as np
+
+import botbaka
+
+# Vector tham số: giá trị quân (tốt..hậu), 6 bảng vị trí x 64 ô, lá chắn vua,
+# tốt chồng, tốt cô lập, mobility (tốt..vua)
+MATERIAL = 0
+PST = 5
+KING_SHIELD = PST + 6 * 64
+DOUBLED = KING_SHIELD + 1
+ISOLATED = KING_SHIELD + 2
+MOBILITY = KING_SHIELD + 3
+PARAM_COUNT = MOBILITY + 6
+# Cột "dày" của ma trận đặc trưng: mọi tham số trừ bảng vị trí
+DENSE = [*range(MATERIAL, PST), *range(KING_SHIELD, PARAM_COUNT)]
+# Giá trị tốt giữ cố định làm mốc để điểm vẫn tính bằng centipawn
+FROZEN = [MATERIAL]
+MAX_PIECES = 32
+CHUNK_SIZE = 20000
+
+RESULT_PATTERN = re.compile(r'(1-0|0-1|1/2-1/2|\[(1\.0|0\.5|0\.0|1|0)\])')
+RESULTS = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}
+
+
+def current_params() -> np.ndarray:
+    """Trọng số đang dùng trong botbaka, xếp theo bố cục vector tham số."""
+    params = np.zeros(PARAM_COUNT)
+    for piece_type in chess.PIECE_TYPES:
+        if piece_type != chess.KING:
+            params[MATERIAL + piece_type - 1] = botbaka.piece_values[piece_type]
+        params[PST + (piece_type - 1) * 64:PST + piece_type * 64] = botbaka.piece_tables[piece_type]
+        params[MOBILITY + piece_type - 1] = botbaka.mobility_weights[piece_type]
+    params[KING_SHIELD] = botbaka.KING_SHIELD_BONUS
+    params[DOUBLED] = botbaka.DOUBLED_PAWN_PENALTY
+    params[ISOLATED] = botbaka.ISOLATED_PAWN_PENALTY
+    return params
+
+
+def mobility_counts(board: chess.Board, color: bool) -> list:
+    """Số ô di chuyển theo từng loại quân, cùng cách đếm với botbaka.side_mobility."""
+    own = board.occupied_co[color]
+    occupied = board.occupied
+    counts = [0] * 6
+    for piece_type in (chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN, chess.KING):
+        for square in chess.scan_forward(board.pieces_mask(piece_type, color)):
+            counts[piece_type - 1] += chess.popcount(
+                botbaka.piece_attacks(piece_type, square, occupied) & ~own)
+    pawns = board.pawns & own
+    if color == chess.WHITE:
+        pushes = (pawns << 8) & ~occupied & chess.BB_ALL
+        captures = ((pawns & ~chess.BB_FILE_A) << 7) | ((pawns & ~chess.BB_FILE_H) << 9)
+    else:
+        pushes = (pawns >> 8) & ~occupied
+        captures = ((pawns & ~chess.BB_FILE_A) >> 9) | ((pawns & ~chess.BB_FILE_H) >> 7)
+    counts[0] = chess.popcount(pushes) + chess.popcount(captures & board.occupied_co[not color])
+    return counts
+
+
+def pawn_counts(board: chess.Board, color: bool):
+    """(số tốt chồng, số tốt cô lập, số tốt che chắn vua) của một bên."""
+    files = [chess.square_file(square) for square in board.pieces(chess.PAWN, color)]
+    doubled = sum(max(files.count(file) - 1, 0) for file in range(8))
+    isolated = sum(1 for file in files if file - 1 not in files and file + 1 not in files)
+    shield = 0
+    king_square = board.king(color)
+    if king_square is not None:
+        rank = chess.square_rank(king_square) + (1 if color == chess.WHITE else -1)
+        for file in range(chess.square_file(king_square) - 1, chess.square_file(king_square) + 2):
+            if 0 <= file <= 7 and 0 <= rank <= 7 and \
+                    board.piece_at(chess.square(file, rank)) == chess.Piece(chess.PAWN, color):
+                shield += 1
+    return doubled, isolated, shield
+
+
+def position_features(board: chess.Board):
+    """Đặc trưng tuyến tính của evaluate_position: điểm = dense . w[DENSE] + sum(sign * w[index])."""
+    dense = np.zeros(len(DENSE))
+    index = np.zeros(MAX_PIECES, dtype=np.int16)
+    sign = np.zeros(MAX_PIECES, dtype=np.int8)
+    for i, (square, piece) in enumerate(board.piece_map().items()):
+        color_sign = 1 if piece.color == chess.WHITE else -1
+        if piece.piece_type != chess.KING:
+            dense[MATERIAL + piece.piece_type - 1] += color_sign
+        table_square = square if piece.color == chess.WHITE else chess.square_mirror(square)
+        index[i] = PST + (piece.piece_type - 1) * 64 + table_square
+        sign[i] = color_sign
+    white, black = pawn_counts(board, chess.WHITE), pawn_counts(board, chess.BLACK)
+    dense[DENSE.index(DOUBLED)] = black[0] - white[0]
+    dense[DENSE.index(ISOLATED)] = black[1] - white[1]
+    dense[DENSE.index(KING_SHIELD)] = white[2] - black[2]
+    mobility = np.subtract(mobility_counts(board, chess.WHITE), mobility_counts(board, chess.BLACK))
+    dense[DENSE.index(MOBILITY):] = mobility
+    return dense, index, sign
+
+
+def parse_line(line: str):
+    """(FEN, kết quả theo quân trắng) hoặc None nếu dòng không hợp lệ."""
+    match = RESULT_PATTERN.search(line)
+    if match is None:
+        return None
+    result = RESULTS.get(match.group(1))
+    if result is None:
+        result = float(match.group(2))
+    fields = line[:match.start()].replace(";", " ").split()
+    return " ".join(fields[:4]), result
+
+
+def extract_chunk(lines: list):
+    """Đặc trưng của một phần dữ liệu (chạy trong tiến trình con)."""
+    dense, index, sign, results = [], [], [], []
+    for line in lines:
+        parsed = parse_line(line)
+        if parsed is None:
+            continue
+        fen, result = parsed
+        try:
+            board = chess.Board(fen)
+        except ValueError:
+            continue
+        features = position_features(board)
+        dense.append(features[0])
+        index.append(features[1])
+        sign.append(features[2])
+        results.append(result)
+    return (np.array(dense).reshape(-1, len(DENSE)), np.array(index, dtype=np.int16).reshape(-1, MAX_PIECES),
+            np.array(sign, dtype=np.int8).reshape(-1, MAX_PIECES), np.array(results))
+
+
+def load_dataset(path: str, pool: ProcessPoolExecutor):
+    """Đọc file dữ liệu và tính đặc trưng song song; lưu đệm cạnh file dữ liệu để lần sau đọc nhanh."""
+    cache = path + ".features.npz"
+    if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(path):
+        data = np.load(cache)
+        return data["dense"], data["index"], data["sign"], data["results"]
+    with open(path) as data_file:
+        lines = data_file.readlines()
+    chunks = [lines[i:i + CHUNK_SIZE] for i in range(0, len(lines), CHUNK_SIZE)]
+    parts = list(pool.map(extract_chunk, chunks))
+    dense, index, sign, results = (np.concatenate([part[i] for part in parts]) for i in range(4))
+    np.savez(cache, dense=dense, index=index, sign=sign, results=results)
+    return dense, index, sign, results
+
+
+# Mỗi tiến trình con giữ một phần dữ liệu, mỗi epoch chỉ nhận vector tham số và trả về gradient
+_shard = None
+
+
+def set_shard(dense, index, sign, results):
+    global _shard
+    _shard = (dense, index, sign.astype(np.float64), results)
+
+
+def evaluate_shard(params, dense, index, sign):
+    return dense @ params[DENSE] + (sign * params[index]).sum(axis=1)
+
+
+def shard_gradient(params: np.ndarray, scale: float):
+    """(tổng bình phương sai số, gradient theo tham số) trên phần dữ liệu của tiến trình này."""
+    dense, index, sign, results = _shard
+    predicted = 1 / (1 + 10 ** (-scale * evaluate_shard(params, dense, index, sign) / 400))
+    error = predicted - results
+    slope = 2 * error * predicted * (1 - predicted) * scale * math.log(10) / 400
+    gradient = np.bincount(index.ravel(), weights=(sign * slope[:, None]).ravel(),
+                           minlength=PARAM_COUNT)
+    gradient[DENSE] += dense.T @ slope
+    return float((error ** 2).sum()), gradient
+
+
+def shard_loss(params: np.ndarray, scale: float) -> float:
+    dense, index, sign, results = _shard
+    predicted = 1 / (1 + 10 ** (-scale * evaluate_shard(params, dense, index, sign) / 400))
+    return float(((predicted - results) ** 2).sum())
+
+
+class Tuner:
+    """Chia dữ liệu cho các tiến trình con, cộng gradient của từng phần mỗi epoch."""
+
+    def __init__(self, dense, index, sign, results, workers: int):
+        self.count = len(results)
+        self.pools = []
+        for part in np.array_split(np.arange(self.count), workers):
+            pool = ProcessPoolExecutor(max_workers=1, initializer=set_shard,
+                                       initargs=(dense[part], index[part], sign[part], results[part]))
+            self.pools.append(pool)
+
+    def loss(self, params, scale: float) -> float:
+        futures = [pool.submit(shard_loss, params, scale) for pool in self.pools]
+        return sum(future.result() for future in futures) / self.count
+
+    def gradient(self, params, scale: float):
+        futures = [pool.submit(shard_gradient, params, scale) for pool in self.pools]
+        total_loss, gradient = 0.0, np.zeros(PARAM_COUNT)
+        for future in futures:
+            part_loss, part_gradient = future.result()
+            total_loss += part_loss
+            gradient += part_gradient
+        return total_loss / self.count, gradient / self.count
+
+    def fit_scale(self, params) -> float:
+        """Hệ số K của sigmoid khớp nhất với tham số hiện tại (tìm kiếm tam phân)."""
+        low, high = 0.1, 3.0
+        for _ in range(30):
+            left, right = low + (high - low) / 3, high - (high - low) / 3
+            if self.loss(params, left) < self.loss(params, right):
+                high = right
+            else:
+                low = left
+        return (low + high) / 2
+
+    def close(self):
+        for pool in self.pools:
+            pool.shutdown()
+
+
+def optimize(tuner: Tuner, params: np.ndarray, scale: float, epochs: int,
+             learning_rate: float) -> np.ndarray:
+    """Hạ gradient toàn bộ dữ liệu mỗi epoch bằng Adam (giữ nguyên các tham số mốc)."""
+    params = params.copy()
+    first, second = np.zeros(PARAM_COUNT), np.zeros(PARAM_COUNT)
+    for epoch in range(1, epochs + 1):
+        start = time.perf_counter()
+        loss, gradient = tuner.gradient(params, scale)
+        gradient[FROZEN] = 0
+        first = 0.9 * first + 0.1 * gradient
+        second = 0.999 * second + 0.001 * gradient ** 2
+        params -= (learning_rate * (first / (1 - 0.9 ** epoch))
+                   / (np.sqrt(second / (1 - 0.999 ** epoch)) + 1e-12))
+        if epoch == 1 or epoch % 10 == 0 or epoch == epochs:
+            print(f"epoch {epoch}/{epochs}: loss {loss:.6f} ({time.perf_counter() - start:.2f}s)")
+    return params
+
+
+def params_to_json(params: np.ndarray) -> dict:
+    """Định dạng file tham số mà botbaka.load_params đọc (làm tròn về số nguyên)."""
+    rounded = [int(round(value)) for value in params]
+    names = [chess.piece_name(piece_type) for piece_type in chess.PIECE_TYPES]
+    return {
+        "piece_values": {names[i]: rounded[MATERIAL + i] for i in range(5)},
+        "tables": {names[i]: rounded[PST + i * 64:PST + (i + 1) * 64] for i in range(6)},
+        "mobility": {names[i]: rounded[MOBILITY + i] for i in range(6)},
+        "king_shield": rounded[KING_SHIELD],
+        "doubled_pawn": rounded[DOUBLED],
+        "isolated_pawn": rounded[ISOLATED],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("data", help="file FEN kèm kết quả ván")
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--learning-rate", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--out", default=botbaka.PARAMS_FILE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        dense, index, sign, results = load_dataset(args.data, pool)
+    print(f"{len(results)} thế cờ, đọc và tính đặc trưng: {time.perf_counter() - start:.1f}s")
+
+    tuner = Tuner(dense, index, sign, results, args.workers)
+    try:
+        params = current_params()
+        scale = tuner.fit_scale(params)
+        print(f"K = {scale:.3f}, loss ban đầu {tuner.loss(params, scale):.6f}")
+        params = optimize(tuner, params, scale, args.epochs, args.learning_rate)
+        print(f"loss sau khi tinh chỉnh {tuner.loss(params, scale):.6f}")
+    finally:
+        tuner.close()
+
+    with open(args.out, "w") as params_file:
+        json.dump(params_to_json(params), params_file, indent=1)
+    print(f"đã ghi {args.out} ({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()